@@ -0,0 +1,271 @@
+"""
+Incremental per-(Model, SubModel, Year) price aggregates.
+
+Every cell keeps a running count / sum and a mergeable t-digest of the prices, so:
+- appending a new scrape costs O(new rows) (only the new rows are grouped),
+- per-year count / mean / median for any model / submodel / year selection come from
+  merging a handful of cells instead of re-scanning the listings,
+- the 1%-99% outlier trim bounds come from the merged sketch, not an exact quantile.
+
+Listings are de-duplicated by Ad Number across scrapes (first time seen wins).
+"""
+import os
+import json
+import math
+
+import numpy as np
+
+AGG_STORE_PATH = "yad2_aggs.json"
+
+
+class TDigest:
+    """
+    Small merging t-digest (k1 scale function) on NumPy arrays.
+
+    Batches are merged vectorised: points + centroids are sorted, bucketed by the
+    scale function of their quantile, and each bucket collapses into one centroid.
+    """
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * np.arcsin(2 * np.clip(q, 0, 1) - 1)
+
+    def _merge(self, means, weights):
+        m = np.concatenate([self.means, means])
+        w = np.concatenate([self.weights, weights])
+        if m.size == 0:
+            return
+        order = np.argsort(m, kind="mergesort")
+        m, w = m[order], w[order]
+
+        total = w.sum()
+        q_mid = (np.cumsum(w) - w / 2) / total
+        bucket = np.floor(self._k(q_mid) - self._k(0.0)).astype(np.int64)
+        # buckets are monotone in the sorted order -> contiguous runs
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+
+        new_w = np.add.reduceat(w, starts)
+        self.means = np.add.reduceat(m * w, starts) / new_w
+        self.weights = new_w
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._merge(values, np.ones_like(values))
+
+    def merge(self, other: "TDigest"):
+        if other.weights.size == 0:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._merge(other.means, other.weights)
+
+    def _knots(self):
+        # centroid centres on the cumulative-weight axis, pinned to min / max at the ends
+        cum = np.cumsum(self.weights) - self.weights / 2
+        pos = np.r_[0.0, cum, self.weights.sum()]
+        val = np.r_[self.min, self.means, self.max]
+        return pos, val
+
+    def quantile(self, q):
+        if self.weights.size == 0:
+            return math.nan
+        pos, val = self._knots()
+        return np.interp(np.asarray(q, dtype=float) * self.count, pos, val)
+
+    def cdf(self, x):
+        if self.weights.size == 0:
+            return math.nan
+        pos, val = self._knots()
+        return np.interp(np.asarray(x, dtype=float), val, pos) / self.count
+
+    def trimmed_stats(self, lo, hi):
+        """Approximate (count, mean, median) of the values inside [lo, hi]."""
+        if self.weights.size == 0:
+            return 0.0, math.nan, math.nan
+        q_lo, q_hi = float(self.cdf(lo)), float(self.cdf(hi))
+        count = (q_hi - q_lo) * self.count
+        if count <= 0:
+            return 0.0, math.nan, math.nan
+        inside = (self.means >= lo) & (self.means <= hi)
+        mean = float(np.average(self.means[inside], weights=self.weights[inside])) if inside.any() \
+            else float(self.quantile((q_lo + q_hi) / 2))
+        median = float(self.quantile((q_lo + q_hi) / 2))
+        return count, mean, median
+
+    def to_dict(self):
+        return {
+            "compression": self.compression,
+            "min": self.min if self.weights.size else None,
+            "max": self.max if self.weights.size else None,
+            "means": self.means.round(2).tolist(),
+            "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        t = cls(d.get("compression", 200))
+        t.means = np.asarray(d.get("means", []), dtype=float)
+        t.weights = np.asarray(d.get("weights", []), dtype=float)
+        if t.weights.size:
+            t.min, t.max = float(d["min"]), float(d["max"])
+        return t
+
+
+class AggStore:
+    def __init__(self, compression=200, min_price=1000):
+        self.compression = compression
+        self.min_price = min_price
+        self.cells = {}        # (model, submodel, year) -> {"count", "sum", "digest"}
+        self.seen_ads = set()  # Ad Numbers already counted
+        self.batches = []      # ids of appended scrapes
+
+    # ---------- updates ----------
+    def append(self, df, batch_id=None) -> int:
+        """Fold a new scrape into the store. Returns the number of new listings counted."""
+        import pandas as pd
+
+        if batch_id is not None and batch_id in self.batches:
+            return 0
+
+        d = pd.DataFrame({
+            "Model": df["Model"].fillna("").astype(str) if "Model" in df.columns else "",
+            "SubModel": df["SubModel"].fillna("").astype(str) if "SubModel" in df.columns else "",
+            "Production Year": pd.to_numeric(df["Production Year"], errors="coerce"),
+            "Price (₪)": pd.to_numeric(df["Price (₪)"], errors="coerce"),
+            "Ad Number": pd.to_numeric(df["Ad Number"], errors="coerce") if "Ad Number" in df.columns else np.nan,
+        })
+        d = d.dropna(subset=["Production Year", "Price (₪)"])
+        d = d[d["Price (₪)"] > self.min_price]
+
+        # de-duplicate against earlier scrapes (listings without an Ad Number are always counted)
+        ads = d["Ad Number"]
+        has_ad = ads.notna()
+        new_ad = ~ads.isin(self.seen_ads) & ~ads.duplicated()
+        d = d[~has_ad | new_ad]
+        self.seen_ads.update(int(a) for a in d["Ad Number"].dropna())
+
+        d["Production Year"] = d["Production Year"].round().astype(int)
+        for (model, submodel, year), prices in d.groupby(["Model", "SubModel", "Production Year"])["Price (₪)"]:
+            cell = self.cells.get((model, submodel, int(year)))
+            if cell is None:
+                cell = {"count": 0, "sum": 0.0, "digest": TDigest(self.compression)}
+                self.cells[(model, submodel, int(year))] = cell
+            values = prices.to_numpy(dtype=float)
+            cell["count"] += int(values.size)
+            cell["sum"] += float(values.sum())
+            cell["digest"].update(values)
+
+        if batch_id is not None:
+            self.batches.append(batch_id)
+        return len(d)
+
+    # ---------- queries ----------
+    def _select(self, model="all", submodel="all", years=None):
+        years = set(int(y) for y in years) if years is not None else None
+        for (m, sm, y), cell in self.cells.items():
+            if model not in (None, "all", "All") and m != model:
+                continue
+            if submodel not in (None, "all", "All") and sm != submodel:
+                continue
+            if years is not None and y not in years:
+                continue
+            yield y, cell
+
+    def merged_digest(self, model="all", submodel="all", years=None):
+        digest = TDigest(self.compression)
+        for _, cell in self._select(model, submodel, years):
+            digest.merge(cell["digest"])
+        return digest
+
+    def price_bounds(self, q_low=0.01, q_high=0.99, model="all", submodel="all", years=None):
+        """Outlier-trim bounds straight from the merged sketch."""
+        lo, hi = self.merged_digest(model, submodel, years).quantile([q_low, q_high])
+        return float(lo), float(hi)
+
+    def by_year(self, model="all", submodel="all", years=None, price_range=None):
+        """
+        Per-year table with the same columns as build_dashboard_plotly.aggregate_by_year:
+        Production Year / listings / avg_price / median_price.
+        price_range=(lo, hi) restricts every year to prices inside the range (sketch estimate).
+        """
+        import pandas as pd
+
+        per_year = {}
+        for y, cell in self._select(model, submodel, years):
+            acc = per_year.setdefault(y, {"count": 0, "sum": 0.0, "digest": TDigest(self.compression)})
+            acc["count"] += cell["count"]
+            acc["sum"] += cell["sum"]
+            acc["digest"].merge(cell["digest"])
+
+        rows = []
+        for y in sorted(per_year):
+            acc = per_year[y]
+            if price_range is not None:
+                count, avg, median = acc["digest"].trimmed_stats(*price_range)
+                count = int(round(count))
+                if count == 0:
+                    continue
+            else:
+                count = acc["count"]
+                avg = acc["sum"] / count
+                median = float(acc["digest"].quantile(0.5))
+            rows.append({"Production Year": y, "listings": count, "avg_price": avg, "median_price": median})
+
+        return pd.DataFrame(rows, columns=["Production Year", "listings", "avg_price", "median_price"])
+
+    # ---------- persistence ----------
+    def save(self, path=AGG_STORE_PATH):
+        data = {
+            "compression": self.compression,
+            "min_price": self.min_price,
+            "batches": self.batches,
+            "seen_ads": sorted(self.seen_ads),
+            "cells": [
+                {"model": m, "submodel": sm, "year": y, "count": c["count"], "sum": c["sum"],
+                 "digest": c["digest"].to_dict()}
+                for (m, sm, y), c in self.cells.items()
+            ],
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=AGG_STORE_PATH):
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        store = cls(data.get("compression", 200), data.get("min_price", 1000))
+        store.batches = data.get("batches", [])
+        store.seen_ads = set(data.get("seen_ads", []))
+        for c in data.get("cells", []):
+            store.cells[(c["model"], c["submodel"], int(c["year"]))] = {
+                "count": c["count"], "sum": c["sum"], "digest": TDigest.from_dict(c["digest"]),
+            }
+        return store
+
+    @classmethod
+    def load_or_create(cls, path=AGG_STORE_PATH, **kwargs):
+        return cls.load(path) if os.path.exists(path) else cls(**kwargs)
+
+
+def update_agg_store(df, path=AGG_STORE_PATH, batch_id=None) -> int:
+    store = AggStore.load_or_create(path)
+    added = store.append(df, batch_id=batch_id)
+    store.save(path)
+    return added
@@ -0,0 +1,239 @@
+"""
+Hot-path benchmarks on synthetic Yad2 data (see synthetic_data.py).
+
+Cases:
+- parse_page   data_extracter.parse_page over rows / 40 pages (the fetch_page extraction)
+- filter       listing_filters.filter_listings with a typical sidebar selection (one boolean mask)
+- filter_index the same selection through listing_index.ListingIndex (Streamlit rerun, warm index)
+- build_aggs   build_dashboard_plotly.build_aggs (per-year aggregates + sweet score)
+- dashboard    build_yad2_dashboard_html end to end (CSV -> HTML)
+- similar      similarity_index.SimilarityIndex.similar, 10 nearest of 20 ads (warm index)
+
+Each case runs at every size (default 1k, 10k, 100k, 1M rows); the best of --repeat
+wall times is recorded, and peak traced memory from one extra run under tracemalloc.
+Results are compared against a stored baseline; a case that got slower / bigger than
+the tolerance is flagged and the exit code is 1. Timings are machine-specific, so the
+baseline is not part of the repository: without one (a fresh checkout) the run is in
+record mode - nothing is compared, the results become the baseline.
+
+Usage (from Car_ads_script/):
+    python benchmarks/bench_hot_paths.py                          # no baseline yet: record it
+    python benchmarks/bench_hot_paths.py                          # compare against it
+    python benchmarks/bench_hot_paths.py --save-baseline          # re-record after an intended change
+    python benchmarks/bench_hot_paths.py --sizes 1000 10000 --cases filter build_aggs
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic_data  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_hot_paths.json")
+
+PER_PAGE = 40
+DISTINCT_PAGES = 100   # larger runs cycle through these, parsing cost per page is the same
+
+
+def _clean(df):
+    """Same cleanup as streamlit/app.py before filtering."""
+    import pandas as pd
+    from submodel_parser import add_submodel_columns
+
+    for col in ["Production Year", "Price (₪)", "KM", "Hand"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in ["Model", "SubModel", "City", "Link"]:
+        df[col] = df[col].fillna("").astype(str)
+    df = df.dropna(subset=["Production Year", "Price (₪)"])
+    df["Production Year"] = df["Production Year"].round().astype(int)
+    return add_submodel_columns(df)
+
+
+# ---------- cases: setup(rows, df, workdir) -> zero-argument callable ----------
+def setup_parse_page(rows, df, workdir):
+    from data_extracter import parse_page
+
+    n_pages = max(1, rows // PER_PAGE)
+    pages = [synthetic_data.make_page_html(p, PER_PAGE, n_pages) for p in range(1, min(n_pages, DISTINCT_PAGES) + 1)]
+
+    def run():
+        for p in range(n_pages):
+            result = parse_page(pages[p % len(pages)], p + 1)
+            assert result["error"] is None, result["message"]
+    return run
+
+
+def _selection(clean):
+    return dict(year_range=(2016, 2023), price_range=(40_000, 200_000),
+                model=clean["Model"].mode().iloc[0], hands=[1.0, 2.0])
+
+
+def setup_filter(rows, df, workdir):
+    from listing_filters import filter_listings
+
+    clean = _clean(df.copy())
+    selection = _selection(clean)
+    return lambda: filter_listings(clean, **selection)
+
+
+def setup_filter_index(rows, df, workdir):
+    from listing_index import ListingIndex
+
+    clean = _clean(df.copy())
+    selection = _selection(clean)
+    index = ListingIndex(clean)
+    index.filter(**selection)   # built once per data file in the app; measure the rerun
+    return lambda: index.filter(**selection)
+
+
+def setup_build_aggs(rows, df, workdir):
+    from build_dashboard_plotly import build_aggs
+
+    clean = _clean(df.copy())
+    return lambda: build_aggs(clean)
+
+
+def setup_dashboard(rows, df, workdir):
+    from build_dashboard_plotly import build_yad2_dashboard_html
+
+    csv_path = os.path.join(workdir, f"listings_{rows}.csv")
+    df.to_csv(csv_path, index=False, encoding="utf-8")
+    out_html = os.path.join(workdir, f"dashboard_{rows}.html")
+    return lambda: build_yad2_dashboard_html(csv_path, years="2015-2025", out_html=out_html)
+
+
+def setup_similar(rows, df, workdir):
+    from similarity_index import SimilarityIndex
+
+    clean = _clean(df.copy())
+    index = SimilarityIndex(clean)   # built once per data file in the app
+    ads = clean["Ad Number"].iloc[::max(1, len(clean) // 20)][:20].tolist()
+
+    def run():
+        for ad in ads:
+            index.similar(ad, k=10)
+    return run
+
+
+CASES = {
+    "parse_page": setup_parse_page,
+    "filter": setup_filter,
+    "filter_index": setup_filter_index,
+    "build_aggs": setup_build_aggs,
+    "dashboard": setup_dashboard,
+    "similar": setup_similar,
+}
+
+
+# ---------- measuring ----------
+def measure(fn, repeat, memory=True):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return {"time_s": round(min(times), 5), "peak_mb": round(peak_mb, 3) if peak_mb is not None else None}
+
+
+def compare(results, baseline, tolerance, min_delta_s):
+    """{key: status} - "new", "ok" or "REGRESSION (...)" per result."""
+    status = {}
+    for key, r in results.items():
+        b = baseline.get(key)
+        if b is None:
+            status[key] = "new"
+            continue
+        problems = []
+        if r["time_s"] > b["time_s"] * (1 + tolerance) and r["time_s"] - b["time_s"] > min_delta_s:
+            problems.append(f"time +{(r['time_s'] / b['time_s'] - 1):.0%}")
+        if r["peak_mb"] is not None and b.get("peak_mb") and r["peak_mb"] > b["peak_mb"] * (1 + tolerance) \
+                and r["peak_mb"] - b["peak_mb"] > 1:
+            problems.append(f"memory +{(r['peak_mb'] / b['peak_mb'] - 1):.0%}")
+        status[key] = f"REGRESSION ({', '.join(problems)})" if problems else "ok"
+    return status
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh).get("results", {})
+
+
+def save_baseline(path, results):
+    # merge, so a partial run (--cases / --sizes) only updates what it measured
+    merged = {**load_baseline(path), **results}
+    meta = {"python": platform.python_version(), "machine": platform.machine(),
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"meta": meta, "results": dict(sorted(merged.items()))}, fh, indent=2)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    ap.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    ap.add_argument("--repeat", type=int, default=5, help="timed runs per case (best is kept); 1 at >= 1M rows")
+    ap.add_argument("--no-memory", action="store_true", help="skip the extra tracemalloc run")
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / growth vs. baseline")
+    ap.add_argument("--min-delta-ms", type=float, default=10.0, help="ignore time differences below this")
+    ap.add_argument("--json", help="also write the results to this JSON file")
+    args = ap.parse_args(argv)
+
+    baseline = load_baseline(args.baseline)
+    record = args.save_baseline or not os.path.exists(args.baseline)
+    if record and not args.save_baseline:
+        print(f"No baseline at {args.baseline} - record mode: these results become the baseline.\n")
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.sizes:
+            df = synthetic_data.make_listings(rows, seed=rows)
+            for case in args.cases:
+                fn = CASES[case](rows, df, workdir)
+                key = f"{case}@{rows}"
+                results[key] = measure(fn, 1 if rows >= 1_000_000 else args.repeat, memory=not args.no_memory)
+
+                status = compare({key: results[key]}, baseline, args.tolerance, args.min_delta_ms / 1000)[key]
+                base = baseline.get(key, {}).get("time_s")
+                peak = results[key]["peak_mb"]
+                print(f"{case:12s} {rows:>9,} rows  {results[key]['time_s'] * 1000:10.1f} ms"
+                      f"  peak {peak if peak is not None else float('nan'):9.1f} MB"
+                      f"  baseline {base * 1000 if base else float('nan'):10.1f} ms   {status}", flush=True)
+
+    status = compare(results, baseline, args.tolerance, args.min_delta_ms / 1000)
+    regressions = [k for k, v in status.items() if v.startswith("REGRESSION")]
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"results": results, "status": status}, fh, indent=2)
+    if record:
+        save_baseline(args.baseline, results)
+        print("baseline saved to", args.baseline)
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
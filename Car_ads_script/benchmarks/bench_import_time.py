@@ -0,0 +1,108 @@
+"""
+Import-time benchmark for main.py startup.
+
+Runs `import <module>` in fresh interpreters (cold start every time), reports the
+median wall time, the slowest imports from `python -X importtime`, and fails if
+startup exceeds the budget or pulls in a heavy library that should be lazy.
+
+Usage (from Car_ads_script/):
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --budget-ms 250 --repeat 7
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules imported at startup by main.py / `python main.py`
+STARTUP_MODULES = [
+    "main",
+    "data_extracter",
+    "yad2_data",
+    "plot_price_over_year",
+    "plot_price_drop",
+    "plot_sweet_point",
+    "plot_price_Distribution_by_Production_Year",
+]
+
+# must not be imported just by importing the startup modules
+HEAVY_MODULES = ["pandas", "numpy", "matplotlib", "plotly", "bs4", "streamlit"]
+
+
+def _run(code, *flags):
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=SCRIPT_DIR, capture_output=True, text=True, check=True,
+    )
+
+
+def time_import(module, repeat):
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - t)"
+    )
+    return [float(_run(code).stdout.strip()) * 1000 for _ in range(repeat)]
+
+
+def leaked_heavy_modules(module):
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    return json.loads(_run(code).stdout)
+
+
+def top_imports(module, n=10):
+    """Parse `-X importtime` output: (cumulative_us, name) of the slowest imports."""
+    rows = []
+    for line in _run(f"import {module}", "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:   self_us |   cumulative_us |   <indented module name>"
+        _self_us, cum_us, name = line.split(":", 1)[1].split("|")
+        rows.append((int(cum_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:n]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=300.0,
+                    help="fail if the median import of any startup module is slower")
+    ap.add_argument("--json", help="also write the results to this JSON file")
+    args = ap.parse_args(argv)
+
+    results = {}
+    failed = False
+    for module in STARTUP_MODULES:
+        times = time_import(module, args.repeat)
+        leaked = leaked_heavy_modules(module)
+        median = statistics.median(times)
+        results[module] = {"median_ms": round(median, 2), "min_ms": round(min(times), 2), "heavy_imports": leaked}
+
+        status = "ok"
+        if median > args.budget_ms:
+            status, failed = "SLOW", True
+        if leaked:
+            status, failed = f"LEAKS {','.join(leaked)}", True
+        print(f"{module:45s} median {median:8.1f} ms   min {min(times):8.1f} ms   {status}")
+
+    print("\nslowest imports under `import main` (cumulative):")
+    for cum_us, name in top_imports("main"):
+        print(f"  {cum_us / 1000:8.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Synthetic Yad2 data for the benchmarks.
+
+- make_listings(n): a DataFrame shaped like yad2_scraped_data.csv (same columns as
+  data_extracter.listings_to_rows), vectorised so 1M rows take a couple of seconds
+- make_page_html(page): a search-results page with a __NEXT_DATA__ payload shaped like
+  the real site (dehydratedState queries, listing categories, pagination, noise fields)
+
+Hebrew model / city names, per-model depreciation with log-normal price noise, a
+year distribution skewed to recent cars and randomly missing fields, so the
+benchmarks exercise the same code paths (NaN handling, empty strings) as real data.
+"""
+import re
+import json
+import zlib
+
+# model -> (new-car price, SubModel strings)
+MODELS = {
+    "פורסטר": (190_000, [
+        "XS אוט׳ 2.0 (150 כ״ס) [2013-2019]",
+        "Limited ידני 2.5 (170 כ\"ס) [2013-2018]",
+        "e-Boxer אוט׳ 2.0 (150 כ״ס) [2019-2025]",
+    ]),
+    "אאוטבק": (230_000, [
+        "Premium אוט׳ 2.5 (175 כ״ס) [2015-2020]",
+        "Field אוט׳ 2.5 (169 כ״ס) [2021-]",
+    ]),
+    "קורולה": (150_000, [
+        "Sun אוט׳ 1.6 (132 כ״ס) [2013-2018]",
+        "Hybrid City אוט׳ 1.8 (122 כ״ס) [2019-]",
+    ]),
+    "טוסון": (175_000, [
+        "Premium אוט׳ 1.6 (177 כ״ס) [2016-2020]",
+        "Elite Hybrid אוט׳ 1.6 (230 כ״ס) [2021-]",
+    ]),
+    "ספורטאז׳": (170_000, [
+        "EX אוט׳ 2.0 (155 כ״ס) [2016-2021]",
+        "Urban אוט׳ 1.6 (180 כ״ס) [2022-]",
+    ]),
+    "אוקטביה": (155_000, [
+        "Ambition אוט׳ 1.4 (150 כ״ס) [2013-2019]",
+        "Style אוט׳ 1.5 (150 כ״ס) [2020-]",
+    ]),
+    "i20": (95_000, [
+        "Inspire אוט׳ 1.0 (100 כ״ס) [2015-2020]",
+        "Prime אוט׳ 1.0 (100 כ״ס) [2021-]",
+    ]),
+    "מאזדה 3": (145_000, [
+        "Spirit אוט׳ 2.0 (120 כ״ס) [2014-2018]",
+        "Comfort אוט׳ 2.0 (165 כ״ס) [2019-]",
+    ]),
+}
+
+_GEN_START_RE = re.compile(r"\[(\d{4})")
+
+CITIES = ["תל אביב יפו", "ירושלים", "חיפה", "באר שבע", "ראשון לציון", "פתח תקווה", "נתניה", "אשדוד",
+          "חולון", "רמת גן", "רחובות", "כפר סבא", "מודיעין מכבים רעות", "הרצליה", "עפולה", "אילת"]
+
+DESCRIPTIONS = [
+    "שמורה מאוד, {km:,} ק\"מ, טסט עד {m:02d}/{y}, יד ראשונה מפרטי",
+    "רכב מטופל במוסך מורשה, {km:,} קמ, גג נפתח, מצלמת רוורס",
+    "{k} אלף ק\"מ, ללא תאונות, חיישני חניה, אנדרואיד אוטו",
+    "הגיע מליסינג, טסט לעוד שנה",
+    "מושבי עור, קרוז אדפטיבי, שמורה",
+    "",
+]
+
+LISTING_CATEGORIES = ["private", "commercial", "solo", "platinum"]
+CATEGORY_WEIGHTS = [0.7, 0.2, 0.07, 0.03]
+
+COLUMNS = ["Ad Number", "Price (₪)", "City", "Model", "SubModel", "Production Year", "KM", "Hand",
+           "Listing Type", "Created At", "Updated At", "Description", "Link"]
+
+
+def _format_unique(keys, fmt):
+    """fmt(key) for every distinct key only, broadcast back (string formatting is the slow part)."""
+    import numpy as np
+
+    uniques, codes = np.unique(keys, return_inverse=True)
+    return np.array([fmt(k) for k in uniques], dtype=object)[codes]
+
+
+def make_listings(n, seed=0, min_year=2010, max_year=2025):
+    """n synthetic listings (DataFrame with the scraper's CSV columns)."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    models = list(MODELS)
+    model_idx = rng.integers(0, len(models), n)
+
+    # skewed to recent years: more 3-8 year old cars on the market than 15 year old ones
+    ages = np.minimum(rng.gamma(2.2, 2.6, n).astype(int), max_year - min_year)
+    year = max_year - ages
+
+    base = np.array([MODELS[m][0] for m in models], dtype=float)[model_idx]
+    price = base * 0.87 ** ages * rng.lognormal(0, 0.12, n)
+    price = (np.round(price / 500) * 500).astype(int)
+
+    # a trim of the generation that was on sale in the production year
+    submodel = np.empty(n, dtype=object)
+    pick = rng.random(n)
+    for i, m in enumerate(models):
+        subs = MODELS[m][1]
+        starts = np.array([int(_GEN_START_RE.search(sub).group(1)) for sub in subs])
+        sel = np.flatnonzero(model_idx == i)
+        latest = np.searchsorted(starts, year[sel], side="right") - 1
+        earlier = (pick[sel] * (latest + 1)).astype(int)          # older generations linger in the listings
+        chosen = np.where(pick[sel] < 0.8, latest, earlier).clip(0)
+        submodel[sel] = np.array(subs, dtype=object)[chosen]
+
+    km = (ages * rng.normal(15_000, 4_000, n)).clip(1_000).round(-3).astype(int)
+    template = rng.integers(0, len(DESCRIPTIONS), n)
+    description = _format_unique(
+        template * 10_000_000 + km,
+        lambda key: DESCRIPTIONS[key // 10_000_000].format(
+            km=int(key % 10_000_000), k=int(key % 10_000_000) // 1000, m=1 + key // 10_000_000 % 12, y=2026),
+    )
+
+    scraped = pd.Timestamp("2025-06-01")
+    created_h = rng.integers(0, 120 * 24, n)
+    updated_h = created_h - rng.integers(0, 30 * 24, n).clip(max=created_h)
+    as_text = lambda h: (scraped - pd.Timedelta(hours=int(h))).strftime("%Y-%m-%dT%H:%M:%S")
+    ad_number = 70_000_000 + rng.permutation(n * 3)[:n]
+
+    df = pd.DataFrame({
+        "Ad Number": ad_number,
+        "Price (₪)": price.astype(float),
+        "City": np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), n)],
+        "Model": np.array(models, dtype=object)[model_idx],
+        "SubModel": submodel,
+        "Production Year": year.astype(float),
+        "KM": np.nan,                      # not in the payload anymore (see description_miner.py)
+        "Hand": rng.choice([0, 1, 2], n, p=[0.05, 0.55, 0.4]).astype(float),
+        "Listing Type": np.array(LISTING_CATEGORIES, dtype=object)[rng.choice(4, n, p=CATEGORY_WEIGHTS)],
+        "Created At": _format_unique(created_h, as_text),
+        "Updated At": _format_unique(updated_h, as_text),
+        "Description": description,
+        "Link": "https://www.yad2.co.il/vehicles/item/" + pd.Series(ad_number).astype(str),
+    }, columns=COLUMNS)
+
+    # missing fields, as on the site: no price ("call me"), no city, no hand, no sub model
+    for col, rate in [("Price (₪)", 0.03), ("City", 0.02), ("Hand", 0.02), ("SubModel", 0.01)]:
+        missing = rng.random(n) < rate
+        df.loc[missing, col] = np.nan if df[col].dtype.kind == "f" else ""
+    return df
+
+
+def _item(row, rng):
+    """One listing as it appears in the __NEXT_DATA__ payload (fields omitted when missing)."""
+    item = {
+        "adNumber": int(row["Ad Number"]),
+        "token": row["Link"].rsplit("/", 1)[-1],
+        "model": {"id": zlib.crc32(row["Model"].encode()) % 10_000, "text": row["Model"]},
+        "vehicleDates": {"yearOfProduction": int(row["Production Year"])},
+        "dates": {"createdAt": row["Created At"], "updatedAt": row["Updated At"]},
+        "metaData": {
+            "description": row["Description"],
+            "coverImage": f"https://img.yad2.co.il/Pic/{row['Ad Number']}/cover.jpeg",
+            "images": [f"https://img.yad2.co.il/Pic/{row['Ad Number']}/{i}.jpeg" for i in range(rng.integers(1, 8))],
+        },
+        "tags": [{"name": "מחיר מחירון", "priority": 1}] if rng.random() < 0.3 else [],
+        "packages": {"isTradeInButton": bool(rng.random() < 0.2)},
+    }
+    if row["Price (₪)"] == row["Price (₪)"]:
+        item["price"] = int(row["Price (₪)"])
+    if row["City"]:
+        item["address"] = {"city": {"text": row["City"]}, "area": {"text": "מרכז"}}
+    if row["SubModel"]:
+        item["subModel"] = {"id": zlib.crc32(row["SubModel"].encode()) % 100_000, "text": row["SubModel"]}
+    if row["Hand"] == row["Hand"]:
+        item["hand"] = {"id": int(row["Hand"]), "text": f"יד {int(row['Hand'])}"}
+    return item
+
+
+def make_page_html(page=1, per_page=40, total_pages=50, seed=0):
+    """A search-results page (HTML + __NEXT_DATA__) with per_page listings spread over the categories."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed * 100_003 + page)
+    rows = make_listings(per_page, seed=seed * 100_003 + page).to_dict("records")
+
+    data = {category: [] for category in LISTING_CATEGORIES}
+    for row in rows:
+        data[row["Listing Type"]].append(_item(row, rng))
+    data["pagination"] = {"total": per_page * total_pages, "totalPages": total_pages,
+                          "currentPage": page, "perPage": per_page}
+
+    next_data = {
+        "props": {"pageProps": {"dehydratedState": {"queries": [
+            {"queryKey": ["user-details"], "state": {"data": None, "status": "success"}},
+            {"queryKey": ["feed", "cars", {"page": page}], "state": {"data": data, "status": "success"}},
+        ]}}},
+        "page": "/vehicles/[...slug]",
+        "buildId": "synthetic",
+    }
+    # the real page carries a lot of markup around the payload; BeautifulSoup has to walk it
+    filler = "".join(f'<div class="feed-item"><a href="/item/{i}"><span>פריט {i}</span></a></div>' for i in range(per_page))
+    return (
+        "<!DOCTYPE html><html lang=\"he\" dir=\"rtl\"><head><title>יד2 - רכבים</title></head><body>"
+        f"<main>{filler}</main>"
+        f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data, ensure_ascii=False)}</script>'
+        "</body></html>"
+    )
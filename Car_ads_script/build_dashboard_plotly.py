@@ -3,6 +3,76 @@ import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from profiling import StageProfiler, stage
+
+
+def aggregate_by_year(dfx: pd.DataFrame):
+    return dfx.groupby("Production Year").agg(
+        listings=("Price (₪)", "size"),
+        avg_price=("Price (₪)", "mean"),
+        median_price=("Price (₪)", "median"),
+    ).reset_index().sort_values("Production Year")
+
+
+def build_aggs(dfx: pd.DataFrame):
+    return score_by_year(aggregate_by_year(dfx))
+
+
+def score_by_year(by_year: pd.DataFrame):
+    """
+    Add depreciation + sweet-score columns to a per-year table (listings / avg_price / median_price).
+
+    Depreciation columns already present (e.g. computed with window functions by
+    sql_backend.SQLBackend.by_year) are kept as-is instead of being recomputed.
+    """
+    by_year = by_year.sort_values("Production Year").reset_index(drop=True)
+
+    # YoY % change (as you had)
+    if "depr_yoy_pct" not in by_year:
+        by_year["depr_yoy_pct"] = by_year["avg_price"].pct_change() * 100
+
+    # ---- NEW: "economic" sweet point ----
+    # how much already depreciated from previous year (positive = good)
+    if "depr_from_prev_pct" not in by_year:
+        by_year["depr_from_prev_pct"] = (
+            (by_year["avg_price"].shift(1) - by_year["avg_price"]) / by_year["avg_price"].shift(1)
+        ) * 100
+
+    # how much expected to depreciate to next year (positive = bad)
+    if "depr_to_next_pct" not in by_year:
+        by_year["depr_to_next_pct"] = (
+            (by_year["avg_price"] - by_year["avg_price"].shift(-1)) / by_year["avg_price"]
+        ) * 100
+
+    # Availability (liquidity)
+    by_year["availability"] = np.log1p(by_year["listings"])
+
+    # Penalize low sample size (unreliable years)
+    MIN_LISTINGS = 5
+    by_year["low_count_penalty"] = np.where(by_year["listings"] < MIN_LISTINGS, 1.0, 0.0)
+
+    # Fill NaNs (edges: first/last year)
+    by_year["depr_from_prev_pct"] = by_year["depr_from_prev_pct"].fillna(0)
+    by_year["depr_to_next_pct"] = by_year["depr_to_next_pct"].fillna(0)
+
+    # Sweet score:
+    # - prefer years where depreciation already happened (from prev)...
+    # - and future depreciation is low (to next)...
+    # - and there is enough market data (availability)...
+    # - penalize low sample years
+    by_year["sweet_score"] = (
+        1.2 * by_year["depr_from_prev_pct"]
+        - 1.5 * by_year["depr_to_next_pct"]
+        + 0.3 * by_year["availability"]
+        - 2.0 * by_year["low_count_penalty"]
+    )
+
+    sweet_year = None
+    if len(by_year) > 0:
+        sweet_year = int(by_year.loc[by_year["sweet_score"].idxmax(), "Production Year"])
+
+    return by_year, sweet_year
+
 
 def build_yad2_dashboard_html(
     csv_path="yad2_scraped_data.csv",
@@ -10,18 +80,82 @@ def build_yad2_dashboard_html(
     model="all",                 # "all" | exact model string
     submodel="all",              # "all" | exact submodel string (works only if model is not "all")
     out_html="dashboard.html",
-    min_price=1000               # basic sanity filter
+    engine="all",                # "all" | engine size in litres, parsed from SubModel (e.g. 2.0)
+    generation="all",            # "all" | generation label parsed from SubModel (e.g. "2011-2016")
+    min_price=1000,              # basic sanity filter
+    agg_store_path=None,         # agg_store.AggStore JSON -> per-year aggregates from the incremental store
+    profile=False,               # True -> per-stage cProfile + peak memory in <out_html stem>.profile/
+    backend="pandas"             # "pandas" | "duckdb": filter + aggregate in SQL over the file (sql_backend.py)
 ):
+    """
+    Build the static Plotly dashboard for csv_path and write it to out_html.
+
+    With agg_store_path the per-year aggregates (mean / median / quantiles / sweet score) come
+    from the incremental store, i.e. every listing it has ever ingested, while the scatter shows
+    the rows of csv_path. The store only knows (Model, SubModel, Production Year) and its own
+    min_price, so whenever engine / generation is filtered or min_price differs from the store's,
+    the aggregates are computed from the filtered CSV rows instead.
+    """
+    prof = StageProfiler() if profile else None
+
+    sql = None
+    if backend == "duckdb":
+        import sql_backend
+        if sql_backend.available():
+            sql = sql_backend.SQLBackend(csv_path, min_price=min_price)
+        else:
+            import warnings
+            warnings.warn("duckdb is not installed - building the dashboard with pandas")
+    elif backend != "pandas":
+        raise ValueError("backend must be 'pandas' or 'duckdb'")
+
     # ---------- Load & clean ----------
-    df = pd.read_csv(csv_path)
+    with stage(prof, "load"):
+        # duckdb: years / model / submodel are applied in SQL, only matching rows are loaded
+        df = sql.listings(years, model, submodel) if sql is not None else pd.read_csv(csv_path)
+
+    with stage(prof, "clean"):
+        df = _clean_and_filter(df, years, model, submodel, engine, generation, min_price)
+
+    # ---------- Per-year aggregates ----------
+    with stage(prof, "aggregate"):
+        parsed_filters = (engine not in ("all", None)) or (generation not in ("all", None))
+        if sql is not None and not agg_store_path and not parsed_filters:
+            by_year, sweet_year = sql.build_aggs(years, model, submodel)
+        else:
+            store = None
+            if agg_store_path:
+                from agg_store import AggStore
+                store = AggStore.load(agg_store_path)
+                if parsed_filters or store.min_price != min_price:
+                    store = None        # filters the store cannot apply: aggregate the CSV rows
+            if store is not None:
+                by_year, sweet_year = score_by_year(store.by_year(
+                    model=model, submodel=submodel if model not in ("all", None) else "all",
+                    years=df["Production Year"].unique(),
+                ))
+            else:
+                by_year, sweet_year = build_aggs(df)
+
+    with stage(prof, "figure"):
+        fig = _build_figure(df, by_year, sweet_year, years, model, submodel, engine, generation)
+
+    with stage(prof, "write_html"):
+        fig.write_html(out_html, include_plotlyjs="cdn")
+
+    if prof is not None:
+        print("Profile saved to:", prof.write(out_html))
+    return out_html
+
 
+def _clean_and_filter(df, years, model, submodel, engine, generation, min_price):
+    """Numeric/text cleanup + the global years / model / submodel / engine / generation filters."""
     for col in ["Production Year", "Price (₪)", "KM", "Hand"]:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    df = df.dropna(subset=["Production Year", "Price (₪)"]).copy()
+    df = df[df["Production Year"].notna() & (df["Price (₪)"] > min_price)].copy()
     df["Production Year"] = df["Production Year"].round().astype(int)
-    df = df[df["Price (₪)"] > min_price].copy()
 
     # text columns
     for col in ["Model", "SubModel", "City", "Link"]:
@@ -34,30 +168,52 @@ def build_yad2_dashboard_html(
         df["SubModel"] = ""
 
     # ---------- Apply GLOBAL filters (data-level) ----------
+    # one combined boolean mask, rows gathered once at the end (the frame is filtered a single
+    # time here, so building a ListingIndex would cost more than it saves)
+    ranges, values = {}, {}
+
     # years filter
     if years != "all" and years is not None:
         if isinstance(years, str) and "-" in years:
             a, b = years.split("-", 1)
-            y_from, y_to = int(a.strip()), int(b.strip())
-            df = df[df["Production Year"].between(y_from, y_to)].copy()
+            ranges["Production Year"] = (int(a.strip()), int(b.strip()))
         elif isinstance(years, (tuple, list)) and len(years) == 2 and all(isinstance(x, (int, np.integer)) for x in years):
-            y_from, y_to = int(years[0]), int(years[1])
-            df = df[df["Production Year"].between(y_from, y_to)].copy()
+            ranges["Production Year"] = (int(years[0]), int(years[1]))
         elif isinstance(years, (list, set, tuple)):
-            years_set = set(int(x) for x in years)
-            df = df[df["Production Year"].isin(years_set)].copy()
+            values["Production Year"] = set(int(x) for x in years)
         else:
             raise ValueError("years must be 'all', (min,max), 'YYYY-YYYY', or a list of years")
 
     # model/submodel filter
     if model != "all" and model is not None:
-        df = df[df["Model"] == model].copy()
+        values["Model"] = [model]
         if submodel != "all" and submodel is not None:
-            df = df[df["SubModel"] == submodel].copy()
+            values["SubModel"] = [submodel]
+
+    # engine / generation filter (parsed from the SubModel string, once per distinct value)
+    if (engine != "all" and engine is not None) or (generation != "all" and generation is not None):
+        from submodel_parser import add_submodel_columns
+        df = add_submodel_columns(df)
+        if engine != "all" and engine is not None:
+            values["Engine (L)"] = [float(engine)]
+        if generation != "all" and generation is not None:
+            values["Generation"] = [str(generation)]
+
+    if ranges or values:
+        mask = np.ones(len(df), dtype=bool)
+        for col, (lo, hi) in ranges.items():
+            mask &= df[col].between(lo, hi).to_numpy()
+        for col, allowed in values.items():
+            mask &= df[col].isin(list(allowed)).to_numpy()
+        df = df[mask].copy()
 
     if df.empty:
-        raise ValueError("No data after applying filters (years/model/submodel).")
+        raise ValueError("No data after applying filters (years/model/submodel/engine/generation).")
+    return df
 
+
+def _build_figure(df, by_year, sweet_year, years, model, submodel, engine, generation):
+    """The 3x2 plotly dashboard for the filtered listings and their per-year aggregates."""
     # ---------- jitter for nicer scatter ----------
     rng = np.random.default_rng(42)
     df["YearJitter"] = df["Production Year"] + rng.normal(0, 0.08, size=len(df))
@@ -66,57 +222,6 @@ def build_yad2_dashboard_html(
     ymin = float(df["Price (₪)"].min())
     ymax = float(df["Price (₪)"].max())
 
-    def build_aggs(dfx: pd.DataFrame):
-        by_year = dfx.groupby("Production Year").agg(
-            listings=("Price (₪)", "size"),
-            avg_price=("Price (₪)", "mean"),
-            median_price=("Price (₪)", "median"),
-        ).reset_index().sort_values("Production Year")
-
-        # YoY % change (as you had)
-        by_year["depr_yoy_pct"] = by_year["avg_price"].pct_change() * 100
-
-        # ---- NEW: "economic" sweet point ----
-        # how much already depreciated from previous year (positive = good)
-        by_year["depr_from_prev_pct"] = (
-            (by_year["avg_price"].shift(1) - by_year["avg_price"]) / by_year["avg_price"].shift(1)
-        ) * 100
-
-        # how much expected to depreciate to next year (positive = bad)
-        by_year["depr_to_next_pct"] = (
-            (by_year["avg_price"] - by_year["avg_price"].shift(-1)) / by_year["avg_price"]
-        ) * 100
-
-        # Availability (liquidity)
-        by_year["availability"] = np.log1p(by_year["listings"])
-
-        # Penalize low sample size (unreliable years)
-        MIN_LISTINGS = 5
-        by_year["low_count_penalty"] = np.where(by_year["listings"] < MIN_LISTINGS, 1.0, 0.0)
-
-        # Fill NaNs (edges: first/last year)
-        by_year["depr_from_prev_pct"] = by_year["depr_from_prev_pct"].fillna(0)
-        by_year["depr_to_next_pct"] = by_year["depr_to_next_pct"].fillna(0)
-
-        # Sweet score:
-        # - prefer years where depreciation already happened (from prev)...
-        # - and future depreciation is low (to next)...
-        # - and there is enough market data (availability)...
-        # - penalize low sample years
-        by_year["sweet_score"] = (
-            1.2 * by_year["depr_from_prev_pct"]
-            - 1.5 * by_year["depr_to_next_pct"]
-            + 0.3 * by_year["availability"]
-            - 2.0 * by_year["low_count_penalty"]
-        )
-
-        sweet_year = None
-        if len(by_year) > 0:
-            sweet_year = int(by_year.loc[by_year["sweet_score"].idxmax(), "Production Year"])
-
-        return by_year, sweet_year
-
-
     # ---------- Dashboard scaffold: 3 rows x 2 cols ----------
     fig = make_subplots(
         rows=3, cols=2,
@@ -138,8 +243,6 @@ def build_yad2_dashboard_html(
     )
 
     def add_traces(dfx: pd.DataFrame):
-        by_year, sweet_year = build_aggs(dfx)
-
         # Trace 0: Scatter listings
         customdata = np.stack([
             dfx["Ad Number"] if "Ad Number" in dfx.columns else pd.Series([None] * len(dfx)),
@@ -296,6 +399,10 @@ def build_yad2_dashboard_html(
         suffix_parts.append(f"Model={model}")
     if submodel != "all" and submodel is not None:
         suffix_parts.append(f"SubModel={submodel}")
+    if engine != "all" and engine is not None:
+        suffix_parts.append(f"Engine={engine}L")
+    if generation != "all" and generation is not None:
+        suffix_parts.append(f"Generation={generation}")
     suffix = (" | " + ", ".join(suffix_parts)) if suffix_parts else ""
 
     fig.update_layout(
@@ -317,9 +424,7 @@ def build_yad2_dashboard_html(
     fig.update_yaxes(tickformat=",", row=1, col=1)
     fig.update_yaxes(tickformat=",", row=2, col=2)
     fig.update_yaxes(tickformat=",", row=3, col=1)
-
-    fig.write_html(out_html, include_plotlyjs="cdn")
-    return out_html
+    return fig
 
 
 # -------------------- Examples --------------------
@@ -0,0 +1,240 @@
+"""
+Manufacturer / model ID catalog, discovered from the site's own filter metadata.
+
+The search page's __NEXT_DATA__ carries the filter options (manufacturers, and the
+models of the selected manufacturer) as {id, text} lists. They are extracted once,
+cached in CATALOG_PATH with a refresh TTL, and a "scrape every model of manufacturer X"
+run becomes one cached lookup plus a batch of run_scraper calls over a warm session.
+
+Usage (from Car_ads_script/):
+    python catalog.py manufacturers
+    python catalog.py models סובארו            # name or id
+    python catalog.py scrape 35 --workers 2    # every model of manufacturer 35
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+CATALOG_PATH = "yad2_catalog.json"
+TTL_HOURS = 24 * 7
+BASE_URL = "https://www.yad2.co.il/vehicles/cars"
+
+ID_KEYS = ("id", "value", "key")
+NAME_KEYS = ("text", "title", "name", "label")
+MANUFACTURER_LIST_KEYS = ("manufacturers", "manufacturer", "manufacturerList")
+MODEL_LIST_KEYS = ("models", "model", "modelList")
+
+
+# ---------- extraction from __NEXT_DATA__ ----------
+def _option(item):
+    """(id, name) of a filter option dict, or None."""
+    if not isinstance(item, dict):
+        return None
+    oid = next((item[k] for k in ID_KEYS if item.get(k) not in (None, "")), None)
+    name = next((item[k] for k in NAME_KEYS if isinstance(item.get(k), str) and item[k].strip()), None)
+    try:
+        return int(oid), name.strip()
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _option_lists(obj, keys, depth=0, max_depth=12):
+    """Every list of {id, text} options found under one of keys, anywhere in the payload."""
+    if depth > max_depth:
+        return
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k in keys and isinstance(v, list) and v and all(_option(x) for x in v):
+                yield v
+            else:
+                yield from _option_lists(v, keys, depth + 1, max_depth)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from _option_lists(v, keys, depth + 1, max_depth)
+
+
+def _parent_id(item):
+    for key in ("manufacturerId", "manufacturer_id", "parentId", "parent"):
+        v = item.get(key)
+        if isinstance(v, dict):
+            v = v.get("id")
+        if v not in (None, ""):
+            try:
+                return int(v)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def extract_manufacturers(next_data):
+    """{manufacturer id: name} from a search page payload."""
+    out = {}
+    for options in _option_lists(next_data, MANUFACTURER_LIST_KEYS):
+        out.update(_option(x) for x in options)
+    return out
+
+
+def extract_models(next_data, manufacturer_id=None):
+    """{model id: name}; options tagged with another manufacturer are skipped."""
+    out = {}
+    for options in _option_lists(next_data, MODEL_LIST_KEYS):
+        for item in options:
+            parent = _parent_id(item)
+            if manufacturer_id is not None and parent is not None and parent != int(manufacturer_id):
+                continue
+            oid, name = _option(item)
+            out[oid] = name
+    return out
+
+
+# ---------- cached catalog ----------
+class Catalog:
+    def __init__(self, path=CATALOG_PATH, ttl_hours=TTL_HOURS, session=None):
+        self.path = path
+        self.ttl_s = ttl_hours * 3600
+        self._session = session
+        self.data = {"manufacturers": {}, "manufacturers_fetched_at": None}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                self.data = json.load(fh)
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def _fresh(self, fetched_at):
+        return fetched_at is not None and time.time() - fetched_at < self.ttl_s
+
+    def _fetch_next_data(self, url):
+        from data_extracter import DEFAULT_HEADERS, extract_next_data
+
+        resp = self.session.get(url, headers=DEFAULT_HEADERS, timeout=25)
+        resp.raise_for_status()
+        next_data = extract_next_data(resp.text)
+        if not next_data:
+            raise ValueError(f"No __NEXT_DATA__ in {url}")
+        return next_data
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.data, fh, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    def manufacturers(self, refresh=False):
+        """{id: name}, from the cache unless older than the TTL."""
+        if refresh or not self._fresh(self.data.get("manufacturers_fetched_at")):
+            found = extract_manufacturers(self._fetch_next_data(BASE_URL))
+            if not found:
+                raise ValueError("No manufacturer list in the search page filter metadata")
+            known = self.data["manufacturers"]
+            for mid, name in found.items():
+                known.setdefault(str(mid), {"name": name, "models": {}, "fetched_at": None})["name"] = name
+            self.data["manufacturers_fetched_at"] = time.time()
+            self.save()
+        return {int(mid): m["name"] for mid, m in self.data["manufacturers"].items()}
+
+    def resolve(self, manufacturer):
+        """Manufacturer id from an id or a (Hebrew / English) name."""
+        try:
+            return int(manufacturer)
+        except (TypeError, ValueError):
+            pass
+        wanted = str(manufacturer).strip().lower()
+        for mid, name in self.manufacturers().items():
+            if name.strip().lower() == wanted:
+                return mid
+        raise KeyError(f"Unknown manufacturer {manufacturer!r}")
+
+    def models(self, manufacturer, refresh=False):
+        """{model id: name} of one manufacturer (one request per TTL, then cached)."""
+        mid = self.resolve(manufacturer)
+        entry = self.data["manufacturers"].setdefault(str(mid), {"name": str(mid), "models": {}, "fetched_at": None})
+        if refresh or not self._fresh(entry.get("fetched_at")):
+            found = extract_models(self._fetch_next_data(f"{BASE_URL}?manufacturer={mid}"), mid)
+            if not found:
+                raise ValueError(f"No model list in the filter metadata of manufacturer {mid}")
+            entry["models"] = {str(k): v for k, v in found.items()}
+            entry["fetched_at"] = time.time()
+            self.save()
+        return {int(k): v for k, v in entry["models"].items()}
+
+
+def scrape_manufacturer(manufacturer, catalog=None, out_dir="scrapes", out_csv=None, models=None, **run_kwargs):
+    """
+    Scrape every model of one manufacturer (from the cached catalog) and combine the results.
+
+    Each model is scraped by data_extracter.run_scraper into out_dir/yad2_<man>_<model>.csv
+    (own checkpoint / metrics), all over one warm session; a block stops the batch.
+    Returns the combined DataFrame, also written to out_csv (default yad2_<man>_all_models.csv).
+    """
+    import pandas as pd
+    from data_extracter import run_scraper, PageFetchError
+
+    # a blocked batch is resumed from the checkpoints; every model gets a metrics report
+    run_kwargs.setdefault("checkpoint_dir", ".scrape_checkpoints")
+    run_kwargs.setdefault("metrics_dir", "scrape_metrics")
+
+    catalog = catalog or Catalog()
+    mid = catalog.resolve(manufacturer)
+    all_models = catalog.models(mid)
+    todo = {m: all_models.get(m, str(m)) for m in models} if models else all_models
+
+    os.makedirs(out_dir, exist_ok=True)
+    frames = []
+    for i, (model_id, name) in enumerate(todo.items(), 1):
+        print(f"[{i}/{len(todo)}] {name} (manufacturer={mid}, model={model_id})")
+        try:
+            df = run_scraper(manufacturer=mid, model=model_id, session=catalog.session, raise_on_block=True,
+                             out_csv=os.path.join(out_dir, f"yad2_{mid}_{model_id}.csv"), **run_kwargs)
+        except PageFetchError as e:
+            print(f"⛔ Batch stopped: {e} - run again later to resume (checkpoints are kept)")
+            break
+        if df is not None and not df.empty:
+            frames.append(df)
+
+    combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    out_csv = out_csv or f"yad2_{mid}_all_models.csv"
+    if not combined.empty:
+        combined.to_csv(out_csv, index=False, encoding="utf-8")
+        print(f"✅ {len(combined)} listings from {len(frames)} models saved to {out_csv}")
+    return combined
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--catalog", default=CATALOG_PATH)
+    ap.add_argument("--refresh", action="store_true", help="ignore the TTL and re-fetch")
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("manufacturers")
+    p_models = sub.add_parser("models")
+    p_models.add_argument("manufacturer", help="id or name")
+    p_scrape = sub.add_parser("scrape")
+    p_scrape.add_argument("manufacturer", help="id or name")
+    p_scrape.add_argument("--workers", type=int, default=1)
+    p_scrape.add_argument("--out-dir", default="scrapes")
+    args = ap.parse_args(argv)
+
+    catalog = Catalog(args.catalog)
+    if args.command == "manufacturers":
+        for mid, name in sorted(catalog.manufacturers(refresh=args.refresh).items(), key=lambda kv: kv[1]):
+            print(f"{mid:>6}  {name}")
+    elif args.command == "models":
+        for model_id, name in sorted(catalog.models(args.manufacturer, refresh=args.refresh).items(), key=lambda kv: kv[1]):
+            print(f"{model_id:>7}  {name}")
+    else:
+        if args.refresh:
+            catalog.models(args.manufacturer, refresh=True)
+        scrape_manufacturer(args.manufacturer, catalog, out_dir=args.out_dir, workers=args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,51 +1,373 @@
 #pip install streamlit plotly
+import os
 import requests
 import time
 import json
+import queue
 import random
 import logging
-import pandas as pd
-from bs4 import BeautifulSoup
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from profiling import StageProfiler, stage
+from listing_buffer import ListingBuffer
+from page_cache import PageCache, payload_hash, cache_path_for
+
+# pandas / bs4 are imported where they are used - importing this module stays cheap
 
 man = 35
 mod = 10476
 
+# used only when page 1 carries no pagination metadata
+FALLBACK_MAX_PAGES = 10
+
+# error classes for a failed page (decides whether a retry makes sense)
+ERR_TIMEOUT = "timeout"   # timeout / connection reset -> transient, retry
+ERR_SERVER = "server"     # HTTP 5xx -> transient, retry
+ERR_BLOCKED = "blocked"   # HTTP 403/429 -> anti-bot block, stop and resume later
+ERR_HTTP = "http"         # any other 4xx -> not retryable
+ERR_PARSE = "parse"       # page arrived but no usable __NEXT_DATA__ -> retry
+
+RETRYABLE_ERRORS = {ERR_TIMEOUT, ERR_SERVER, ERR_PARSE}
+
+# _download result for a 304 answer to a conditional request (the page is served from the page cache)
+NOT_MODIFIED = object()
+
+LISTING_CATEGORIES = ["private", "commercial", "solo", "platinum"]
+KM_KEYS = ("km", "KM", "kilometers", "kilometres", "mileage")
+
+# Headers to mimic a real browser
+DEFAULT_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Cache-Control": "max-age=0",
+    "Connection": "keep-alive",
+    "DNT": "1",
+    "Referer": "https://www.yad2.co.il/",
+    "Upgrade-Insecure-Requests": "1",
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/99.0.4844.74 Safari/537.36"
+    ),
+}
+
+logger = logging.getLogger(__name__)
+
+
+class PageFetchError(Exception):
+    def __init__(self, kind, message, status=None):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+
+
+def classify_request_error(e: requests.exceptions.RequestException) -> str:
+    if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+        status = e.response.status_code
+        if status in (403, 429):
+            return ERR_BLOCKED
+        if status >= 500:
+            return ERR_SERVER
+        return ERR_HTTP
+    # Timeout, ConnectionError, ChunkedEncodingError, ...
+    return ERR_TIMEOUT
+
+
+# ---------------------------------------------------------------------------
+# Parsing stage (pure functions, CPU-bound).
+# Module level so they can run inside a ProcessPoolExecutor worker.
+# ---------------------------------------------------------------------------
+def find_next_data_script(html_content: str):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, "html.parser")
+    script_tag = soup.find("script", id="__NEXT_DATA__")
+    if script_tag is None or not script_tag.string:
+        return None
+    return script_tag.string
+
+
+def decode_next_data(script_text: str):
+    try:
+        return json.loads(script_text)
+    except json.JSONDecodeError as e:
+        logger.warning(f"JSON Decode Error: {e}")
+        return None
+
+
+def extract_next_data(html_content: str):
+    script_text = find_next_data_script(html_content)
+    if script_text is None:
+        logger.warning("Could not find __NEXT_DATA__ in HTML.")
+        return None
+    return decode_next_data(script_text)
+
+
+def find_listings_data(next_data: dict):
+    try:
+        queries = next_data["props"]["pageProps"]["dehydratedState"]["queries"]
+    except KeyError:
+        return None
+
+    wanted_categories = set(LISTING_CATEGORIES)
+
+    for q in queries:
+        data = (q.get("state") or {}).get("data")
+        if isinstance(data, dict) and wanted_categories.intersection(data.keys()):
+            return data
+
+    return None
+
+
+def find_pagination(next_data: dict):
+    try:
+        queries = next_data["props"]["pageProps"]["dehydratedState"]["queries"]
+    except KeyError:
+        return None
+
+    page_keys = ("totalPages", "lastPage", "pages", "pageCount")
+    total_keys = ("total", "totalItems", "totalResults", "count")
+
+    def as_int(v):
+        try:
+            return int(v)
+        except (TypeError, ValueError):
+            return None
+
+    for q in queries:
+        data = (q.get("state") or {}).get("data")
+        if not isinstance(data, dict):
+            continue
+        for meta in (data.get("pagination"), data.get("meta"), data):
+            if not isinstance(meta, dict):
+                continue
+            pages = next((as_int(meta[k]) for k in page_keys if as_int(meta.get(k))), None)
+            total = next((as_int(meta[k]) for k in total_keys if as_int(meta.get(k)) is not None), None)
+            per_page = as_int(meta.get("perPage") or meta.get("pageSize"))
+            if pages is None and total is not None and per_page:
+                pages = -(-total // per_page)
+            if pages is not None:
+                return {"total": total, "pages": pages}
+
+    return None
+
+
+def safe_text(obj, path, default=""):
+    cur = obj
+    for k in path:
+        if not isinstance(cur, dict):
+            return default
+        cur = cur.get(k)
+        if cur is None:
+            return default
+    return cur if cur is not None else default
+
+
+# ✅ FIX: robust KM extraction from nested structures
+def extract_km(item: dict):
+    # common direct fields
+    for key in KM_KEYS:
+        if key in item and item.get(key) is not None:
+            return item.get(key)
+
+    # common nested containers
+    for container in ("vehicle", "vehicleData", "vehicleDetails", "car", "metaData", "characteristics"):
+        sub = item.get(container)
+        if isinstance(sub, dict):
+            for key in KM_KEYS:
+                if key in sub and sub.get(key) is not None:
+                    return sub.get(key)
+
+    # last resort: deep search up to a reasonable depth
+    def deep_find(obj, depth=0, max_depth=6):
+        if depth > max_depth:
+            return None
+        if isinstance(obj, dict):
+            for k, v in obj.items():
+                if k in KM_KEYS and v is not None:
+                    return v
+                found = deep_find(v, depth + 1, max_depth)
+                if found is not None:
+                    return found
+        elif isinstance(obj, list):
+            for v in obj:
+                found = deep_find(v, depth + 1, max_depth)
+                if found is not None:
+                    return found
+        return None
+
+    return deep_find(item)
+
+
+def listings_to_rows(listings_data: dict):
+    rows = []
+    for category in LISTING_CATEGORIES:
+        items = listings_data.get(category, [])
+        if not isinstance(items, list):
+            continue
+
+        for item in items:
+            dates = item.get("dates") or {}
+            vehicle_dates = item.get("vehicleDates") or {}
+
+            token = item.get("token")
+            link = f"https://www.yad2.co.il/vehicles/item/{token}" if token else ""
+
+            rows.append({
+                "Ad Number": item.get("adNumber"),
+                "Price (₪)": item.get("price"),
+                "City": safe_text(item, ["address", "city", "text"], ""),
+                "Model": safe_text(item, ["model", "text"], ""),
+                "SubModel": safe_text(item, ["subModel", "text"], ""),
+                "Production Year": vehicle_dates.get("yearOfProduction"),
+                "KM": extract_km(item),  # ✅ FIXED HERE
+                "Hand": safe_text(item, ["hand", "id"], ""),
+                "Listing Type": category,
+                "Created At": dates.get("createdAt"),
+                "Updated At": dates.get("updatedAt"),
+                "Description": safe_text(item, ["metaData", "description"], ""),
+                "Link": link
+            })
+
+    return rows
+
+
+def parse_page(html_content: str, page_num: int, keep_payload: bool = False, profiler=None,
+               hash_payload: bool = False, known_hash=None) -> dict:
+    """
+    Parse one downloaded page into listing rows.
+
+    Never raises (the result must be picklable back from a worker process):
+    failures are reported through the "error" / "message" keys.
+    With keep_payload=True the decoded listings payload is returned too ("listings"),
+    for the raw archive. "timings" holds the seconds spent per stage (soup / json / rows).
+    profiler (profiling.StageProfiler, inline parsing only) records the "parse" / "extract" stages.
+    With hash_payload=True the listings payload hash is returned ("payload_hash"); when it
+    equals known_hash the rows are not rebuilt ("unchanged": True, the caller has them cached).
+    """
+    timings = {"soup": 0.0, "json": 0.0, "rows": 0.0}
+    result = {"page": page_num, "rows": [], "pagination": None, "listings": None, "error": None, "message": "",
+              "timings": timings, "payload_hash": None, "unchanged": False}
+    try:
+        if "__NEXT_DATA__" not in html_content:
+            result.update(error=ERR_PARSE, message=f"Page {page_num} response seems incomplete (no __NEXT_DATA__).")
+            return result
+
+        with stage(profiler, "parse"):
+            t = time.perf_counter()
+            script_text = find_next_data_script(html_content)
+            timings["soup"] = time.perf_counter() - t
+            if script_text is None:
+                result.update(error=ERR_PARSE, message=f"Could not find __NEXT_DATA__ in page {page_num}.")
+                return result
+
+            t = time.perf_counter()
+            next_data = decode_next_data(script_text)
+            timings["json"] = time.perf_counter() - t
+            if not next_data:
+                result.update(error=ERR_PARSE, message=f"Could not decode __NEXT_DATA__ in page {page_num}.")
+                return result
+
+        with stage(profiler, "extract"):
+            t = time.perf_counter()
+            listings_data = find_listings_data(next_data)
+            if not listings_data:
+                result.update(error=ERR_PARSE, message=f"Could not locate listings data in page {page_num} payload.")
+                return result
+
+            if hash_payload or known_hash:
+                result["payload_hash"] = payload_hash(listings_data)
+            if known_hash and result["payload_hash"] == known_hash:
+                result["unchanged"] = True
+            else:
+                result["rows"] = listings_to_rows(listings_data)
+            timings["rows"] = time.perf_counter() - t
+        if keep_payload:
+            result["listings"] = listings_data
+        if page_num == 1:
+            result["pagination"] = find_pagination(next_data)
+    except Exception as e:
+        result.update(error=ERR_PARSE, message=f"Unexpected parsing error on page {page_num}: {e}")
+    return result
+
 
 class VehicleScraper:
-    def __init__(self, manufacturer=man, model=mod, max_pages=10,
-                 min_delay=2.5, max_delay=5.5, verbose=False):
+    def __init__(self, manufacturer=man, model=mod, max_pages=None,
+                 min_delay=2.5, max_delay=5.5, verbose=False,
+                 max_retries=3, backoff_base=4.0, backoff_max=90.0,
+                 checkpoint_path=None, workers=1, parse_workers=0, queue_size=8,
+                 archive_dir=None, profile=False, session=None, page_cache_path=None):
+        from scraper_metrics import ScrapeMetrics
+
         self.manufacturer = manufacturer
         self.model = model
-        self.max_pages = max_pages
+        self.max_pages = max_pages   # None = all pages reported by the site, int = upper cap
+        self.workers = max(1, int(workers))
         self.min_delay = min_delay
         self.max_delay = max_delay
         self.verbose = verbose
 
-        self.session = requests.Session()
-        self.all_listings = []
+        # pipeline: `workers` download threads -> bounded queue -> `parse_workers` processes
+        # parse_workers=0 parses inline in the download thread (fine for a few pages)
+        self.parse_workers = max(0, int(parse_workers or 0))
+        self.queue_size = max(1, int(queue_size))
+
+        # retry with exponential backoff + jitter (per page)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # checkpoint: JSONL file, one line per completed page -> resume after interruption
+        self.checkpoint_path = checkpoint_path
+
+        # conditional requests: per-URL validators + payload hash + rows of the last good response
+        self.page_cache = PageCache(page_cache_path) if page_cache_path else None
+        self._validators = {}       # page -> (etag, last_modified, bytes) of the latest 200 response
+        self._archived_payloads = {}  # archive path -> {(url, scraped_at): listings}, for 304 pages
+
+        # raw archive: every page's decoded listings payload, so datasets can be rebuilt later
+        self.archive = None
+        if archive_dir:
+            from raw_archive import RawArchive
+            self.archive = RawArchive(archive_dir)
+
+        # opt-in cProfile + tracemalloc per stage (fetch / parse / extract), see profiling.py.
+        # profilers are per-thread and cannot see into worker processes -> profiling runs inline, sequentially
+        self.profiler = None
+        if profile:
+            self.profiler = StageProfiler()
+            self.workers, self.parse_workers = 1, 0
+
+        # a caller running many scrapes (batch / daemon) can pass one warm session (connection pool, cookies)
+        self.session = session or requests.Session()
+        # columnar, append-only (typed arrays + dictionary-encoded strings) instead of one dict per listing
+        self.listing_buffer = ListingBuffer()
+
+        # per-page stage timings / bytes / rows / status codes (scraper_metrics.py)
+        self.metrics = ScrapeMetrics(labels={"manufacturer": manufacturer, "model": model})
+
+        # page plan (filled from the pagination metadata of page 1)
+        self.total_results = None
+        self.total_pages = None
+        self.planned_pages = []
+
+        self._lock = threading.Lock()
+        self._blocked = threading.Event()
 
         self.pages_attempted = 0
         self.pages_successful = 0
+        self.pages_resumed = 0
+        self.retries = 0
+        self.failed_pages = {}      # page -> error kind
+        self.completed_pages = set()
         self.stop_reason = ""
 
         # Headers to mimic a real browser
-        self.headers = {
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Cache-Control": "max-age=0",
-            "Connection": "keep-alive",
-            "DNT": "1",
-            "Referer": "https://www.yad2.co.il/",
-            "Upgrade-Insecure-Requests": "1",
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/99.0.4844.74 Safari/537.36"
-            ),
-        }
+        self.headers = dict(DEFAULT_HEADERS)
 
         # logger (לא basicConfig כאן כדי לא "לנעול" את ההגדרות)
-        self.logger = logging.getLogger(__name__)
+        self.logger = logger
         self.logger.setLevel(logging.INFO if self.verbose else logging.WARNING)
 
         if not self.logger.handlers:
@@ -64,174 +386,491 @@ class VehicleScraper:
         }
         return f"{base_url}?{'&'.join(f'{k}={v}' for k, v in params.items())}"
 
+    # thin wrappers kept for callers that used the methods directly
     def extract_json_from_html(self, html_content: str):
-        soup = BeautifulSoup(html_content, "html.parser")
-        script_tag = soup.find("script", id="__NEXT_DATA__")
-        if script_tag is None or not script_tag.string:
-            self.logger.warning("Could not find __NEXT_DATA__ in HTML.")
-            return None
-
-        try:
-            return json.loads(script_tag.string)
-        except json.JSONDecodeError as e:
-            self.logger.warning(f"JSON Decode Error: {e}")
-            return None
+        return extract_next_data(html_content)
 
     def _find_listings_data(self, next_data: dict):
-        try:
-            queries = next_data["props"]["pageProps"]["dehydratedState"]["queries"]
-        except KeyError:
-            return None
-
-        wanted_categories = {"private", "commercial", "solo", "platinum"}
+        return find_listings_data(next_data)
 
-        for q in queries:
-            data = (q.get("state") or {}).get("data")
-            if isinstance(data, dict) and wanted_categories.intersection(data.keys()):
-                return data
-
-        return None
+    def _find_pagination(self, next_data: dict):
+        return find_pagination(next_data)
 
     def _safe_text(self, obj, path, default=""):
-        cur = obj
-        for k in path:
-            if not isinstance(cur, dict):
-                return default
-            cur = cur.get(k)
-            if cur is None:
-                return default
-        return cur if cur is not None else default
-
-    # ✅ FIX: robust KM extraction from nested structures
-    def _extract_km(self, item: dict):
-        # common direct fields
-        for key in ("km", "KM", "kilometers", "kilometres", "mileage"):
-            if key in item and item.get(key) is not None:
-                return item.get(key)
-
-        # common nested containers
-        for container in ("vehicle", "vehicleData", "vehicleDetails", "car", "metaData", "characteristics"):
-            sub = item.get(container)
-            if isinstance(sub, dict):
-                for key in ("km", "KM", "kilometers", "kilometres", "mileage"):
-                    if key in sub and sub.get(key) is not None:
-                        return sub.get(key)
-
-        # last resort: deep search up to a reasonable depth
-        def deep_find(obj, depth=0, max_depth=6):
-            if depth > max_depth:
-                return None
-            if isinstance(obj, dict):
-                for k, v in obj.items():
-                    if k in ("km", "KM", "kilometers", "kilometres", "mileage") and v is not None:
-                        return v
-                    found = deep_find(v, depth + 1, max_depth)
-                    if found is not None:
-                        return found
-            elif isinstance(obj, list):
-                for v in obj:
-                    found = deep_find(v, depth + 1, max_depth)
-                    if found is not None:
-                        return found
-            return None
+        return safe_text(obj, path, default)
 
-        return deep_find(item)
+    def _extract_km(self, item: dict):
+        return extract_km(item)
 
-    def fetch_page(self, page_num: int) -> bool:
+    # ---------- I/O stage ----------
+    def _download(self, page_num: int, conditional: bool = True) -> str:
         url = self.build_url(page_num)
         if self.verbose:
             self.logger.info(f"Fetching page {page_num}: {url}")
 
-        try:
-            time.sleep(random.uniform(self.min_delay, self.max_delay))
-            resp = self.session.get(url, headers=self.headers, timeout=25, allow_redirects=True)
-            resp.raise_for_status()
+        t = time.perf_counter()
+        time.sleep(random.uniform(self.min_delay, self.max_delay))
+        sleep_s = time.perf_counter() - t
 
-            if "__NEXT_DATA__" not in resp.text:
-                self.logger.warning(f"Page {page_num} response seems incomplete (no __NEXT_DATA__).")
-                return False
-
-            next_data = self.extract_json_from_html(resp.text)
-            if not next_data:
-                return False
+        headers = self.headers
+        if self.page_cache is not None and conditional:
+            # with an archive, a 304 is only useful when the archived payload can be re-read
+            validators = self.page_cache.conditional_headers(url, need_archive=self.archive is not None)
+            headers = {**self.headers, **validators}
 
-            listings_data = self._find_listings_data(next_data)
-            if not listings_data:
-                self.logger.warning(f"Could not locate listings data in page {page_num} payload.")
-                return False
+        t = time.perf_counter()
+        try:
+            with stage(self.profiler, "fetch"):
+                resp = self.session.get(url, headers=headers, timeout=25, allow_redirects=True)
+                resp.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            status = e.response.status_code if getattr(e, "response", None) is not None else None
+            kind = classify_request_error(e)
+            self.metrics.record_download(page_num, sleep_s, time.perf_counter() - t, status, error=kind)
+            raise PageFetchError(kind, f"Request error on page {page_num}: {e}", status)
+        network_s = time.perf_counter() - t
+
+        if resp.status_code == 304 and self.page_cache is not None and self.page_cache.get(url):
+            # unchanged since the cached response: no body, the rows come from the page cache
+            saved = self.page_cache.get(url).get("bytes", 0)
+            self.metrics.record_download(page_num, sleep_s, network_s, 304, len(resp.content), saved_bytes=saved)
+            return NOT_MODIFIED
+
+        # requests negotiates gzip/deflate by default: Content-Length is the compressed size on the wire
+        nbytes = len(resp.content)
+        wire = resp.headers.get("Content-Length") if resp.headers.get("Content-Encoding") else None
+        compressed = max(0, nbytes - int(wire)) if wire and wire.isdigit() else 0
+        self.metrics.record_download(page_num, sleep_s, network_s, resp.status_code, nbytes,
+                                     compression_saved=compressed)
+        if self.page_cache is not None:
+            with self._lock:
+                self._validators[page_num] = (resp.headers.get("ETag"), resp.headers.get("Last-Modified"), nbytes)
+        return resp.text
+
+    def _parse_args(self, page_num: int):
+        """Extra parse_page arguments: (keep_payload, hash_payload, known_hash)."""
+        known = self.page_cache.known_hash(self.build_url(page_num)) if self.page_cache is not None else None
+        return self.archive is not None, self.page_cache is not None, known
+
+    def _cached_result(self, page_num: int):
+        """
+        parse_page-like result of a page answered with 304 (everything from the page cache),
+        or None when the archive is on and the page's archived payload cannot be re-read.
+        """
+        url = self.build_url(page_num)
+        entry = self.page_cache.get(url)
+        listings = None
+        if self.archive is not None:
+            listings = self._archived_listings(url, entry)
+            if listings is None:
+                return None
+        return {"page": page_num, "rows": [], "pagination": entry.get("pagination") if page_num == 1 else None,
+                "listings": listings, "error": None, "message": "", "timings": None,
+                "payload_hash": entry.get("payload_hash"), "unchanged": True, "not_modified": True}
+
+    def _download_revalidated(self, page_num: int):
+        """The page's HTML, or the cached result (dict) of a 304 whose rows / payload are all available."""
+        html = self._download(page_num)
+        if html is NOT_MODIFIED:
+            cached = self._cached_result(page_num)
+            if cached is not None:
+                return cached
+            # nothing to archive for this run: fetch the full page instead of counting it as done
+            self.logger.warning(f"Page {page_num}: 304 but its archived payload is missing - fetching it again.")
+            html = self._download(page_num, conditional=False)
+        return html
+
+    def _fetch_page_once(self, page_num: int):
+        html = self._download_revalidated(page_num)
+        if isinstance(html, dict):
+            return html
+        keep_payload, hash_payload, known_hash = self._parse_args(page_num)
+        result = parse_page(html, page_num, keep_payload, self.profiler, hash_payload, known_hash)
+        if result["error"]:
+            self.metrics.record_parse(page_num, result["timings"], 0, result["error"])
+            raise PageFetchError(result["error"], result["message"])
+        return result
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # exponential backoff with "full" jitter: 0.5x - 1.5x of the nominal delay
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+
+    def _retrying(self, page_num: int, step, count_attempt=True):
+        """Run step(page_num) with retries. Returns (value, error_kind); both None if the page was skipped."""
+        kind = None
+        for attempt in range(self.max_retries + 1):
+            if self._blocked.is_set():
+                # another page hit a block - leave this one for the resumed run
+                return None, None
+            if attempt == 0 and count_attempt:
+                with self._lock:
+                    self.pages_attempted += 1
+            try:
+                return step(page_num), None
+            except PageFetchError as e:
+                kind = e.kind
+                self.logger.warning(f"{e} [{e.kind}, attempt {attempt + 1}/{self.max_retries + 1}]")
+                if e.kind == ERR_BLOCKED:
+                    self._blocked.set()
+                if e.kind not in RETRYABLE_ERRORS or attempt == self.max_retries:
+                    return None, e.kind
+                with self._lock:
+                    self.retries += 1
+                time.sleep(self._backoff_delay(attempt))
+
+        return None, kind
 
-            for category in ["private", "commercial", "solo", "platinum"]:
-                items = listings_data.get(category, [])
-                if not isinstance(items, list):
+    def fetch_page(self, page_num: int) -> bool:
+        ok, _ = self._fetch_with_retry(page_num)
+        return ok
+
+    def _fetch_with_retry(self, page_num: int):
+        """Download + parse inline. Returns (ok, error_kind); kind is None if the page was skipped."""
+        result, kind = self._retrying(page_num, self._fetch_page_once)
+        if result is None:
+            return False, kind
+        self._accept_page(result)
+        return True, None
+
+    def _archived_listings(self, url, entry):
+        """Listings payload of a 304 page, re-read from the archive record the page cache points to."""
+        path, archived_at = entry.get("archive_path"), entry.get("archived_at")
+        if not path or not os.path.exists(path):
+            return None
+        with self._lock:
+            if path not in self._archived_payloads:
+                from raw_archive import load_payloads
+                self._archived_payloads[path] = load_payloads(path, self.manufacturer, self.model)
+            return self._archived_payloads[path].get((url, archived_at))
+
+    def _accept_page(self, result: dict):
+        page = result["page"]
+        url = self.build_url(page)
+        if self.page_cache is not None and result["unchanged"]:
+            # 304 or identical payload: reuse the rows built from the cached response
+            entry = self.page_cache.get(url)
+            result["rows"] = entry["rows"]
+            result["pagination"] = result["pagination"] or (entry.get("pagination") if page == 1 else None)
+            self.metrics.record_cached(page, "not_modified" if result.get("not_modified") else "unchanged")
+
+        self.metrics.record_parse(page, result.get("timings"), len(result["rows"]))
+        archived = False
+        with self._lock:
+            if result["pagination"]:
+                self._set_plan(result["pagination"])
+            self.listing_buffer.extend(result["rows"])
+            self.completed_pages.add(result["page"])
+            # archive first: a page is only checkpointed as done once its payload is on disk
+            if self.archive is not None and result.get("listings") is not None:
+                self.archive.append(url, result["page"], result["listings"],
+                                    manufacturer=self.manufacturer, model=self.model)
+                archived = True
+            self._save_checkpoint(result["page"], result["rows"], result["pagination"])
+            validators = self._validators.pop(page, None)
+
+        if self.page_cache is not None:
+            # rows + validators only; the payload itself lives in the archive (when there is one)
+            fields = {}
+            if not result.get("not_modified"):
+                etag, last_modified, nbytes = validators or (None, None, None)
+                fields.update(etag=etag, last_modified=last_modified, bytes=nbytes,
+                              payload_hash=result["payload_hash"], rows=result["rows"],
+                              pagination=result["pagination"])
+            if archived:
+                fields.update(archive_path=self.archive.path,
+                              archived_at=self.archive.scraped_at.isoformat(timespec="seconds"))
+            if fields:
+                self.page_cache.update(url, **fields)
+
+    # ---------- pipeline: download threads -> bounded queue -> parse processes ----------
+    def _scrape_pipeline(self, pages):
+        downloaded = queue.Queue(maxsize=self.queue_size)
+        parse_slots = threading.BoundedSemaphore(self.queue_size)
+        parse_attempts = {p: 0 for p in pages}
+        pending = [len(pages)]
+
+        def page_done(page, kind=None):
+            with self._lock:
+                if kind:
+                    self.failed_pages[page] = kind
+                pending[0] -= 1
+
+        def download(page, count_attempt=True):
+            html, kind = self._retrying(page, self._download_revalidated, count_attempt)
+            # blocks while the parse stage is saturated (back-pressure on the network side)
+            downloaded.put((page, html, kind))
+
+        def on_parsed(future, page):
+            parse_slots.release()
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"page": page, "error": ERR_PARSE, "message": f"Parse worker failed on page {page}: {e}"}
+
+            if not result["error"]:
+                self._accept_page(result)
+                page_done(page)
+                return
+
+            self.metrics.record_parse(page, result.get("timings"), 0, ERR_PARSE)
+            self.logger.warning(f"{result['message']} [{ERR_PARSE}, attempt {parse_attempts[page] + 1}/{self.max_retries + 1}]")
+            if parse_attempts[page] < self.max_retries and not self._blocked.is_set():
+                # incomplete page (anti-bot interstitial etc.) -> download it again
+                parse_attempts[page] += 1
+                with self._lock:
+                    self.retries += 1
+                io_pool.submit(download, page, False)
+            else:
+                page_done(page, ERR_PARSE)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as io_pool, \
+                ProcessPoolExecutor(max_workers=self.parse_workers) as parse_pool:
+            for page in pages:
+                io_pool.submit(download, page)
+
+            while True:
+                with self._lock:
+                    if pending[0] <= 0:
+                        break
+                try:
+                    page, html, kind = downloaded.get(timeout=0.2)
+                except queue.Empty:
                     continue
 
-                for item in items:
-                    dates = item.get("dates") or {}
-                    vehicle_dates = item.get("vehicleDates") or {}
-
-                    token = item.get("token")
-                    link = f"https://www.yad2.co.il/vehicles/item/{token}" if token else ""
-
-                    self.all_listings.append({
-                        "Ad Number": item.get("adNumber"),
-                        "Price (₪)": item.get("price"),
-                        "City": self._safe_text(item, ["address", "city", "text"], ""),
-                        "Model": self._safe_text(item, ["model", "text"], ""),
-                        "SubModel": self._safe_text(item, ["subModel", "text"], ""),
-                        "Production Year": vehicle_dates.get("yearOfProduction"),
-                        "KM": self._extract_km(item),  # ✅ FIXED HERE
-                        "Hand": self._safe_text(item, ["hand", "id"], ""),
-                        "Listing Type": category,
-                        "Created At": dates.get("createdAt"),
-                        "Updated At": dates.get("updatedAt"),
-                        "Description": self._safe_text(item, ["metaData", "description"], ""),
-                        "Link": link
-                    })
-
-            return True
+                if html is None:
+                    page_done(page, kind)
+                    continue
+                if isinstance(html, dict):      # 304 served from the page cache
+                    self._accept_page(html)
+                    page_done(page)
+                    continue
 
-        except requests.exceptions.RequestException as e:
-            self.logger.warning(f"Request error on page {page_num}: {e}")
-            return False
-        except Exception as e:
-            self.logger.warning(f"Unexpected parsing error on page {page_num}: {e}")
-            return False
+                parse_slots.acquire()
+                keep_payload, hash_payload, known_hash = self._parse_args(page)
+                fut = parse_pool.submit(parse_page, html, page, keep_payload, None, hash_payload, known_hash)
+                fut.add_done_callback(lambda f, p=page: on_parsed(f, p))
+
+    # ---------- page planning ----------
+    def _set_plan(self, pagination):
+        self.total_results = pagination.get("total")
+        self.total_pages = pagination.get("pages")
+
+    def plan_pages(self):
+        if self.total_pages:
+            last = self.total_pages
+            if self.max_pages:
+                last = min(last, self.max_pages)
+        else:
+            last = self.max_pages or FALLBACK_MAX_PAGES
+            self.logger.warning(f"No pagination metadata on page 1 - falling back to {last} pages; "
+                                f"coverage of the site's results is unknown.")
+        self.planned_pages = list(range(1, last + 1))
+        return self.planned_pages
+
+    @property
+    def coverage(self) -> float:
+        if not self.planned_pages:
+            return 0.0
+        done = sum(1 for p in self.planned_pages if p in self.completed_pages)
+        return done / len(self.planned_pages)
+
+    # ---------- checkpoint (resume) ----------
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+
+        with open(self.checkpoint_path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    # last line may be cut if the process was killed mid-write
+                    continue
+                if rec.get("manufacturer") != self.manufacturer or rec.get("model") != self.model:
+                    continue
+                page = rec["page"]
+                if page in self.completed_pages:
+                    continue
+                if rec.get("pagination"):
+                    self._set_plan(rec["pagination"])
+                self.completed_pages.add(page)
+                self.listing_buffer.extend(rec.get("rows", []))
+                self.pages_resumed += 1
+
+        if self.pages_resumed:
+            self.logger.warning(f"Resuming from checkpoint: {self.pages_resumed} pages already done.")
+
+    def _save_checkpoint(self, page_num: int, rows, pagination=None):
+        if not self.checkpoint_path:
+            return
+        folder = os.path.dirname(self.checkpoint_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        rec = {"manufacturer": self.manufacturer, "model": self.model, "page": page_num,
+               "pagination": pagination, "rows": rows}
+        with open(self.checkpoint_path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            fh.flush()
+
+    def clear_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
 
     def scrape_pages(self):
-        for page in range(1, self.max_pages + 1):
-            self.pages_attempted += 1
-            ok = self.fetch_page(page)
-
+        try:
+            return self._scrape_pages()
+        finally:
+            self.metrics.retries = self.retries
+            self.metrics.finish()
+            if self.page_cache is not None:
+                self.page_cache.save()
+            if self.archive is not None:
+                # tells readers (market_time) whether this run saw every listing or stopped early
+                self.archive.append_run(self.manufacturer, self.model, planned_pages=len(self.planned_pages),
+                                        completed_pages=len(self.completed_pages),
+                                        coverage=round(self.coverage, 4), stop_reason=self.stop_reason)
+                self.archive.close()
+
+    def write_metrics(self, metrics_dir="scrape_metrics"):
+        """JSON run report (timestamped) + Prometheus textfile (overwritten every run)."""
+        extra = {
+            "planned_pages": len(self.planned_pages),
+            "coverage": round(self.coverage, 4),
+            "failed_pages": {str(p): k for p, k in sorted(self.failed_pages.items())},
+            "stop_reason": self.stop_reason,
+        }
+        stamp = self.metrics.started_at.strftime("%Y%m%dT%H%M%SZ")
+        name = f"yad2_{self.manufacturer}_{self.model}"
+        json_path = self.metrics.write_json(os.path.join(metrics_dir, f"{name}_{stamp}.json"), extra)
+        prom_path = self.metrics.write_prometheus(os.path.join(metrics_dir, f"{name}.prom"))
+        return json_path, prom_path
+
+    def _scrape_pages(self):
+        self._load_checkpoint()
+
+        # page 1 first: it carries the total-results / page-count metadata for the plan
+        if 1 not in self.completed_pages:
+            ok, kind = self._fetch_with_retry(1)
             if not ok:
-                self.stop_reason = f"נעצר בעמוד {page} (תגובה לא מלאה / חסימה אפשרית)"
-                break
-
-            self.pages_successful += 1
-
-        if not self.all_listings:
+                self.failed_pages[1] = kind
+
+        if 1 in self.failed_pages:
+            # no page plan without page 1: stop instead of guessing FALLBACK_MAX_PAGES pages
+            self.planned_pages = [1]
+            pages, todo = self.planned_pages, []
+        else:
+            pages = self.plan_pages()
+            todo = [p for p in pages if p not in self.completed_pages and p not in self.failed_pages]
+
+        if todo and self.parse_workers > 0:
+            self._scrape_pipeline(todo)
+        elif todo:
+            # the whole plan is known up front, so pages can be fetched in parallel
+            # (each worker still sleeps min_delay..max_delay before every request)
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for page, (ok, kind) in zip(todo, pool.map(self._fetch_with_retry, todo)):
+                    if not ok and kind:
+                        self.failed_pages[page] = kind
+
+        self.pages_successful = sum(1 for p in pages if p in self.completed_pages)
+
+        if self._blocked.is_set():
+            blocked_at = min(p for p, k in self.failed_pages.items() if k == ERR_BLOCKED)
+            self.stop_reason = f"נעצר בעמוד {blocked_at} (חסימה אפשרית - אפשר להמשיך מנקודת השמירה)"
+
+        if self.failed_pages and not self.stop_reason:
+            pages = ", ".join(f"{p} ({k})" for p, k in sorted(self.failed_pages.items()))
+            self.stop_reason = f"עמודים שנכשלו אחרי {self.max_retries} ניסיונות חוזרים: {pages}"
+
+        if not len(self.listing_buffer):
             if not self.stop_reason:
                 self.stop_reason = "לא נמצאו מודעות"
             return None
 
-        return pd.DataFrame(self.all_listings)
+        return self.listing_buffer.to_frame()
+
 
+def run_scraper(manufacturer=35, model=10476, max_pages=None, verbose=False,
+                checkpoint_dir=None, max_retries=3, workers=1, parse_workers=0,
+                archive_dir=None, agg_store_path=None,
+                description_cache_path=None, metrics_dir=None,
+                profile=False, out_csv="yad2_scraped_data.csv", session=None, raise_on_block=False,
+                page_cache_dir=None):
+    """
+    Scrape one manufacturer/model into out_csv.
+
+    Only out_csv is written by default; every other output is opt-in:
+    checkpoint_dir (".scrape_checkpoints": resume an interrupted scrape), archive_dir
+    ("raw_archive"), agg_store_path ("yad2_aggs.json"), description_cache_path
+    ("description_cache.csv": mine KM / test date / extras from the descriptions),
+    metrics_dir ("scrape_metrics") and page_cache_dir (".page_cache").
+
+    raise_on_block=True raises PageFetchError(ERR_BLOCKED) after saving whatever was
+    collected, so batch callers can stop instead of hitting the site with the next model.
+
+    page_cache_dir keeps per-page ETag / Last-Modified validators and rows between runs, so
+    unchanged pages are revalidated (304, no body) or not re-extracted - see page_cache.py.
+
+    profile=True runs the scrape inline and writes a per-stage CPU / peak-memory profile
+    (fetch, parse, extract, mine, save) to <out_csv stem>.profile/ - see profiling.py.
+    """
+    checkpoint_path = None
+    if checkpoint_dir:
+        checkpoint_path = os.path.join(checkpoint_dir, f"yad2_{manufacturer}_{model}.jsonl")
 
-def run_scraper(manufacturer=35, model=10476, max_pages=10, verbose=False):
     scraper = VehicleScraper(
         manufacturer=manufacturer,
         model=model,
         max_pages=max_pages,
-        verbose=verbose
+        verbose=verbose,
+        max_retries=max_retries,
+        checkpoint_path=checkpoint_path,
+        workers=workers,
+        parse_workers=parse_workers,
+        archive_dir=archive_dir,
+        profile=profile,
+        session=session,
+        page_cache_path=cache_path_for(page_cache_dir, manufacturer, model) if page_cache_dir else None
     )
 
     df = scraper.scrape_pages()
+    if metrics_dir:
+        scraper.write_metrics(metrics_dir)
+
+    # a full, clean run does not need the checkpoint anymore (next run should start fresh)
+    if not scraper.failed_pages and not scraper._blocked.is_set():
+        scraper.clear_checkpoint()
 
     if df is None or df.empty:
         print(f"⚠️ לא נאספו מודעות. {scraper.stop_reason}")
+        if scraper.profiler is not None:
+            scraper.profiler.write(out_csv)
+        if raise_on_block and scraper._blocked.is_set():
+            raise PageFetchError(ERR_BLOCKED, scraper.stop_reason)
         return df
 
+    import pandas as pd
+
+    # KM / test date / ownership / extras from the free-text description (KM is missing in the payload)
+    if description_cache_path:
+        from description_miner import mine_descriptions
+        with stage(scraper.profiler, "mine"):
+            df = mine_descriptions(df, cache_path=description_cache_path)
+
     # שמירה לקובץ
-    df.to_csv("yad2_scraped_data.csv", index=False, encoding="utf-8")
+    with stage(scraper.profiler, "save"):
+        # temp file + rename: readers of out_csv (market_api, dashboards) never see a half-written file
+        tmp_csv = out_csv + ".tmp"
+        df.to_csv(tmp_csv, index=False, encoding="utf-8")
+        os.replace(tmp_csv, out_csv)
+    if scraper.profiler is not None:
+        print("⏱️ פרופיל נשמר ב:", scraper.profiler.write(out_csv))
+
+    # incremental per-(Model, SubModel, Year) aggregates: only the new rows are folded in
+    if agg_store_path:
+        from agg_store import update_agg_store
+        update_agg_store(df, agg_store_path, batch_id=f"{manufacturer}_{model}_{time.strftime('%Y%m%dT%H%M%S')}")
 
     # --- סיכום יפה בעברית, עם שם דגם מתוך הדאטה ---
     model_name = None
@@ -252,12 +891,15 @@ def run_scraper(manufacturer=35, model=10476, max_pages=10, verbose=False):
 
     print(
         f"חיפשתי מכונית מסוג {car_text}, שנתון {year_text}. "
-        f"סרקתי {scraper.pages_successful} עמודים (ניסיתי {scraper.pages_attempted}). "
+        f"סרקתי {scraper.pages_successful} עמודים (ניסיתי {scraper.pages_attempted}, "
+        f"{scraper.pages_resumed} מנקודת שמירה, {scraper.retries} ניסיונות חוזרים). "
+        f"כיסוי: {scraper.pages_successful}/{len(scraper.planned_pages)} עמודים מתוכננים "
+        f"({scraper.coverage:.0%}, לפי {scraper.total_results if scraper.total_results is not None else '?'} תוצאות באתר). "
         f"סה\"כ {len(df)} מודעות. "
         f"{('סיבה לעצירה: ' + scraper.stop_reason) if scraper.stop_reason else ''}"
     )
-    print("✅ נשמר כקובץ yad2_scraped_data.csv")
+    print(f"✅ נשמר כקובץ {out_csv}")
 
+    if raise_on_block and scraper._blocked.is_set():
+        raise PageFetchError(ERR_BLOCKED, scraper.stop_reason)
     return df
-
-
@@ -0,0 +1,138 @@
+"""
+Cross-model depreciation curves, normalized to each model's newest-year price.
+
+build_depreciation_curves rolls the listings up once into a compact table with one row
+per (Model, Production Year): listings, median price and relative_price = 100 * median /
+median of the model's newest year (the newest year with at least MIN_LISTINGS listings),
+plus Age = newest year - Production Year, so models of different generations line up
+(negative for the few newer years that have fewer listings than MIN_LISTINGS).
+
+The table is written to DEPRECIATION_CURVES_PATH; comparing any number of models is then
+one lookup in the Model-indexed table (curves_for) instead of a filter-and-aggregate pass
+per model.
+
+Usage (from Car_ads_script/):
+    python depreciation_curves.py                                   # -> depreciation_curves.csv
+    python depreciation_curves.py --html compare.html --models פורסטר אאוטבק
+"""
+import os
+import sys
+import argparse
+
+DEPRECIATION_CURVES_PATH = "depreciation_curves.csv"
+MIN_PRICE = 1000
+MIN_LISTINGS = 3
+
+CURVE_COLUMNS = ["Model", "Production Year", "Age", "listings", "median_price", "avg_price",
+                 "relative_price", "depr_yoy_pct"]
+
+
+def build_depreciation_curves(df, min_price=MIN_PRICE, min_listings=MIN_LISTINGS):
+    """
+    Listings -> per-(Model, Production Year) normalized depreciation curves.
+
+    Returns:
+    --------
+    pd.DataFrame
+        Model, Production Year, Age, listings, median_price, avg_price,
+        relative_price (% of the newest-year median), depr_yoy_pct (vs. one year newer)
+    """
+    import pandas as pd
+
+    df = df[[c for c in ["Model", "Production Year", "Price (₪)"] if c in df.columns]].copy()
+    df["Price (₪)"] = pd.to_numeric(df["Price (₪)"], errors="coerce")
+    df["Production Year"] = pd.to_numeric(df["Production Year"], errors="coerce")
+    df = df.dropna(subset=["Production Year", "Price (₪)"])
+    df = df[df["Price (₪)"] > min_price]
+    df["Production Year"] = df["Production Year"].round().astype(int)
+    df["Model"] = df["Model"].fillna("").astype(str) if "Model" in df.columns else ""
+    df = df[df["Model"] != ""]
+    if df.empty:
+        return pd.DataFrame(columns=CURVE_COLUMNS)
+
+    curves = df.groupby(["Model", "Production Year"])["Price (₪)"].agg(
+        listings="size", median_price="median", avg_price="mean").reset_index()
+
+    # reference: newest year with enough listings (a handful of brand-new ads is noisy)
+    newest = curves.groupby("Model")["Production Year"].max()
+    enough = curves[curves["listings"] >= min_listings].groupby("Model")["Production Year"].max()
+    newest.update(enough)
+    ref = curves.merge(newest.rename("ref_year"), left_on="Model", right_index=True)
+    ref = ref[ref["Production Year"] == ref["ref_year"]].set_index("Model")["median_price"]
+
+    curves["Age"] = (curves["Model"].map(newest) - curves["Production Year"]).astype(int)
+    curves["relative_price"] = 100 * curves["median_price"] / curves["Model"].map(ref)
+    curves = curves.sort_values(["Model", "Production Year"], ascending=[True, False], kind="stable")
+    # year-over-year change going one year older (negative = the older car is cheaper)
+    curves["depr_yoy_pct"] = curves.groupby("Model")["median_price"].pct_change() * 100
+
+    curves = curves.sort_values(["Model", "Production Year"], kind="stable")
+    return curves[CURVE_COLUMNS].round({"median_price": 0, "avg_price": 0, "relative_price": 2,
+                                        "depr_yoy_pct": 2}).reset_index(drop=True)
+
+
+def index_curves(curves):
+    """Model-indexed (sorted) table: every later lookup is a slice, not a scan."""
+    return curves.set_index("Model").sort_index(kind="stable")
+
+
+def curves_for(indexed, models, min_listings=1, max_age=None):
+    """The curves of the given models (one .loc lookup), optionally only ages up to max_age."""
+    present = [m for m in models if m in indexed.index]
+    out = indexed.loc[present].reset_index() if present else indexed.iloc[:0].reset_index()
+    out = out[out["listings"] >= min_listings]
+    if max_age is not None:
+        out = out[out["Age"].between(0, max_age)]
+    return out
+
+
+def comparison_figure(curves, x="Age", title="Depreciation: median price as % of the newest-year price"):
+    """Overlay of the given curves (relative_price by Age or Production Year, one line per model)."""
+    import plotly.express as px
+
+    fig = px.line(
+        curves.sort_values(["Model", x]), x=x, y="relative_price", color="Model", markers=True,
+        hover_data=["Production Year", "listings", "median_price", "depr_yoy_pct"], title=title,
+    )
+    fig.add_hline(y=100, line_dash="dot")
+    fig.update_yaxes(title="% of newest-year median price")
+    fig.update_xaxes(title="Age (years older than the newest model year)" if x == "Age" else x)
+    if x == "Production Year":
+        fig.update_xaxes(autorange="reversed")
+    fig.update_layout(height=480)
+    return fig
+
+
+def build_depreciation_curves_table(csv_path="yad2_scraped_data.csv", out_csv=DEPRECIATION_CURVES_PATH):
+    """Listings CSV -> depreciation_curves.csv."""
+    import pandas as pd
+
+    build_depreciation_curves(pd.read_csv(csv_path)).to_csv(out_csv, index=False, encoding="utf-8")
+    return out_csv
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", default="yad2_scraped_data.csv")
+    ap.add_argument("--out", default=DEPRECIATION_CURVES_PATH)
+    ap.add_argument("--html", help="also write a comparison chart of --models (default: the 10 most listed)")
+    ap.add_argument("--models", nargs="+")
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.csv):
+        print(f"No such file: {args.csv}")
+        return 1
+
+    print("✅ Saved to:", build_depreciation_curves_table(args.csv, args.out))
+    if args.html:
+        import pandas as pd
+
+        indexed = index_curves(pd.read_csv(args.out))
+        models = args.models or indexed.groupby(level=0)["listings"].sum().nlargest(10).index.tolist()
+        comparison_figure(curves_for(indexed, models, min_listings=MIN_LISTINGS)).write_html(
+            args.html, include_plotlyjs="cdn")
+        print("✅ Saved to:", args.html)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Recover KM and common details from the free-text Description column.
+
+Sellers usually write mileage / test date / ownership / extras in the description
+("שמורה, 85,000 ק"מ, טסט עד 03/2026, יד ראשונה מפרטי, גג נפתח").
+The patterns are precompiled and applied column-wise (Series.str.*) to the distinct,
+not-yet-seen descriptions only; results are cached by description hash, so repeated
+runs over mostly the same listings skip the text they already processed.
+"""
+import os
+import re
+import hashlib
+
+DESCRIPTION_CACHE_PATH = "description_cache.csv"
+
+# "85,000 ק"מ" / "85000 קמ" / "85.000 km" / "85000 קילומטר"
+_KM_UNIT = r"(?:ק\s*[\"״'׳]?\s*מ|קמ|קילומטר|km|KM)"
+KM_RE = re.compile(r"(\d{1,3}(?:[,.]\d{3})+|\d{4,6})\s*" + _KM_UNIT, re.IGNORECASE)
+# "120 אלף ק"מ" / "120K km" - the unit is required: "95 אלף ש"ח" is a price, "5K" is anything
+KM_THOUSANDS_RE = re.compile(r"(\d{1,3})\s*(?:אלף|K)\s*" + _KM_UNIT, re.IGNORECASE)
+# "טסט עד 03/2026" / "טסט ל-3.26"
+TEST_RE = re.compile(r"טסט\s*(?:עד|ל-?|לעוד|בתוקף עד)?\s*(\d{1,2})\s*[/.\-]\s*(\d{2,4})")
+OWNERSHIP_PATTERNS = {
+    "first hand": re.compile(r"יד\s*ראשונה|יד\s*1(?!\d)"),
+    "leasing": re.compile(r"ליסינג"),
+    "rental": re.compile(r"השכרה"),
+    "company": re.compile(r"(?:רכב|מ)חברה"),
+    "private": re.compile(r"פרטי(?:ת)?"),
+}
+FEATURE_PATTERNS = {
+    "Sunroof": re.compile(r"גג\s*נפתח|סאנרוף|גג\s*פנורמי", re.IGNORECASE),
+    "Leather": re.compile(r"(?:ריפוד|מושבי)\s*עור|\bעור\b"),
+    "Reverse Camera": re.compile(r"מצלמ(?:ה|ת)\s*(?:רוורס|אחורית|נסיעה\s*לאחור)"),
+    "Parking Sensors": re.compile(r"חיישני\s*(?:חניה|רוורס)"),
+    "Multimedia": re.compile(r"מולטימדיה|אנדרואיד\s*אוטו|קאר\s*פליי|carplay", re.IGNORECASE),
+    "Cruise Control": re.compile(r"קרוז|שיוט\s*אדפטיבי"),
+    "Accident Free": re.compile(r"ללא\s*תאונות|לא\s*עבר\s*תאונה"),
+}
+
+MINED_COLUMNS = ["KM (desc)", "Test Until", "Ownership"] + list(FEATURE_PATTERNS)
+
+KM_MIN, KM_MAX = 100, 1_000_000
+
+# bump when the patterns change: cached results of the old patterns are then not reused
+MINER_VERSION = 2
+
+
+def description_hash(text) -> str:
+    return hashlib.blake2b(f"{MINER_VERSION}:{text}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _to_number(s):
+    import pandas as pd
+    return pd.to_numeric(s.str.replace(r"[,.]", "", regex=True), errors="coerce")
+
+
+def extract_fields(descriptions):
+    """
+    Run all patterns over a Series of description strings (column-wise).
+
+    Returns:
+    --------
+    pd.DataFrame
+        MINED_COLUMNS, same index as `descriptions`
+
+    Examples:
+    ---------
+    >>> import pandas as pd
+    >>> extract_fields(pd.Series(['85,000 ק"מ', '120 אלף ק"מ', '95 אלף ש"ח', '5K']))["KM (desc)"].tolist()
+    [85000.0, 120000.0, nan, nan]
+    """
+    import numpy as np
+    import pandas as pd
+
+    s = descriptions.fillna("").astype(str)
+    out = pd.DataFrame(index=s.index)
+
+    km = _to_number(s.str.extract(KM_RE, expand=False))
+    km_k = pd.to_numeric(s.str.extract(KM_THOUSANDS_RE, expand=False), errors="coerce") * 1000
+    km = km.fillna(km_k)
+    out["KM (desc)"] = km.where(km.between(KM_MIN, KM_MAX))
+
+    test = s.str.extract(TEST_RE)
+    month = pd.to_numeric(test[0], errors="coerce")
+    year = pd.to_numeric(test[1], errors="coerce")
+    year = year.where(year >= 100, year + 2000)
+    valid = month.between(1, 12) & year.between(2000, 2100)
+    out["Test Until"] = np.where(
+        valid,
+        year.fillna(0).astype(int).astype(str) + "-" + month.fillna(0).astype(int).astype(str).str.zfill(2),
+        None,
+    )
+
+    # first matching ownership label, in priority order
+    ownership = pd.Series(None, index=s.index, dtype="object")
+    for label, pattern in OWNERSHIP_PATTERNS.items():
+        ownership = ownership.where(ownership.notna() | ~s.str.contains(pattern), label)
+    out["Ownership"] = ownership
+
+    for name, pattern in FEATURE_PATTERNS.items():
+        out[name] = s.str.contains(pattern)
+
+    return out
+
+
+def _load_cache(path):
+    import pandas as pd
+
+    if not path or not os.path.exists(path):
+        return pd.DataFrame(columns=MINED_COLUMNS, index=pd.Index([], name="hash"))
+    cache = pd.read_csv(path, index_col="hash", encoding="utf-8")
+    return cache.reindex(columns=MINED_COLUMNS)
+
+
+def mine_descriptions(df, cache_path=DESCRIPTION_CACHE_PATH, backfill_km=True):
+    """
+    Add the MINED_COLUMNS to df (from the Description column) and backfill missing KM.
+
+    Only distinct descriptions whose hash is not in the cache are processed;
+    new results are appended to the cache file.
+    """
+    import pandas as pd
+
+    if "Description" not in df.columns:
+        return df
+
+    desc = df["Description"].fillna("").astype(str)
+    codes, uniques = pd.factorize(desc)
+    hashes = pd.Index([description_hash(u) for u in uniques], name="hash")
+
+    cache = _load_cache(cache_path)
+    missing = ~hashes.isin(cache.index)
+    if missing.any():
+        fresh = extract_fields(pd.Series(uniques[missing]))
+        fresh.index = hashes[missing]
+        fresh.index.name = "hash"
+        if cache_path:
+            write_header = not os.path.exists(cache_path)
+            fresh.to_csv(cache_path, mode="a", header=write_header, encoding="utf-8")
+        cache = pd.concat([cache, fresh]) if len(cache) else fresh
+        cache = cache[~cache.index.duplicated(keep="last")]
+
+    per_unique = cache.reindex(hashes)
+    mined = per_unique.take(codes)
+    mined.index = df.index
+
+    out = df.drop(columns=[c for c in MINED_COLUMNS if c in df.columns]).join(mined)
+    if backfill_km:
+        km = pd.to_numeric(out["KM"], errors="coerce") if "KM" in out.columns else pd.Series(float("nan"), index=out.index)
+        out["KM"] = km.fillna(pd.to_numeric(out["KM (desc)"], errors="coerce"))
+    return out
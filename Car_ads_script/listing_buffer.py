@@ -0,0 +1,153 @@
+"""
+Append-only columnar buffer for the scraper's listing rows.
+
+Instead of one dict per listing (13 keys + boxed values each), every column is stored once:
+- Ad Number / Price / Production Year / Hand: int64 array.array + missing-value mask
+- KM: float64 array.array (NaN = missing)
+- City / Model / SubModel / Listing Type: dictionary-encoded (int32 codes + one copy of
+  every distinct string)
+- free text (dates, description, link): plain lists
+
+to_frame() views the arrays with np.frombuffer and copies each column once into the
+DataFrame - no re-scan of a list of dicts. The dtypes are the ones pandas infers from the
+row dicts: int64, or float64 with NaN when a value is missing; strings for the rest. A value that does not fit its typed column (e.g. a
+non-numeric KM) demotes that column to a plain list, so nothing is ever lost.
+
+    buf = ListingBuffer()
+    buf.extend(rows)          # rows: list of dicts (data_extracter.listings_to_rows)
+    df = buf.to_frame()
+"""
+import array
+
+INT_COLUMNS = ["Ad Number", "Price (₪)", "Production Year", "Hand"]
+FLOAT_COLUMNS = ["KM"]
+CATEGORY_COLUMNS = ["City", "Model", "SubModel", "Listing Type"]
+
+# column order of data_extracter.listings_to_rows
+COLUMNS = ["Ad Number", "Price (₪)", "City", "Model", "SubModel", "Production Year", "KM", "Hand",
+           "Listing Type", "Created At", "Updated At", "Description", "Link"]
+
+
+def _as_int(value):
+    """int, None for missing, or raises ValueError when the value is not an exact integer."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, int):
+        return value
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(value)
+    return int(number)
+
+
+def _as_float(value):
+    if value is None or value == "":
+        return float("nan")
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return float(value)
+
+
+class ListingBuffer:
+    def __init__(self, columns=COLUMNS):
+        self.columns = list(columns)
+        self.n = 0
+        self._ints = {c: (array.array("q"), bytearray()) for c in INT_COLUMNS if c in self.columns}
+        self._floats = {c: array.array("d") for c in FLOAT_COLUMNS if c in self.columns}
+        self._categories = {c: (array.array("i"), {}) for c in CATEGORY_COLUMNS if c in self.columns}
+        self._lists = {c: [] for c in self.columns
+                       if c not in self._ints and c not in self._floats and c not in self._categories}
+
+    def __len__(self):
+        return self.n
+
+    def _demote(self, column):
+        """Typed column -> plain list (keeps every value seen so far)."""
+        if column in self._ints:
+            values, mask = self._ints.pop(column)
+            self._lists[column] = [None if m else v for v, m in zip(values, mask)]
+        elif column in self._floats:
+            self._lists[column] = [None if v != v else v for v in self._floats.pop(column)]
+
+    def _add_column(self, column):
+        self.columns.append(column)     # a key outside COLUMNS: kept as a plain list
+        self._lists[column] = [None] * self.n
+
+    def extend(self, rows):
+        """
+        Append a page of row dicts (missing keys = missing values).
+
+        Examples:
+        ---------
+        >>> buf = ListingBuffer(["Ad Number"])
+        >>> buf.extend([{"Ad Number": 1}])
+        >>> buf.extend([{"Ad Number": 2}, {"Ad Number": 2 ** 70}])     # > int64: demoted, nothing lost
+        >>> buf.to_frame()["Ad Number"].tolist()
+        [1, 2, 1180591620717411303424]
+        """
+        if not rows:
+            return
+        for column in set().union(*rows).difference(self.columns):
+            self._add_column(column)
+
+        for column, (values, mask) in list(self._ints.items()):
+            page = [row.get(column) for row in rows]
+            try:
+                if not all(type(v) is int for v in page):      # fast path: plain ints, nothing missing
+                    page = [_as_int(v) for v in page]
+                # converted before either buffer grows: array.extend keeps a partial page on
+                # overflow (> int64), which would leave values / mask / n out of step
+                values.extend(array.array("q", [0 if v is None else v for v in page]))
+            except (TypeError, ValueError, OverflowError):
+                self._demote(column)
+                continue
+            mask.extend(v is None for v in page)
+
+        for column, values in list(self._floats.items()):
+            page = [row.get(column) for row in rows]
+            try:
+                if all(type(v) in (int, float) for v in page):
+                    values.extend(page)
+                else:
+                    values.extend([_as_float(v) for v in page])
+            except (TypeError, ValueError, OverflowError):
+                self._demote(column)
+
+        for column, (codes, lookup) in self._categories.items():
+            codes.extend([-1 if v is None else lookup.setdefault(v, len(lookup))
+                          for v in (row.get(column) for row in rows)])
+
+        for column, values in self._lists.items():
+            values.extend(row.get(column) for row in rows)
+        self.n += len(rows)
+
+    def to_frame(self):
+        """The buffered rows as a DataFrame (every column copied once, out of the buffers)."""
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for column in self.columns:
+            if column in self._ints:
+                values, mask = self._ints[column]
+                values = np.frombuffer(values, dtype=np.int64)
+                mask = np.frombuffer(mask, dtype=bool)
+                if mask.any():
+                    values = values.astype(np.float64)
+                    values[mask] = np.nan
+                else:
+                    values = values.copy()
+                data[column] = values
+            elif column in self._floats:
+                data[column] = np.frombuffer(self._floats[column], dtype=np.float64).copy()
+            elif column in self._categories:
+                codes, lookup = self._categories[column]
+                # distinct strings + a trailing None for code -1, gathered once
+                uniques = np.array(list(lookup) + [None], dtype=object)
+                data[column] = uniques[np.frombuffer(codes, dtype=np.int32)]
+            else:
+                data[column] = np.array(self._lists[column], dtype=object)
+        # the buffers stay appendable: no numpy view of them outlives this call
+        return pd.DataFrame(data, columns=self.columns, copy=False)
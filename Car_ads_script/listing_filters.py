@@ -0,0 +1,48 @@
+"""
+Listing filters shared by the Streamlit app (and the hot-path benchmarks).
+
+All conditions are combined into one boolean mask and the rows are gathered once,
+instead of re-slicing (and copying) the frame after every filter.
+"""
+
+
+def filter_listings(df, year_range=None, price_range=None, model="All", submodel="All",
+                    km_range=None, hands=None, engines=None):
+    """
+    Apply the sidebar filters.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Cleaned listings (numeric Production Year / Price (₪) / KM / Hand)
+    year_range, price_range, km_range : (low, high) or None
+        Inclusive ranges; None = no filter. Rows without a KM value are dropped
+        only when km_range is given, so pass it only once the range was narrowed.
+    model, submodel : str
+        Exact value, "All" / None = no filter
+    hands, engines : iterable or None
+        Allowed Hand / Engine (L) values; None = no filter
+
+    Returns:
+    --------
+    pd.DataFrame
+        The matching rows (a new frame)
+    """
+    import numpy as np
+
+    mask = np.ones(len(df), dtype=bool)
+    if year_range is not None:
+        mask &= df["Production Year"].between(*year_range).to_numpy()
+    if price_range is not None:
+        mask &= df["Price (₪)"].between(*price_range).to_numpy()
+    if model not in ("All", None):
+        mask &= (df["Model"] == model).to_numpy()
+    if submodel not in ("All", None):
+        mask &= (df["SubModel"] == submodel).to_numpy()
+    if km_range is not None:
+        mask &= df["KM"].between(*km_range).to_numpy(dtype=bool, na_value=False)
+    if hands is not None:
+        mask &= df["Hand"].isin(list(hands)).to_numpy()
+    if engines is not None:
+        mask &= df["Engine (L)"].isin(list(engines)).to_numpy(dtype=bool, na_value=False)
+    return df[mask]
@@ -0,0 +1,133 @@
+"""
+Bitmap / sorted-array index over the listings for multi-filter selection.
+
+- categorical columns (Model, SubModel, Hand, Engine (L), ...): factorized once; the
+  bitmap of a value (np.packbits, 1 bit per row) is built on first use and cached
+- range columns (Production Year, Price (₪), KM): one argsort; a [low, high] range is
+  two searchsorted calls on the sorted values -> the matching rows' bitmap
+
+A combined filter is the AND of the per-filter bitmaps (n/8 bytes each), and the
+selected rows are gathered from the frame once - no intermediate frames or copies.
+
+    index = ListingIndex(df)
+    f = index.filter(year_range=(2018, 2022), model="פורסטר", hands=[1, 2])
+"""
+
+CATEGORICAL_COLUMNS = ["Model", "SubModel", "Hand", "Engine (L)", "Generation", "City", "Listing Type"]
+RANGE_COLUMNS = ["Production Year", "Price (₪)", "KM"]
+
+
+class ListingIndex:
+    def __init__(self, df, categorical=CATEGORICAL_COLUMNS, ranges=RANGE_COLUMNS):
+        """df is treated as read-only; columns are indexed lazily, on their first filter."""
+        self.df = df
+        self.n = len(df)
+        self.categorical = [c for c in categorical if c in df.columns]
+        self.ranges = [c for c in ranges if c in df.columns]
+        self._codes = {}      # column -> (codes, {value: code})
+        self._bitmaps = {}    # (column, code) -> packed bitmap
+        self._sorted = {}     # column -> (order, sorted values without NaN)
+
+    # ---------- bitmaps ----------
+    def all_rows(self):
+        import numpy as np
+        return np.packbits(np.ones(self.n, dtype=bool))
+
+    def _from_positions(self, positions):
+        import numpy as np
+        bits = np.zeros(self.n, dtype=bool)
+        bits[positions] = True
+        return np.packbits(bits)
+
+    def positions(self, bitmap):
+        import numpy as np
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n))
+
+    def count(self, bitmap):
+        import numpy as np
+        return int(np.unpackbits(bitmap, count=self.n).sum())
+
+    # ---------- categorical ----------
+    def _column_codes(self, column):
+        if column not in self._codes:
+            import pandas as pd
+            codes, uniques = pd.factorize(self.df[column], use_na_sentinel=True)
+            self._codes[column] = (codes, {v: i for i, v in enumerate(uniques)})
+        return self._codes[column]
+
+    def value_bitmap(self, column, values):
+        """Rows whose column equals any of values (missing values never match)."""
+        import numpy as np
+
+        codes, lookup = self._column_codes(column)
+        out = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for value in values:
+            code = lookup.get(value)
+            if code is None:
+                continue
+            bitmap = self._bitmaps.get((column, code))
+            if bitmap is None:
+                bitmap = np.packbits(codes == code)
+                self._bitmaps[(column, code)] = bitmap
+            out |= bitmap
+        return out
+
+    def values(self, column):
+        """Distinct non-missing values of a categorical column."""
+        return list(self._column_codes(column)[1])
+
+    # ---------- ranges ----------
+    def _column_sorted(self, column):
+        if column not in self._sorted:
+            import numpy as np
+            import pandas as pd
+            values = pd.to_numeric(self.df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            order = np.argsort(values, kind="stable")
+            n_valid = int((~np.isnan(values)).sum())   # NaN sorts last
+            self._sorted[column] = (order[:n_valid], values[order[:n_valid]])
+        return self._sorted[column]
+
+    def range_bitmap(self, column, low=None, high=None):
+        """Rows with low <= column <= high (inclusive, like Series.between); missing values never match."""
+        import numpy as np
+
+        order, sorted_values = self._column_sorted(column)
+        lo = 0 if low is None else np.searchsorted(sorted_values, low, side="left")
+        hi = len(sorted_values) if high is None else np.searchsorted(sorted_values, high, side="right")
+        return self._from_positions(order[lo:hi])
+
+    # ---------- queries ----------
+    def select(self, ranges=None, values=None):
+        """AND of range filters {column: (low, high)} and value filters {column: [values]}."""
+        bitmap = None
+        for column, (low, high) in (ranges or {}).items():
+            part = self.range_bitmap(column, low, high)
+            bitmap = part if bitmap is None else bitmap & part
+        for column, vals in (values or {}).items():
+            part = self.value_bitmap(column, vals)
+            bitmap = part if bitmap is None else bitmap & part
+        return self.all_rows() if bitmap is None else bitmap
+
+    def take(self, bitmap):
+        """The selected rows, gathered once."""
+        return self.df.iloc[self.positions(bitmap)]
+
+    def filter(self, year_range=None, price_range=None, model="All", submodel="All",
+               km_range=None, hands=None, engines=None):
+        """Same filters / semantics as listing_filters.filter_listings, resolved through the index."""
+        ranges, values = {}, {}
+        if year_range is not None:
+            ranges["Production Year"] = year_range
+        if price_range is not None:
+            ranges["Price (₪)"] = price_range
+        if km_range is not None:
+            ranges["KM"] = km_range
+        if model not in ("All", None):
+            values["Model"] = [model]
+        if submodel not in ("All", None):
+            values["SubModel"] = [submodel]
+        if hands is not None:
+            values["Hand"] = list(hands)
+        if engines is not None:
+            values["Engine (L)"] = list(engines)
+        return self.take(self.select(ranges, values))
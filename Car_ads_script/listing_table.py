@@ -0,0 +1,98 @@
+"""
+Paginated, sorted listings table for the Streamlit app.
+
+The full cleaned frame gets one precomputed sort order per sortable column
+(argsort over all rows, computed on first use and kept for the session). A page
+of the current selection is then: keep the sorted positions that are selected
+(one boolean gather), slice the page, gather those rows - no sort_values of the
+filtered frame on every rerun, and only page_size rows go to the browser.
+Text search runs over a lower-cased haystack built once, restricted to the
+selected rows.
+"""
+
+# label -> column
+SORTABLE = {
+    "Price": "Price (₪)",
+    "Production Year": "Production Year",
+    "KM": "KM",
+    "Created": "Created At",
+}
+SEARCH_COLUMNS = ["Ad Number", "Model", "SubModel", "City", "Description"]
+
+
+class ListingTable:
+    def __init__(self, df):
+        """df: the full cleaned listings, positionally indexed (RangeIndex); treated as read-only."""
+        self.df = df
+        self._orders = {}
+        self._haystack = None
+
+    def _sort_values(self, column):
+        import numpy as np
+        import pandas as pd
+
+        if column == "Created At":
+            from market_time import parse_timestamps
+            ts = parse_timestamps(self.df[column])
+            values = ts.astype("int64").astype(float)
+            values[ts.isna().to_numpy()] = np.nan
+            return values.to_numpy()
+        return pd.to_numeric(self.df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+    def order(self, column, ascending=True):
+        """Row positions sorted by column (missing values last in both directions)."""
+        import numpy as np
+
+        key = (column, ascending)
+        if key not in self._orders:
+            values = self._sort_values(column)
+            asc = np.argsort(values, kind="stable")          # NaN sorts to the end
+            n_valid = int((~np.isnan(values)).sum())
+            self._orders[(column, True)] = asc
+            self._orders[(column, False)] = np.concatenate([asc[:n_valid][::-1], asc[n_valid:]])
+        return self._orders[key]
+
+    def search(self, query, rows):
+        """Subset of the boolean row mask whose text fields contain query (case-insensitive)."""
+        import numpy as np
+
+        query = (query or "").strip().lower()
+        if not query:
+            return rows
+        if self._haystack is None:
+            cols = [c for c in SEARCH_COLUMNS if c in self.df.columns]
+            hay = self.df[cols[0]].astype(str)
+            for c in cols[1:]:
+                hay = hay + " | " + self.df[c].fillna("").astype(str)
+            self._haystack = hay.str.lower().to_numpy(dtype=object)
+
+        positions = np.flatnonzero(rows)
+        hits = np.fromiter((query in text for text in self._haystack[positions]), dtype=bool, count=len(positions))
+        out = np.zeros(len(self.df), dtype=bool)
+        out[positions[hits]] = True
+        return out
+
+    def page(self, rows, sort="Price (₪)", ascending=True, query="", page=1, page_size=50, columns=None):
+        """
+        One page of the selected rows.
+
+        Parameters:
+        -----------
+        rows : np.ndarray
+            Boolean mask over self.df (the current filter selection)
+        sort : str
+            Column name (a value of SORTABLE)
+
+        Returns:
+        --------
+        (pd.DataFrame, int)
+            The page (page_size rows at most) and the number of matching rows
+        """
+        rows = self.search(query, rows)
+        order = self.order(sort, ascending)
+        selected = order[rows[order]]
+        start = (max(1, page) - 1) * page_size
+        out = self.df.iloc[selected[start:start + page_size]]
+        if columns is not None:
+            out = out[[c for c in columns if c in out.columns]]
+        return out.reset_index(drop=True), len(selected)
@@ -1,19 +1,41 @@
-import data_extracter
 man = 35
 mod = 10476
-df = data_extracter.run_scraper(manufacturer=man, model=mod, max_pages=10, verbose=False)
-import plot_price_over_year
-import plot_price_drop
-import plot_sweet_point
-import plot_price_Distribution_by_Production_Year
-import build_dashboard_plotly
-out = build_dashboard_plotly.build_yad2_dashboard_html(
-    years="2020-2026",
-    model="all",
-    submodel="all",
-    out_html="dashboard.html"
-)
-print("Saved to:", out)
+
+
+def main():
+    # heavy modules (pandas / matplotlib / plotly / bs4) are only imported once they are used,
+    # so `import main` itself is instant - see benchmarks/bench_import_time.py
+    import data_extracter
+    from yad2_data import load_yad2_data
+    from plot_price_over_year import plot_price_over_year
+    from plot_price_drop import plot_price_drop
+    from plot_sweet_point import plot_sweet_point
+    from plot_price_Distribution_by_Production_Year import plot_price_distribution_by_production_year
+
+    # pages planned from the site metadata; resumable, KM recovered from the descriptions
+    df = data_extracter.run_scraper(manufacturer=man, model=mod, verbose=False,
+                                    checkpoint_dir=".scrape_checkpoints",
+                                    description_cache_path="description_cache.csv")
+
+    # load once, reuse for every plot
+    data = load_yad2_data()
+    plot_price_over_year(data)
+    plot_price_drop(data)
+    plot_sweet_point(data)
+    plot_price_distribution_by_production_year(data)
+
+    import build_dashboard_plotly
+    out = build_dashboard_plotly.build_yad2_dashboard_html(
+        years="2020-2026",
+        model="all",
+        submodel="all",
+        out_html="dashboard.html"
+    )
+    print("Saved to:", out)
+
+
+if __name__ == "__main__":
+    main()
 
 
 #### ------------------------------------------------------------------###
@@ -26,7 +48,5 @@ print("Saved to:", out)
 # a new chrome or the defaulted browser will automatically opened with the dashboard"
 
 # KM is currently unavailable due to YAD2 recently changes made.
+# it is recovered from the listing descriptions instead (description_miner.py).
 #### ------------------------------------------------------------------###
-
-
-
@@ -0,0 +1,350 @@
+"""
+Read-only local JSON API over the scraped market data.
+
+    GET /health
+    GET /models                                      models with listing counts
+    GET /aggregates?model=&submodel=&years=          per-year listings / avg / median / YoY depreciation
+    GET /sweet-scores?model=&submodel=&years=        per-year sweet-score table + sweet year
+    GET /listings?model=&submodel=&years=&min_price=&max_price=&sort=price&order=asc&page=1&page_size=50
+
+Same numbers as the dashboards (build_dashboard_plotly.build_aggs). The CSV is loaded
+once; every distinct request is computed once and kept as ready-to-send JSON bytes
+with an ETag, so repeated requests (and `If-None-Match` revalidations -> 304) are served
+straight from memory. The cache is dropped as soon as the CSV changes on disk
+(a new scrape landed): the unfiltered /models, /aggregates and /sweet-scores responses
+(WARM_REQUESTS) are precomputed right away, filtered ones on their first request.
+A CSV that cannot be parsed (e.g. caught mid-write) keeps the last good data serving;
+with no good data yet the API answers 503.
+
+Usage (from Car_ads_script/):
+    python market_api.py                         # http://127.0.0.1:8765
+    python market_api.py --csv yad2_scraped_data.csv --port 9000
+    curl "http://127.0.0.1:8765/aggregates?model=פורסטר&years=2018-2024"
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import traceback
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DATA_PATH = "yad2_scraped_data.csv"
+MIN_PRICE = 1000
+MAX_PAGE_SIZE = 500
+CACHE_ENTRIES = 1024
+# precomputed after every reload: the dashboard-level views every client asks for first
+WARM_REQUESTS = [("/health", {}), ("/models", {}), ("/aggregates", {}), ("/sweet-scores", {})]
+
+AGG_COLUMNS = ["Production Year", "listings", "avg_price", "median_price", "depr_yoy_pct"]
+SWEET_COLUMNS = ["Production Year", "listings", "avg_price", "depr_from_prev_pct", "depr_to_next_pct",
+                 "availability", "low_count_penalty", "sweet_score"]
+LISTING_COLUMNS = ["Ad Number", "Price (₪)", "Production Year", "Model", "SubModel", "City", "KM", "Hand",
+                   "Listing Type", "Created At", "Updated At", "Link"]
+SORT_COLUMNS = {"price": "Price (₪)", "year": "Production Year", "km": "KM", "created": "Created At"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class DataUnavailable(RuntimeError):
+    pass
+
+
+def load_listings(csv_path, min_price=MIN_PRICE):
+    """CSV -> cleaned listings (same cleanup as the dashboards)."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    for col in ["Production Year", "Price (₪)", "KM", "Hand"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in ["Model", "SubModel", "City", "Link"]:
+        df[col] = df[col].fillna("").astype(str) if col in df.columns else ""
+
+    df = df.dropna(subset=["Production Year", "Price (₪)"])
+    df = df[df["Price (₪)"] > min_price].copy()
+    df["Production Year"] = df["Production Year"].round().astype(int)
+    return df.reset_index(drop=True)
+
+
+def _records(df):
+    """DataFrame -> JSON-ready list of dicts (NaN -> null, numpy scalars -> Python)."""
+    out = df.astype(object).where(df.notna(), None)
+    return out.to_dict("records")
+
+
+def parse_years(spec):
+    if not spec or spec == "all":
+        return None
+    try:
+        if "-" in spec:
+            a, b = spec.split("-", 1)
+            return int(a), int(b)
+        return int(spec), int(spec)
+    except ValueError:
+        raise BadRequest(f"years must be 'all', 'YYYY' or 'YYYY-YYYY', got {spec!r}")
+
+
+def _int_param(params, name, default, lo=None, hi=None):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if lo is not None:
+        value = max(lo, value)
+    if hi is not None:
+        value = min(hi, value)
+    return value
+
+
+class MarketCache:
+    """Loaded listings + memoized JSON responses, invalidated when the CSV file changes."""
+
+    def __init__(self, csv_path=DATA_PATH, min_price=MIN_PRICE, max_entries=CACHE_ENTRIES):
+        self.csv_path = csv_path
+        self.min_price = min_price
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = None
+        self._df = None
+        self._responses = OrderedDict()   # (endpoint, params) -> (etag, body)
+        self.hits = 0
+        self.misses = 0
+
+    def _data_version(self):
+        st = os.stat(self.csv_path)
+        return st.st_mtime_ns, st.st_size
+
+    def _refresh(self):
+        # one stat() per request; reload only when a new scrape replaced the file
+        try:
+            version = self._data_version()
+        except FileNotFoundError:
+            if self._df is None:
+                raise
+            return      # the file is being replaced: keep the last good data
+        if version == self._version:
+            return
+        import pandas as pd
+
+        try:
+            df = load_listings(self.csv_path, self.min_price)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError, KeyError, OSError) as e:
+            # caught mid-write / damaged: retried on the next request (the version is not recorded)
+            if self._df is None:
+                raise DataUnavailable(f"data file {self.csv_path!r} could not be read: {e}")
+            return
+        self._df = df
+        self._responses.clear()
+        self._version = version
+        for endpoint, params in WARM_REQUESTS:
+            self._responses[self._key(endpoint, params)] = self._compute(df, endpoint, params)
+
+    @staticmethod
+    def _key(endpoint, params):
+        return endpoint, tuple(sorted(params.items()))
+
+    @staticmethod
+    def _compute(df, endpoint, params):
+        payload = ENDPOINTS[endpoint](df, params)
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"', body
+
+    def get(self, endpoint, params):
+        """(etag, body bytes) for a request, computed on first use."""
+        key = self._key(endpoint, params)
+        with self._lock:
+            self._refresh()
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+                self.hits += 1
+                return cached
+            df = self._df
+
+        etag, body = self._compute(df, endpoint, params)
+
+        with self._lock:
+            if self._df is df:   # not invalidated meanwhile
+                self._responses[key] = (etag, body)
+                if len(self._responses) > self.max_entries:
+                    self._responses.popitem(last=False)
+            self.misses += 1
+        return etag, body
+
+
+# ---------- endpoints: (listings, params) -> JSON-able payload ----------
+def _filtered(df, params):
+    from listing_filters import filter_listings
+
+    return filter_listings(
+        df,
+        year_range=parse_years(params.get("years")),
+        price_range=(
+            (_int_param(params, "min_price", 0), _int_param(params, "max_price", 10 ** 9))
+            if "min_price" in params or "max_price" in params else None
+        ),
+        model=params.get("model", "All") or "All",
+        submodel=params.get("submodel", "All") or "All",
+    )
+
+
+def _by_year(df, params):
+    from build_dashboard_plotly import build_aggs
+
+    f = _filtered(df, params)
+    if f.empty:
+        return f, None, None
+    by_year, sweet_year = build_aggs(f)
+    return f, by_year, sweet_year
+
+
+def _filters_echo(params):
+    return {k: params[k] for k in ("model", "submodel", "years", "min_price", "max_price") if k in params}
+
+
+def get_health(df, params):
+    return {"status": "ok", "listings": int(len(df))}
+
+
+def get_models(df, params):
+    counts = df[df["Model"] != ""].groupby("Model").agg(
+        listings=("Price (₪)", "size"),
+        median_price=("Price (₪)", "median"),
+        min_year=("Production Year", "min"),
+        max_year=("Production Year", "max"),
+    ).reset_index().sort_values("listings", ascending=False)
+    return {"models": _records(counts)}
+
+
+def get_aggregates(df, params):
+    f, by_year, _ = _by_year(df, params)
+    rows = _records(by_year[AGG_COLUMNS]) if by_year is not None else []
+    return {"filters": _filters_echo(params), "listings": int(len(f)), "by_year": rows}
+
+
+def get_sweet_scores(df, params):
+    f, by_year, sweet_year = _by_year(df, params)
+    rows = _records(by_year[SWEET_COLUMNS]) if by_year is not None else []
+    return {"filters": _filters_echo(params), "listings": int(len(f)), "sweet_year": sweet_year, "by_year": rows}
+
+
+def get_listings(df, params):
+    f = _filtered(df, params)
+
+    sort = params.get("sort", "price")
+    if sort not in SORT_COLUMNS or SORT_COLUMNS[sort] not in f.columns:
+        raise BadRequest(f"sort must be one of {sorted(SORT_COLUMNS)}")
+    order = params.get("order", "asc")
+    if order not in ("asc", "desc"):
+        raise BadRequest("order must be 'asc' or 'desc'")
+    page_size = _int_param(params, "page_size", 50, 1, MAX_PAGE_SIZE)
+    page = _int_param(params, "page", 1, 1)
+
+    f = f.sort_values(SORT_COLUMNS[sort], ascending=order == "asc", kind="stable", na_position="last")
+    start = (page - 1) * page_size
+    cols = [c for c in LISTING_COLUMNS if c in f.columns]
+    return {
+        "filters": _filters_echo(params),
+        "total": int(len(f)),
+        "page": page,
+        "page_size": page_size,
+        "pages": -(-len(f) // page_size),
+        "listings": _records(f.iloc[start:start + page_size][cols]),
+    }
+
+
+ENDPOINTS = {
+    "/health": get_health,
+    "/models": get_models,
+    "/aggregates": get_aggregates,
+    "/sweet-scores": get_sweet_scores,
+    "/listings": get_listings,
+}
+
+
+# ---------- HTTP ----------
+class MarketAPIHandler(BaseHTTPRequestHandler):
+    cache = None            # set by make_server
+    server_version = "Yad2MarketAPI/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        endpoint = url.path.rstrip("/") or "/health"
+        if endpoint not in ENDPOINTS:
+            return self._send_json(404, {"error": f"unknown endpoint {endpoint}", "endpoints": sorted(ENDPOINTS)})
+
+        params = dict(parse_qsl(url.query))
+        try:
+            etag, body = self.cache.get(endpoint, params)
+        except BadRequest as e:
+            return self._send_json(400, {"error": str(e)})
+        except FileNotFoundError:
+            return self._send_json(503, {"error": f"no data file {self.cache.csv_path!r} yet"})
+        except DataUnavailable as e:
+            return self._send_json(503, {"error": str(e)})
+        except Exception as e:
+            # a bug or a malformed data file: answer in JSON (not a dropped connection), keep the trace
+            traceback.print_exc()
+            return self._send_json(500, {"error": f"internal error: {type(e).__name__}: {e}"})
+
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")   # clients may keep it, but must revalidate
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+
+def make_server(csv_path=DATA_PATH, host="127.0.0.1", port=8765, verbose=False):
+    handler = type("Handler", (MarketAPIHandler,), {"cache": MarketCache(csv_path)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", default=DATA_PATH)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--verbose", action="store_true", help="log every request")
+    args = ap.parse_args(argv)
+
+    server = make_server(args.csv, args.host, args.port, args.verbose)
+    print(f"Serving {args.csv} on http://{args.host}:{server.server_address[1]}  (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
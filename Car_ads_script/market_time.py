@@ -0,0 +1,172 @@
+"""
+Time-on-market analytics from "Created At" / "Updated At" + repeated scrapes.
+
+- load_observations: (Ad Number, Scraped At, ...) for every listing in every archived scrape
+  (raw_archive.py), streamed so only the needed columns are kept; "Complete" marks the
+  observations of runs that fetched every planned page
+- build_time_on_market: per-listing first/last seen, updates and time-to-disappearance,
+  rolled up per (Model, Production Year, price band) into a compact table
+
+The table is written to TIME_ON_MARKET_PATH so dashboards chart it without
+re-parsing timestamp strings on every render.
+
+Usage (from Car_ads_script/):
+    python market_time.py                  # archive -> time_on_market.csv
+"""
+import os
+import sys
+import argparse
+
+TIME_ON_MARKET_PATH = "time_on_market.csv"
+PRICE_BAND = 25_000
+
+TABLE_COLUMNS = ["Model", "Production Year", "Price Band", "listings", "active", "disappeared",
+                 "median_age_days", "median_days_to_disappear", "avg_updates_per_week"]
+
+OBSERVATION_COLUMNS = ["Ad Number", "Scraped At", "Model", "Production Year", "Price (₪)", "Created At", "Updated At",
+                       "Complete"]
+
+
+def parse_timestamps(s):
+    import pandas as pd
+    return pd.to_datetime(s, errors="coerce", utc=True, format="ISO8601", cache=True)
+
+
+def load_observations(archive_dir="raw_archive", paths=None):
+    """One row per (listing, scrape) from the raw archive; Complete = the run's summary says it finished."""
+    import pandas as pd
+    import raw_archive
+
+    paths = paths if paths is not None else raw_archive.archive_files(archive_dir)
+    columns = OBSERVATION_COLUMNS[:-1] + ["_run"]
+    frames, batch, complete_runs = [], [], set()
+    for rec in raw_archive.iter_records(paths):
+        run = (rec.get("scraped_at"), rec.get("manufacturer"), rec.get("model"))
+        if "run" in rec:
+            if raw_archive.run_complete(rec):
+                complete_runs.add(run)
+            continue
+        for row in raw_archive.records_to_rows(rec):
+            batch.append([row.get(c) for c in OBSERVATION_COLUMNS[:-1]] + [run])
+        if len(batch) >= 50_000:
+            frames.append(pd.DataFrame(batch, columns=columns))
+            batch = []
+    if batch or not frames:
+        frames.append(pd.DataFrame(batch, columns=columns))
+    obs = pd.concat(frames, ignore_index=True)
+    obs["Complete"] = obs["_run"].isin(complete_runs)
+    return obs.drop(columns="_run")
+
+
+def observations_from_frame(df, scraped_at=None):
+    """A single scrape (e.g. yad2_scraped_data.csv) as observations."""
+    import pandas as pd
+
+    obs = df.reindex(columns=OBSERVATION_COLUMNS).copy()
+    if obs["Scraped At"].isna().all():
+        obs["Scraped At"] = pd.Timestamp(scraped_at or pd.Timestamp.now(tz="UTC")).isoformat()
+    obs["Complete"] = True      # nothing to compare against: no listing counts as disappeared
+    return obs
+
+
+def build_time_on_market(obs, price_band=PRICE_BAND):
+    """
+    Roll observations up into a compact per-(Model, Production Year, Price Band) table.
+
+    A listing "disappeared" when the last complete scrape of its model (obs["Complete"], every
+    planned page fetched) no longer contains it - a partial or blocked run proves nothing;
+    time-to-disappearance = last time seen - Created At. Listings without a price are kept
+    in their own (empty) Price Band. No usable observations (e.g. an archive of blocked
+    runs only) -> an empty table with TABLE_COLUMNS.
+
+    Examples:
+    ---------
+    >>> import pandas as pd
+    >>> build_time_on_market(pd.DataFrame(columns=OBSERVATION_COLUMNS)).columns.tolist() == TABLE_COLUMNS
+    True
+    """
+    import pandas as pd
+
+    obs = obs.dropna(subset=["Ad Number"]).copy()
+    if "Complete" not in obs.columns:
+        obs["Complete"] = True
+    obs["Ad Number"] = pd.to_numeric(obs["Ad Number"], errors="coerce")
+    obs["Price (₪)"] = pd.to_numeric(obs["Price (₪)"], errors="coerce")
+    obs["Production Year"] = pd.to_numeric(obs["Production Year"], errors="coerce")
+    obs["Model"] = obs["Model"].fillna("").astype(str)
+    obs = obs.dropna(subset=["Ad Number", "Production Year"])
+    if obs.empty:
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+
+    # to_datetime caches repeated strings, so every distinct timestamp is parsed once
+    for col in ["Scraped At", "Created At", "Updated At"]:
+        obs[col] = parse_timestamps(obs[col])
+
+    per_ad = obs.groupby("Ad Number").agg(
+        Model=("Model", "last"),
+        year=("Production Year", "last"),
+        price=("Price (₪)", "last"),
+        created=("Created At", "min"),
+        first_seen=("Scraped At", "min"),
+        last_seen=("Scraped At", "max"),
+        updates=("Updated At", "nunique"),
+    )
+
+    latest_scrape = obs.groupby("Model")["Scraped At"].max()
+    model_latest = per_ad["Model"].map(latest_scrape)
+    latest_complete = obs[obs["Complete"].astype(bool)].groupby("Model")["Scraped At"].max()
+    day = pd.Timedelta(days=1)
+
+    # NaT (no complete run of the model) compares False: nothing disappears
+    per_ad["disappeared"] = per_ad["last_seen"] < per_ad["Model"].map(latest_complete)
+    start = per_ad["created"].fillna(per_ad["first_seen"])
+    per_ad["age_days"] = (model_latest - start) / day
+    per_ad["days_to_disappear"] = ((per_ad["last_seen"] - start) / day).where(per_ad["disappeared"])
+    weeks_listed = ((per_ad["last_seen"] - start) / day / 7).clip(lower=1)
+    per_ad["updates_per_week"] = (per_ad["updates"] - 1).clip(lower=0) / weeks_listed
+
+    band_lo = (per_ad["price"] // price_band * price_band)
+    per_ad["Price Band"] = band_lo.map(lambda v: f"{int(v / 1000)}k-{int((v + price_band) / 1000)}k" if v == v else "")
+    per_ad["band_lo"] = band_lo
+    per_ad["Production Year"] = per_ad["year"].round().astype(int)
+
+    table = per_ad.groupby(["Model", "Production Year", "band_lo", "Price Band"], dropna=False).agg(
+        listings=("price", "size"),
+        active=("disappeared", lambda s: int((~s).sum())),
+        disappeared=("disappeared", "sum"),
+        median_age_days=("age_days", "median"),
+        median_days_to_disappear=("days_to_disappear", "median"),
+        avg_updates_per_week=("updates_per_week", "mean"),
+    ).reset_index().sort_values(["Model", "Production Year", "band_lo"], na_position="last").drop(columns="band_lo")
+
+    return table.round({"median_age_days": 1, "median_days_to_disappear": 1, "avg_updates_per_week": 2})
+
+
+def build_time_on_market_table(archive_dir="raw_archive", out_csv=TIME_ON_MARKET_PATH, fallback_csv="yad2_scraped_data.csv"):
+    """Archive (or, without an archive, the current CSV) -> compact time-on-market CSV."""
+    import pandas as pd
+    import raw_archive
+
+    if raw_archive.archive_files(archive_dir):
+        obs = load_observations(archive_dir)
+    elif fallback_csv and os.path.exists(fallback_csv):
+        obs = observations_from_frame(pd.read_csv(fallback_csv))
+    else:
+        raise FileNotFoundError(f"No raw archive in {archive_dir!r} and no {fallback_csv!r}")
+
+    table = build_time_on_market(obs)
+    table.to_csv(out_csv, index=False, encoding="utf-8")
+    return out_csv
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--archive-dir", default="raw_archive")
+    ap.add_argument("--out", default=TIME_ON_MARKET_PATH)
+    args = ap.parse_args(argv)
+    print("✅ Saved to:", build_time_on_market_table(args.archive_dir, args.out))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Per-URL cache of HTTP validators and extracted rows, for conditional page requests.
+
+For every results page it keeps the ETag / Last-Modified validators of the last good
+response, a hash of the extracted listings payload and the rows built from it. The next
+run of the same scrape
+- sends If-None-Match / If-Modified-Since: a 304 reuses the cached rows without a body
+  (bytes saved = the size of the last full response)
+- hashes the listings payload of a full response: an identical payload reuses the cached
+  rows without rebuilding them
+
+One gzip JSON file per (manufacturer, model), written atomically at the end of a run.
+"""
+import os
+import gzip
+import json
+import hashlib
+import threading
+
+CACHE_DIR = ".page_cache"
+
+
+def cache_path_for(cache_dir, manufacturer, model):
+    return os.path.join(cache_dir, f"yad2_{manufacturer}_{model}.json.gz")
+
+
+def payload_hash(listings_data):
+    """Stable hash of a decoded listings payload (key order does not matter)."""
+    text = json.dumps(listings_data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class PageCache:
+    def __init__(self, path):
+        self.path = path
+        # url -> {etag, last_modified, payload_hash, bytes, pagination, rows[, archive_path, archived_at]}
+        # (the listings payload is not kept here: with an archive, archive_path / archived_at point to it)
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as fh:
+                    self.entries = json.load(fh)
+                for entry in self.entries.values():
+                    # payloads stored by older versions are dropped on the next save
+                    self._dirty |= entry.pop("listings", None) is not None
+            except (OSError, ValueError):
+                # a cut / corrupt cache only costs full downloads
+                self.entries = {}
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def conditional_headers(self, url, need_archive=False):
+        """
+        If-None-Match / If-Modified-Since for url (only when its rows are cached to fall back on).
+
+        need_archive=True (the scrape archives every page): also only when the archive file
+        holding the page's last payload still exists, so a 304 never leaves a page unarchived.
+
+        Examples:
+        ---------
+        >>> cache = PageCache(None)
+        >>> cache.update("u", etag='"v1"', rows=[], archive_path="/no/such/archive.jsonl.gz")
+        >>> cache.conditional_headers("u")
+        {'If-None-Match': '"v1"'}
+        >>> cache.conditional_headers("u", need_archive=True)
+        {}
+        """
+        entry = self.get(url)
+        if not entry or entry.get("rows") is None:
+            return {}
+        if need_archive and not (entry.get("archive_path") and os.path.exists(entry["archive_path"])):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def known_hash(self, url):
+        entry = self.get(url)
+        return entry.get("payload_hash") if entry and entry.get("rows") is not None else None
+
+    def update(self, url, **fields):
+        with self._lock:
+            self.entries.setdefault(url, {}).update(fields)
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            tmp = self.path + ".tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as fh:
+                json.dump(self.entries, fh, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+            self._dirty = False
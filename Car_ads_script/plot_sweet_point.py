@@ -1,83 +1,71 @@
-import matplotlib.pyplot as plt
-import numpy as np
+from yad2_data import load_yad2_data
 
 
-
-import pandas as pd
-import os
-
-def load_yad2_data(filename='yad2_scraped_data.csv'):
+def plot_sweet_point(df, min_year=2020, min_price=1000, show=True, verbose=True):
     """
-    Load Yad2 scraped data with validation.
-    
+    Year-over-year price change with the "sweet spot" year marked.
+
     Parameters:
     -----------
-    filename : str
-        CSV file path
-    
+    df : pd.DataFrame
+        Already-loaded Yad2 data (see load_yad2_data)
+    min_year, min_price : int
+        Basic sanity filters
+    show : bool
+        Call plt.show() (False for headless rendering)
+    verbose : bool
+        Print the sweet-spot summary
+
     Returns:
     --------
-    pd.DataFrame
-        Raw dataframe from CSV
-    
-    Raises:
-    -------
-    FileNotFoundError
-        If CSV doesn't exist
+    matplotlib.figure.Figure
     """
-    if not os.path.exists(filename):
-        raise FileNotFoundError(f"File not found: {filename}")
-    
-    df = pd.read_csv(filename, encoding='utf-8-sig')
-    
-    # Validate required columns exist
-    required_cols = ['Production Year', 'Price (₪)']
-    missing = [col for col in required_cols if col not in df.columns]
-    if missing:
-        raise ValueError(f"Missing columns: {missing}")
-    
-    return df
+    import matplotlib.pyplot as plt
 
+    df_spot = df[['Production Year', 'Price (₪)']].dropna()
+    df_spot = df_spot[
+        (df_spot['Production Year'] >= min_year) &
+        (df_spot['Price (₪)'] > min_price)
+    ]
 
-df_spot = load_yad2_data()
+    avg_prices = df_spot.groupby('Production Year')['Price (₪)'].mean().sort_index()
 
-df_spot = df_spot[['Production Year', 'Price (₪)']].dropna()
-df_spot = df_spot[
-    (df_spot['Production Year'] > 2019) &
-    (df_spot['Price (₪)'] > 1000)
-]
+    # ירידת ערך באחוזים משנה לשנה
+    price_drop_pct = avg_prices.pct_change() * 100
+    # מסתכלים רק על שנים שבהן הייתה ירידת מחיר (שלילית)
+    drops_only = price_drop_pct[price_drop_pct < 0]
 
-avg_prices = df_spot.groupby('Production Year')['Price (₪)'].mean().sort_index()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(price_drop_pct.index, price_drop_pct.values, 'o-', label='Yearly Price Change (%)')
 
-# ירידת ערך באחוזים משנה לשנה
-price_drop_pct = avg_prices.pct_change() * 100
-# מסתכלים רק על שנים שבהן הייתה ירידת מחיר (שלילית)
-drops_only = price_drop_pct[price_drop_pct < 0]
+    # sweet spot = הירידה הכי קטנה (הכי קרובה ל-0)
+    if not drops_only.empty:
+        sweet_year = drops_only.idxmax()
+        sweet_drop = drops_only.loc[sweet_year]
+        if verbose:
+            print(
+                f"🔍 ה-Sweet Spot לרכישה הוא שנת {sweet_year}.\n"
+                f"בירידת ערך של כ-{abs(sweet_drop):.1f}% בלבד לעומת השנה הקודמת.\n"
+                f"משנה זו והלאה ירידת הערך מתמתנת משמעותית."
+            )
 
-# sweet spot = הירידה הכי קטנה (הכי קרובה ל-0)
-sweet_year = drops_only.idxmax()
-sweet_drop = drops_only.loc[sweet_year]
-print(
-    f"🔍 ה-Sweet Spot לרכישה הוא שנת {sweet_year}.\n"
-    f"בירידת ערך של כ-{abs(sweet_drop):.1f}% בלבד לעומת השנה הקודמת.\n"
-    f"משנה זו והלאה ירידת הערך מתמתנת משמעותית."
-)
-import matplotlib.pyplot as plt
+        ax.axvline(
+            sweet_year,
+            linestyle='--',
+            linewidth=2,
+            label=f'Sweet Spot: {sweet_year}'
+        )
 
-plt.figure(figsize=(10,5))
-plt.plot(price_drop_pct.index, price_drop_pct.values, 'o-', label='Yearly Price Change (%)')
+    ax.axhline(0, color='black', linewidth=0.8)
+    ax.set_xlabel("Production Year")
+    ax.set_ylabel("Year-over-Year Price Change (%)")
+    ax.set_title("Vehicle Depreciation – Finding the Sweet Spot")
+    ax.grid(True)
+    ax.legend()
+    if show:
+        plt.show()
+    return fig
 
-plt.axvline(
-    sweet_year,
-    linestyle='--',
-    linewidth=2,
-    label=f'Sweet Spot: {sweet_year}'
-)
 
-plt.axhline(0, color='black', linewidth=0.8)
-plt.xlabel("Production Year")
-plt.ylabel("Year-over-Year Price Change (%)")
-plt.title("Vehicle Depreciation – Finding the Sweet Spot")
-plt.grid(True)
-plt.legend()
-plt.show()
+if __name__ == "__main__":
+    plot_sweet_point(load_yad2_data())
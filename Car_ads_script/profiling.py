@@ -0,0 +1,120 @@
+"""
+Opt-in per-stage profiling (cProfile + tracemalloc) for run_scraper / build_yad2_dashboard_html.
+
+    prof = StageProfiler()
+    with prof.stage("load"):
+        ...
+    prof.write("dashboard.html")   # -> dashboard.profile/{summary.txt, summary.json, <stage>.prof}
+
+A stage can be entered many times (e.g. "fetch" once per page); its CPU profile,
+wall time and call count accumulate. Only one cProfile profiler can be active at a
+time, so a nested stage pauses the enclosing one while it runs.
+The .prof files open with `python -m pstats` or snakeviz.
+"""
+import io
+import os
+import json
+import time
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+TOP_N = 15
+
+
+def stage(profiler, name):
+    """profiler.stage(name), or a no-op context when profiling is off (profiler is None)."""
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+class StageProfiler:
+    def __init__(self, top_n=TOP_N, trace_memory=True):
+        self.top_n = top_n
+        self.trace_memory = trace_memory
+        self.stages = {}     # name -> {"profile", "calls", "wall_s", "peak_bytes"}
+        self._stack = []
+
+    def _entry(self, name):
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = {"profile": cProfile.Profile(), "calls": 0, "wall_s": 0.0, "peak_bytes": 0}
+            self.stages[name] = entry
+        return entry
+
+    @contextmanager
+    def stage(self, name):
+        entry = self._entry(name)
+        outer = self._stack[-1] if self._stack else None
+        if outer is not None:
+            outer["profile"].disable()
+
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            # peak is measured relative to what was already allocated when the stage started
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        self._stack.append(entry)
+        t = time.perf_counter()
+        entry["profile"].enable()
+        try:
+            yield
+        finally:
+            entry["profile"].disable()
+            entry["wall_s"] += time.perf_counter() - t
+            entry["calls"] += 1
+            self._stack.pop()
+
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - base
+                entry["peak_bytes"] = max(entry["peak_bytes"], peak)
+                if started_tracing:
+                    tracemalloc.stop()
+                elif outer is not None:
+                    # the outer stage's peak must still cover what this stage allocated
+                    tracemalloc.reset_peak()
+
+            if outer is not None:
+                outer["profile"].enable()
+
+    # ---------- reports ----------
+    def hot_spots(self, name, sort="cumulative", limit=None):
+        """Top functions of one stage as pstats text."""
+        buf = io.StringIO()
+        stats = pstats.Stats(self.stages[name]["profile"], stream=buf)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit or self.top_n)
+        return buf.getvalue()
+
+    def summary(self):
+        return {
+            name: {
+                "calls": e["calls"],
+                "wall_s": round(e["wall_s"], 4),
+                "peak_mb": round(e["peak_bytes"] / 1e6, 3),
+            }
+            for name, e in self.stages.items()
+        }
+
+    def summary_text(self):
+        lines = [f"{'stage':<12} {'calls':>6} {'wall s':>10} {'peak MB':>10}"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<12} {s['calls']:>6} {s['wall_s']:>10.4f} {s['peak_mb']:>10.3f}")
+        for name in self.stages:
+            lines += ["", f"===== {name}: top {self.top_n} by cumulative time =====", self.hot_spots(name).strip()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_path):
+        """Write <output stem>.profile/ next to the output file; returns that folder."""
+        folder = os.path.splitext(output_path)[0] + ".profile"
+        os.makedirs(folder, exist_ok=True)
+        for name, e in self.stages.items():
+            e["profile"].dump_stats(os.path.join(folder, f"{name}.prof"))
+        with open(os.path.join(folder, "summary.json"), "w", encoding="utf-8") as fh:
+            json.dump(self.summary(), fh, indent=2)
+        with open(os.path.join(folder, "summary.txt"), "w", encoding="utf-8") as fh:
+            fh.write(self.summary_text())
+        return folder
@@ -0,0 +1,226 @@
+import os
+import sys
+import csv
+import glob
+import gzip
+import json
+import zlib
+import argparse
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+import data_extracter
+
+# Append-only archive of the decoded __NEXT_DATA__ listings payload of every scraped page.
+# One gzip JSONL file per day; every line is one page:
+#   {"scraped_at": "...", "url": "...", "page": 3, "manufacturer": 35, "model": 10476, "listings": {...}}
+# and every scrape run ends with one summary line (no listings), so readers can tell a
+# complete run from a partial / blocked one:
+#   {"scraped_at": "...", "manufacturer": 35, "model": 10476, "run": {"coverage": 1.0, "stop_reason": "", ...}}
+# Every page is appended as its own complete gzip member and fsynced before the scraper
+# checkpoints the page, so a killed run loses at most the page being written; gzip readers
+# read consecutive members transparently, and a damaged tail only ends the file early.
+#
+# Usage (from Car_ads_script/):
+#     python raw_archive.py                          # raw_archive/ -> yad2_rebuilt_data.csv
+#     python raw_archive.py --out rebuilt.csv --workers 4 --no-scrape-info
+
+ARCHIVE_DIR = "raw_archive"
+ARCHIVE_COLUMNS = ["Scraped At", "Source URL"]
+
+logger = logging.getLogger(__name__)
+
+
+def archive_path_for(archive_dir: str, when: datetime) -> str:
+    return os.path.join(archive_dir, f"yad2_raw_{when:%Y-%m-%d}.jsonl.gz")
+
+
+class RawArchive:
+    def __init__(self, archive_dir=ARCHIVE_DIR, scraped_at=None):
+        self.archive_dir = archive_dir
+        self.scraped_at = scraped_at or datetime.now(timezone.utc)
+        self.path = archive_path_for(archive_dir, self.scraped_at)
+        self.records_written = 0
+
+    def append(self, url: str, page: int, listings: dict, manufacturer=None, model=None):
+        """Append one page as a complete gzip member, on disk (fsynced) when this returns."""
+        self._write({
+            "scraped_at": self.scraped_at.isoformat(timespec="seconds"),
+            "url": url,
+            "page": page,
+            "manufacturer": manufacturer,
+            "model": model,
+            "listings": listings,
+        })
+
+    def append_run(self, manufacturer=None, model=None, **summary):
+        """Close the run with its summary (planned_pages, completed_pages, coverage, stop_reason)."""
+        self._write({
+            "scraped_at": self.scraped_at.isoformat(timespec="seconds"),
+            "manufacturer": manufacturer,
+            "model": model,
+            "run": summary,
+        })
+
+    def _write(self, rec):
+        member = gzip.compress((json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8"), compresslevel=6)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with open(self.path, "ab") as fh:
+            fh.write(member)
+            fh.flush()
+            os.fsync(fh.fileno())
+        if "listings" in rec:
+            self.records_written += 1
+
+    def close(self):
+        """Nothing is held open between pages (kept for callers using the context manager)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def archive_files(archive_dir=ARCHIVE_DIR, pattern="yad2_raw_*.jsonl.gz"):
+    return sorted(glob.glob(os.path.join(archive_dir, pattern)))
+
+
+def iter_raw_lines(paths):
+    """Yield raw JSON lines from the archive files, one at a time (constant memory)."""
+    for path in paths:
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            try:
+                for line in fh:
+                    if line.strip():
+                        yield line
+            except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+                # a run killed mid-write leaves a truncated / damaged tail: keep what was read
+                logger.warning(f"{path}: damaged gzip tail, stopped reading ({e})")
+
+
+def iter_records(paths):
+    for line in iter_raw_lines(paths):
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            # a line cut by the damaged tail of an older archive file
+            continue
+
+
+def load_payloads(path, manufacturer=None, model=None):
+    """{(url, scraped_at): listings} of one archive file (optionally one manufacturer / model only)."""
+    out = {}
+    for rec in iter_records([path]):
+        if "listings" not in rec:
+            continue
+        if manufacturer is not None and (rec.get("manufacturer"), rec.get("model")) != (manufacturer, model):
+            continue
+        out[(rec.get("url"), rec.get("scraped_at"))] = rec["listings"]
+    return out
+
+
+def run_complete(rec: dict) -> bool:
+    """True for the summary line of a run that fetched every planned page without stopping."""
+    run = rec.get("run") or {}
+    return run.get("coverage", 0) >= 1 and not run.get("stop_reason")
+
+
+def records_to_rows(rec: dict):
+    rows = data_extracter.listings_to_rows(rec.get("listings") or {})
+    for row in rows:
+        row["Scraped At"] = rec.get("scraped_at")
+        row["Source URL"] = rec.get("url")
+    return rows
+
+
+def _rows_from_lines(lines):
+    rows = []
+    for line in lines:
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        rows.extend(records_to_rows(rec))
+    return rows
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def reprocess_archive(archive_dir=ARCHIVE_DIR, out_csv="yad2_rebuilt_data.csv", paths=None,
+                      workers=None, chunk_size=64, with_scrape_info=True):
+    """
+    Rebuild a flat CSV from the raw archive with the *current* extraction code.
+
+    The archive is streamed: lines are read in chunks, extracted on a process pool and
+    written straight to the CSV, with at most 2 * workers chunks in flight at any time.
+
+    Returns:
+    --------
+    int
+        number of rows written
+    """
+    paths = paths if paths is not None else archive_files(archive_dir)
+    workers = workers or os.cpu_count() or 1
+
+    columns = None
+    written = 0
+    with open(out_csv, "w", newline="", encoding="utf-8") as fh, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = None
+        in_flight = deque()
+
+        def drain_one():
+            nonlocal writer, columns, written
+            rows = in_flight.popleft().result()
+            if not rows:
+                return
+            if writer is None:
+                columns = [c for c in rows[0].keys() if with_scrape_info or c not in ARCHIVE_COLUMNS]
+                writer = csv.DictWriter(fh, fieldnames=columns, extrasaction="ignore")
+                writer.writeheader()
+            writer.writerows(rows)
+            written += len(rows)
+
+        for chunk in _chunks(iter_raw_lines(paths), chunk_size):
+            in_flight.append(pool.submit(_rows_from_lines, chunk))
+            if len(in_flight) >= 2 * workers:
+                drain_one()
+
+        while in_flight:
+            drain_one()
+
+    return written
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rebuild a flat CSV from the raw archive with the current extraction code.")
+    ap.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    ap.add_argument("--out", default="yad2_rebuilt_data.csv")
+    ap.add_argument("--workers", type=int)
+    ap.add_argument("--chunk-size", type=int, default=64)
+    ap.add_argument("--no-scrape-info", action="store_true", help="drop the Scraped At / Source URL columns")
+    args = ap.parse_args(argv)
+    if not archive_files(args.archive_dir):
+        print(f"No archive files in: {args.archive_dir}")
+        return 1
+
+    written = reprocess_archive(args.archive_dir, args.out, workers=args.workers, chunk_size=args.chunk_size,
+                                with_scrape_info=not args.no_scrape_info)
+    print(f"✅ Saved to: {args.out} ({written} rows)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
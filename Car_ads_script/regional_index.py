@@ -0,0 +1,192 @@
+"""
+Regional price index: how much more / less the same car costs in each city and region.
+
+- city_region: City text -> region (the CBS districts: ירושלים, צפון, חיפה, מרכז, תל אביב,
+  דרום, יהודה ושומרון); unknown / empty cities go to OTHER_REGION
+- build_regional_index: per (City, Model, Production Year) and per (Region, Model, Production Year)
+  median prices relative to the national median of the same (Model, Production Year):
+  price_index = 100 * local median / national median. Model == "All" rows are the
+  mix-adjusted index over every model (listing-weighted mean of the per-model indexes),
+  so a region with more old cars does not look "cheaper"
+- summarize: the table rolled up over a year range for one model (a few hundred rows,
+  this is what the dashboard charts)
+
+The table is written to REGIONAL_INDEX_PATH so dashboards read it instead of grouping
+the listings on every render.
+
+Usage (from Car_ads_script/):
+    python regional_index.py                 # yad2_scraped_data.csv -> regional_index.csv
+"""
+import os
+import re
+import sys
+import argparse
+
+REGIONAL_INDEX_PATH = "regional_index.csv"
+MIN_PRICE = 1000
+OTHER_REGION = "אחר"
+
+REGION_CITIES = {
+    "ירושלים": ["ירושלים", "בית שמש", "מבשרת ציון", "אבו גוש", "צור הדסה", "קרית יערים"],
+    "תל אביב": ["תל אביב יפו", "תל אביב", "רמת גן", "גבעתיים", "חולון", "בת ים", "בני ברק", "הרצליה",
+                "רמת השרון", "אור יהודה", "קרית אונו", "גבעת שמואל", "אזור"],
+    "מרכז": ["ראשון לציון", "פתח תקווה", "נתניה", "רחובות", "כפר סבא", "רעננה", "הוד השרון",
+             "מודיעין מכבים רעות", "לוד", "רמלה", "נס ציונה", "יבנה", "ראש העין", "יהוד מונוסון",
+             "אלעד", "שוהם", "באר יעקב", "גדרה", "כפר יונה", "טייבה", "טירה", "קלנסווה", "אבן יהודה",
+             "גני תקווה", "קדימה צורן", "גן יבנה", "מזכרת בתיה", "כפר קאסם", "תל מונד"],
+    "חיפה": ["חיפה", "קרית אתא", "קרית ביאליק", "קרית מוצקין", "קרית ים", "נשר", "טירת כרמל", "חדרה",
+             "אור עקיבא", "זכרון יעקב", "פרדס חנה כרכור", "אום אל פחם", "באקה אל גרביה", "דאלית אל כרמל",
+             "עתלית", "בנימינה גבעת עדה"],
+    "צפון": ["נצרת", "נוף הגליל", "עפולה", "טבריה", "צפת", "כרמיאל", "נהריה", "עכו", "בית שאן",
+             "מגדל העמק", "יקנעם עילית", "קרית שמונה", "מעלות תרשיחא", "שפרעם", "סח'נין", "טמרה",
+             "עראבה", "קצרין", "ראש פינה", "קרית טבעון", "רמת ישי"],
+    "דרום": ["באר שבע", "אשדוד", "אשקלון", "אילת", "דימונה", "נתיבות", "אופקים", "שדרות", "קרית גת",
+             "קרית מלאכי", "ערד", "רהט", "ירוחם", "מצפה רמון", "עומר", "להבים", "מיתר"],
+    "יהודה ושומרון": ["מעלה אדומים", "ביתר עילית", "מודיעין עילית", "אריאל", "אפרת", "קרני שומרון",
+                      "גבעת זאב", "אלפי מנשה", "קדומים", "עמנואל", "אורנית", "כוכב יעקב"],
+}
+
+# (lat, lon) of each region, for the bubble map
+REGION_CENTROIDS = {
+    "ירושלים": (31.77, 35.21),
+    "תל אביב": (32.08, 34.80),
+    "מרכז": (31.98, 34.90),
+    "חיפה": (32.62, 35.00),
+    "צפון": (32.92, 35.38),
+    "דרום": (31.00, 34.80),
+    "יהודה ושומרון": (31.95, 35.25),
+}
+
+TABLE_COLUMNS = ["Level", "Area", "Region", "Model", "Production Year", "listings",
+                 "median_price", "national_median", "price_index"]
+
+
+def normalize_city(name):
+    """'תל אביב - יפו ' -> 'תל אביב יפו' (dashes, quotes and repeated spaces dropped)."""
+    text = re.sub(r"[-–־\"״]", " ", str(name or ""))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+_CITY_TO_REGION = {normalize_city(c): region for region, cities in REGION_CITIES.items() for c in cities}
+
+
+def city_region(cities):
+    """Series of City text -> Series of regions (each distinct city is looked up once)."""
+    uniques = cities.fillna("").astype(str).unique()
+    lookup = {c: _CITY_TO_REGION.get(normalize_city(c), OTHER_REGION) for c in uniques}
+    return cities.fillna("").astype(str).map(lookup)
+
+
+def _clean(df, min_price=MIN_PRICE):
+    import pandas as pd
+
+    out = df[[c for c in ["City", "Model", "Production Year", "Price (₪)"] if c in df.columns]].copy()
+    out["Price (₪)"] = pd.to_numeric(out["Price (₪)"], errors="coerce")
+    out["Production Year"] = pd.to_numeric(out["Production Year"], errors="coerce")
+    out = out.dropna(subset=["Production Year", "Price (₪)"])
+    out = out[out["Price (₪)"] > min_price]
+    out["Production Year"] = out["Production Year"].round().astype(int)
+    out["Model"] = out["Model"].fillna("").astype(str) if "Model" in out.columns else ""
+    out["City"] = out["City"].fillna("").astype(str).map(normalize_city) if "City" in out.columns else ""
+    out["Region"] = city_region(out["City"])
+    return out
+
+
+def _level(df, national, level, area_col):
+    """Per (area, Model, Year) cells + the mix-adjusted Model == "All" rows of one level."""
+    import pandas as pd
+
+    keys = ["Model", "Production Year"]
+    group = ["Region"] if area_col == "Region" else [area_col, "Region"]
+    cells = df.groupby(group + keys)["Price (₪)"].agg(listings="size", median_price="median").reset_index()
+    cells = cells.merge(national, on=keys, how="left")
+    cells["price_index"] = 100 * cells["median_price"] / cells["national_median"]
+    cells["Area"] = cells[area_col]
+
+    # all models: weighted mean of the per-model indexes (same cars compared), exact medians
+    area_keys = ["Area", "Region", "Production Year"]
+    w = cells.assign(_w=cells["price_index"] * cells["listings"])
+    all_models = w.groupby(area_keys).agg(listings=("listings", "sum"), _w=("_w", "sum")).reset_index()
+    all_models["price_index"] = all_models["_w"] / all_models["listings"]
+    medians = df.assign(Area=df[area_col]).groupby(area_keys)["Price (₪)"].median().rename("median_price")
+    all_models = all_models.merge(medians.reset_index(), on=area_keys, how="left")
+    year_median = df.groupby("Production Year")["Price (₪)"].median().rename("national_median")
+    all_models = all_models.merge(year_median.reset_index(), on="Production Year", how="left")
+    all_models["Model"] = "All"
+
+    out = pd.concat([cells, all_models], ignore_index=True)
+    out["Level"] = level
+    return out[TABLE_COLUMNS]
+
+
+def build_regional_index(df, min_price=MIN_PRICE):
+    """
+    Listings -> compact regional price-index table.
+
+    Returns:
+    --------
+    pd.DataFrame
+        Level ("region" / "city"), Area, Region, Model ("All" = every model), Production Year,
+        listings, median_price, national_median, price_index (100 = national median)
+    """
+    import pandas as pd
+
+    df = _clean(df, min_price)
+    if df.empty:
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+    national = df.groupby(["Model", "Production Year"])["Price (₪)"].median().rename("national_median").reset_index()
+
+    table = pd.concat([_level(df, national, "region", "Region"), _level(df, national, "city", "City")],
+                      ignore_index=True)
+    table = table[table["Area"] != ""]
+    table = table.sort_values(["Level", "Model", "Area", "Production Year"], kind="stable")
+    return table.round({"median_price": 0, "national_median": 0, "price_index": 2}).reset_index(drop=True)
+
+
+def summarize(table, level="region", model="All", year_range=None, min_listings=1):
+    """
+    One row per area for one model over a year range (listing-weighted mean index).
+
+    Returns:
+    --------
+    pd.DataFrame
+        Area, Region, listings, price_index, median_price (listing-weighted); regions also lat / lon
+    """
+    t = table[(table["Level"] == level) & (table["Model"] == model)]
+    if year_range is not None:
+        t = t[t["Production Year"].between(*year_range)]
+    t = t.assign(_wi=t["price_index"] * t["listings"], _wm=t["median_price"] * t["listings"])
+    out = t.groupby(["Area", "Region"]).agg(listings=("listings", "sum"), _wi=("_wi", "sum"),
+                                            _wm=("_wm", "sum")).reset_index()
+    out["price_index"] = (out["_wi"] / out["listings"]).round(2)
+    out["median_price"] = (out["_wm"] / out["listings"]).round(0)
+    out = out[out["listings"] >= min_listings].drop(columns=["_wi", "_wm"])
+    if level == "region":
+        out["lat"] = out["Area"].map(lambda r: REGION_CENTROIDS.get(r, (None, None))[0])
+        out["lon"] = out["Area"].map(lambda r: REGION_CENTROIDS.get(r, (None, None))[1])
+    return out.sort_values("price_index", ascending=False).reset_index(drop=True)
+
+
+def build_regional_index_table(csv_path="yad2_scraped_data.csv", out_csv=REGIONAL_INDEX_PATH):
+    """Listings CSV -> regional_index.csv."""
+    import pandas as pd
+
+    table = build_regional_index(pd.read_csv(csv_path))
+    table.to_csv(out_csv, index=False, encoding="utf-8")
+    return out_csv
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", default="yad2_scraped_data.csv")
+    ap.add_argument("--out", default=REGIONAL_INDEX_PATH)
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.csv):
+        print(f"No such file: {args.csv}")
+        return 1
+    print("✅ Saved to:", build_regional_index_table(args.csv, args.out))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
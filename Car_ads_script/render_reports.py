@@ -0,0 +1,180 @@
+"""
+Headless batch rendering of the matplotlib reports (plot_*.py).
+
+Renders every plot for every configured model and year filter to PNG/SVG files,
+without opening windows. The CSV is loaded once and handed to each worker
+process once (pool initializer), figures are spread over the pool.
+
+Usage (from Car_ads_script/):
+    python render_reports.py
+    python render_reports.py --models all פורסטר --years 2017-2026 2020-2026 --formats png svg
+    python render_reports.py --config nightly_reports.json
+
+Config file (JSON) keys mirror the CLI: csv, out_dir, models, years, formats, workers.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from yad2_data import load_yad2_data
+
+# name -> (module, function)
+PLOTS = {
+    "price_over_year": ("plot_price_over_year", "plot_price_over_year"),
+    "price_drop": ("plot_price_drop", "plot_price_drop"),
+    "sweet_point": ("plot_sweet_point", "plot_sweet_point"),
+    "price_distribution": ("plot_price_Distribution_by_Production_Year", "plot_price_distribution_by_production_year"),
+}
+
+DEFAULT_CONFIG = {
+    "csv": "yad2_scraped_data.csv",
+    "out_dir": "reports",
+    "models": ["all"],
+    "years": ["2017-2026", "2020-2026"],
+    "formats": ["png"],
+    "workers": None,
+}
+
+# the plot functions' default min_price: rows at or below it never reach a figure
+MIN_PRICE = 1000
+
+_worker_df = None
+
+
+def _init_worker(df):
+    # non-interactive backend before pyplot is imported anywhere in the worker
+    import matplotlib
+    matplotlib.use("Agg")
+
+    global _worker_df
+    _worker_df = df
+
+
+def parse_years(spec):
+    a, b = str(spec).split("-", 1)
+    return int(a.strip()), int(b.strip())
+
+
+def _slug(text):
+    return re.sub(r"[^\w\-]+", "_", str(text)).strip("_") or "all"
+
+
+def _render_one(job):
+    import importlib
+    import matplotlib.pyplot as plt
+
+    plot_name, model, years, formats, out_dir = job
+    module_name, func_name = PLOTS[plot_name]
+    plot_func = getattr(importlib.import_module(module_name), func_name)
+
+    y_from, y_to = parse_years(years)
+    df = _worker_df
+    if model != "all":
+        df = df[df["Model"] == model]
+    df = df[df["Production Year"] <= y_to]
+    if not ((df["Production Year"] >= y_from) & (df["Price (₪)"] > MIN_PRICE)).any():
+        # nothing to draw for this model/year window: skipped, not an error
+        return plot_name, model, years, [], None
+
+    target_dir = os.path.join(out_dir, _slug(model), _slug(years))
+    os.makedirs(target_dir, exist_ok=True)
+
+    kwargs = {"min_year": y_from, "show": False}
+    if plot_name == "sweet_point":
+        kwargs["verbose"] = False
+
+    try:
+        fig = plot_func(df, **kwargs)
+    except Exception as e:
+        # e.g. no listings for this model/year window
+        return plot_name, model, years, [], f"{type(e).__name__}: {e}"
+
+    paths = []
+    for fmt in formats:
+        path = os.path.join(target_dir, f"{plot_name}.{fmt}")
+        fig.savefig(path, format=fmt, bbox_inches="tight")
+        paths.append(path)
+    plt.close(fig)
+    return plot_name, model, years, paths, None
+
+
+def render_reports(csv="yad2_scraped_data.csv", out_dir="reports", models=("all",),
+                   years=("2017-2026", "2020-2026"), formats=("png",), plots=None, workers=None,
+                   df=None):
+    """
+    Render every plot x model x year filter to files.
+
+    Returns:
+    --------
+    list of (plot, model, years, [paths], error_or_None)
+        [] and None = no listings in that model/year selection, the figure was skipped
+    """
+    import pandas as pd
+
+    if df is None:
+        df = load_yad2_data(csv)
+    df = df.copy()
+    for col in ["Production Year", "Price (₪)"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    if "Model" not in df.columns:
+        df["Model"] = ""
+    df["Model"] = df["Model"].fillna("").astype(str)
+    # the plot functions only need these columns - keep the payload sent to the workers small
+    df = df[["Model", "Production Year", "Price (₪)"]]
+
+    jobs = [
+        (plot_name, model, year_spec, list(formats), out_dir)
+        for plot_name in (plots or PLOTS)
+        for model in models
+        for year_spec in years
+    ]
+
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(df,)) as pool:
+        return list(pool.map(_render_one, jobs))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--config", help="JSON config file")
+    ap.add_argument("--csv")
+    ap.add_argument("--out-dir")
+    ap.add_argument("--models", nargs="+")
+    ap.add_argument("--years", nargs="+", help="year windows, e.g. 2017-2026")
+    ap.add_argument("--formats", nargs="+", choices=["png", "svg", "pdf"])
+    ap.add_argument("--plots", nargs="+", choices=sorted(PLOTS))
+    ap.add_argument("--workers", type=int)
+    args = ap.parse_args(argv)
+
+    cfg = dict(DEFAULT_CONFIG)
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as fh:
+            cfg.update(json.load(fh))
+    for key in ("csv", "out_dir", "models", "years", "formats", "plots", "workers"):
+        val = getattr(args, key)
+        if val is not None:
+            cfg[key] = val
+
+    t0 = time.perf_counter()
+    results = render_reports(
+        csv=cfg["csv"], out_dir=cfg["out_dir"], models=cfg["models"], years=cfg["years"],
+        formats=cfg["formats"], plots=cfg.get("plots"), workers=cfg.get("workers"),
+    )
+    elapsed = time.perf_counter() - t0
+
+    n_files = sum(len(r[3]) for r in results)
+    for plot_name, model, years, paths, err in results:
+        if err:
+            print(f"⚠️ {plot_name} / {model} / {years}: {err}")
+        elif not paths:
+            print(f"⏭️ {plot_name} / {model} / {years}: no listings in this selection - skipped")
+    print(f"✅ {n_files} files from {len(results)} figures in {elapsed:.1f}s -> {cfg['out_dir']}")
+    return 0 if all(r[4] is None for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
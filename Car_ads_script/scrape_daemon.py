@@ -0,0 +1,521 @@
+"""
+Long-running scrape daemon: one warm requests.Session (connection pool, cookies) and
+per-job scraper state kept across runs; every job is re-scraped on a schedule and each
+run's listings are stored as a time-series observation.
+
+Layout under ROOT (all Parquet, or gzip CSV when pyarrow is not installed):
+
+    timeseries/
+      raw/date=2025-06-01/yad2_35_10476_T081502.parquet   one file per scrape run (every listing + the
+                                                          run's Coverage / Stop Reason)
+      daily/daily_2025-06.parquet                         per-day rollups, one file per month
+      weekly/weekly_2025.parquet                          per-week rollups, one file per year
+      daemon_state.json                                   schedule / last-run state per job
+      page_cache/yad2_35_10476.json.gz                    conditional-request validators (page_cache.py)
+
+Rollups are per (Model, SubModel, Production Year) and only count complete runs
+(Coverage 1.0): a run that was blocked or lost pages stays in raw/ but would deflate
+the listing counts of its day. Compaction runs after every round:
+raw days older than raw_retention_days are folded into the daily files and deleted;
+complete weeks older than daily_retention_days are folded into the weekly files and
+dropped from the daily ones. load_daily() / load_weekly() read the whole history at
+one resolution (recent raw days are rolled up on the fly).
+
+Usage (from Car_ads_script/):
+    python scrape_daemon.py 35:10476 35:10477 --interval-hours 6
+    python scrape_daemon.py 35 --once            # every model of manufacturer 35 (catalog.py)
+    python scrape_daemon.py --compact-only
+"""
+import os
+import sys
+import json
+import time
+import glob
+import random
+import shutil
+import argparse
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+ROOT = "timeseries"
+INTERVAL_HOURS = 6
+JITTER_MINUTES = 20
+BLOCKED_BACKOFF_HOURS = 12
+RAW_RETENTION_DAYS = 14
+DAILY_RETENTION_DAYS = 120
+MIN_PRICE = 1000
+
+KEYS = ["Model", "SubModel", "Production Year"]
+NUMERIC_COLUMNS = ["Ad Number", "Price (₪)", "Production Year", "KM", "Hand"]
+
+
+# ---------- storage ----------
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _write_frame(df, path_stem):
+    """Write df to path_stem + .parquet (or .csv.gz without pyarrow), atomically. Returns the path."""
+    path = path_stem + (".parquet" if _parquet_available() else ".csv.gz")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    if path.endswith(".parquet"):
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_csv(tmp, index=False, encoding="utf-8", compression="gzip")
+    os.replace(tmp, path)
+    return path
+
+
+def _read_frame(path):
+    import pandas as pd
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, compression="gzip")
+
+
+def _frames_in(pattern):
+    return sorted(glob.glob(pattern + ".parquet") + glob.glob(pattern + ".csv.gz"))
+
+
+def _read_all(paths):
+    import pandas as pd
+    frames = [_read_frame(p) for p in paths]
+    frames = [f for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _stem(path):
+    for ext in (".parquet", ".csv.gz"):
+        if path.endswith(ext):
+            return path[:-len(ext)]
+    return path
+
+
+def raw_dir_for(root, day):
+    return os.path.join(root, "raw", f"date={day:%Y-%m-%d}")
+
+
+def raw_days(root):
+    """{date: partition dir} of the raw observations on disk."""
+    out = {}
+    for path in glob.glob(os.path.join(root, "raw", "date=*")):
+        try:
+            out[date.fromisoformat(os.path.basename(path)[len("date="):])] = path
+        except ValueError:
+            continue
+    return dict(sorted(out.items()))
+
+
+def write_observation(df, root, manufacturer, model, scraped_at=None, coverage=1.0, stop_reason=""):
+    """
+    One scrape run's listings -> raw/date=<day>/yad2_<man>_<model>_T<time>.<ext>.
+
+    coverage / stop_reason (VehicleScraper.coverage / .stop_reason) are stored on every row,
+    so the rollups can tell a complete run from one that stopped early.
+    """
+    import pandas as pd
+
+    scraped_at = scraped_at or datetime.now(timezone.utc)
+    obs = df.copy()
+    for col in NUMERIC_COLUMNS:
+        if col in obs.columns:
+            obs[col] = pd.to_numeric(obs[col], errors="coerce")
+    for col in obs.columns.difference(NUMERIC_COLUMNS):
+        obs[col] = obs[col].where(obs[col].notna(), None).astype("string")
+    obs["Scraped At"] = scraped_at.isoformat(timespec="seconds")
+    obs["Coverage"] = float(coverage)
+    obs["Stop Reason"] = pd.Series(stop_reason or "", index=obs.index, dtype="string")
+    obs["Manufacturer ID"] = int(manufacturer)
+    obs["Model ID"] = int(model)
+
+    stem = os.path.join(raw_dir_for(root, scraped_at.date()),
+                        f"yad2_{manufacturer}_{model}_T{scraped_at:%H%M%S}")
+    return _write_frame(obs, stem)
+
+
+# ---------- rollups ----------
+def daily_rollup(raw):
+    """
+    Raw observations -> one row per (Date, Model, SubModel, Production Year).
+
+    Rows of incomplete runs (Coverage < 1) are skipped; files written before the column
+    existed count as complete.
+
+    Returns:
+    --------
+    pd.DataFrame
+        Date, Model, SubModel, Production Year, listings (distinct ads), observations,
+        snapshots (scrape runs), avg_price, median_price, min_price, max_price, avg_km
+    """
+    import pandas as pd
+
+    if raw.empty:
+        return pd.DataFrame(columns=["Date"] + KEYS + ["listings", "observations", "snapshots", "avg_price",
+                                                      "median_price", "min_price", "max_price", "avg_km"])
+    df = raw.copy()
+    if "Coverage" in df.columns:
+        df = df[pd.to_numeric(df["Coverage"], errors="coerce").fillna(1.0) >= 1.0]
+    df["Price (₪)"] = pd.to_numeric(df["Price (₪)"], errors="coerce")
+    df["Production Year"] = pd.to_numeric(df["Production Year"], errors="coerce")
+    df = df.dropna(subset=["Production Year", "Price (₪)"])
+    df = df[df["Price (₪)"] > MIN_PRICE]
+    df["Production Year"] = df["Production Year"].round().astype(int)
+    df["Date"] = pd.to_datetime(df["Scraped At"], utc=True).dt.strftime("%Y-%m-%d")
+    for col in ["Model", "SubModel"]:
+        df[col] = df[col].fillna("").astype(str)
+    if "KM" not in df.columns:
+        df["KM"] = float("nan")
+    df["KM"] = pd.to_numeric(df["KM"], errors="coerce")
+
+    out = df.groupby(["Date"] + KEYS).agg(
+        listings=("Ad Number", "nunique"),
+        observations=("Price (₪)", "size"),
+        snapshots=("Scraped At", "nunique"),
+        avg_price=("Price (₪)", "mean"),
+        median_price=("Price (₪)", "median"),
+        min_price=("Price (₪)", "min"),
+        max_price=("Price (₪)", "max"),
+        avg_km=("KM", "mean"),
+    ).reset_index()
+    return out
+
+
+def weekly_rollup(daily):
+    """
+    Daily rollups -> one row per (Week, Model, SubModel, Production Year); Week is the Monday.
+
+    Medians cannot be merged exactly: median_price is the observation-weighted mean of the
+    daily medians. listings are per day (ads seen over the week are not recoverable).
+    """
+    import numpy as np
+    import pandas as pd
+
+    if daily.empty:
+        return pd.DataFrame(columns=["Week"] + KEYS + ["days", "avg_daily_listings", "max_daily_listings",
+                                                      "observations", "avg_price", "median_price",
+                                                      "min_price", "max_price", "avg_km"])
+    df = daily.copy()
+    day = pd.to_datetime(df["Date"])
+    df["Week"] = (day - pd.to_timedelta(day.dt.weekday, unit="D")).dt.strftime("%Y-%m-%d")
+    df["_w_avg"] = df["avg_price"] * df["observations"]
+    df["_w_median"] = df["median_price"] * df["observations"]
+    km_w = df["observations"].where(df["avg_km"].notna(), 0)
+    df["_w_km"] = df["avg_km"].fillna(0) * km_w
+    df["_km_n"] = km_w
+
+    g = df.groupby(["Week"] + KEYS)
+    out = g.agg(
+        days=("Date", "nunique"),
+        avg_daily_listings=("listings", "mean"),
+        max_daily_listings=("listings", "max"),
+        observations=("observations", "sum"),
+        min_price=("min_price", "min"),
+        max_price=("max_price", "max"),
+        _w_avg=("_w_avg", "sum"),
+        _w_median=("_w_median", "sum"),
+        _w_km=("_w_km", "sum"),
+        _km_n=("_km_n", "sum"),
+    ).reset_index()
+    out["avg_price"] = out["_w_avg"] / out["observations"]
+    out["median_price"] = out["_w_median"] / out["observations"]
+    out["avg_km"] = out["_w_km"] / out["_km_n"].replace(0, np.nan)
+    return out[["Week"] + KEYS + ["days", "avg_daily_listings", "max_daily_listings", "observations",
+                                  "avg_price", "median_price", "min_price", "max_price", "avg_km"]]
+
+
+def _merge_into(path_stem, new_rows, period_col):
+    """Replace the periods of new_rows in the rollup file path_stem (idempotent re-compaction)."""
+    import pandas as pd
+
+    existing = _read_all(_frames_in(path_stem))
+    if not existing.empty:
+        existing = existing[~existing[period_col].astype(str).isin(set(new_rows[period_col]))]
+        new_rows = pd.concat([existing, new_rows], ignore_index=True)
+    old_paths = _frames_in(path_stem)
+    path = _write_frame(new_rows.sort_values([period_col] + KEYS, kind="stable"), path_stem)
+    for p in old_paths:
+        if p != path:
+            os.remove(p)
+    return path
+
+
+def compact(root=ROOT, raw_retention_days=RAW_RETENTION_DAYS, daily_retention_days=DAILY_RETENTION_DAYS, today=None):
+    """
+    Fold old raw partitions into the daily files and old complete weeks into the weekly files.
+
+    Returns:
+    --------
+    dict
+        raw_days_compacted, weeks_compacted
+    """
+    import pandas as pd
+
+    today = today or datetime.now(timezone.utc).date()
+    stats = {"raw_days_compacted": 0, "weeks_compacted": 0}
+
+    # raw -> daily (the raw partition is deleted only after its rollup is on disk)
+    raw_cutoff = today - timedelta(days=raw_retention_days)
+    for day, path in raw_days(root).items():
+        if day >= raw_cutoff:
+            continue
+        rolled = daily_rollup(_read_all(_frames_in(os.path.join(path, "*"))))
+        if not rolled.empty:
+            _merge_into(os.path.join(root, "daily", f"daily_{day:%Y-%m}"), rolled, "Date")
+        shutil.rmtree(path)
+        stats["raw_days_compacted"] += 1
+
+    # daily -> weekly: only weeks that ended before the cutoff
+    week_cutoff = today - timedelta(days=daily_retention_days)
+    week_cutoff -= timedelta(days=week_cutoff.weekday())          # Monday of the cutoff week
+    daily_paths = _frames_in(os.path.join(root, "daily", "daily_*"))
+    daily = _read_all(daily_paths)
+    if daily.empty:
+        return stats
+    old = pd.to_datetime(daily["Date"]).dt.date < week_cutoff
+    if not old.any():
+        return stats
+
+    weekly = weekly_rollup(daily[old])
+    weekly_year = weekly["Week"].str[:4]
+    for year in sorted(weekly_year.unique()):
+        _merge_into(os.path.join(root, "weekly", f"weekly_{year}"), weekly[weekly_year == year], "Week")
+    stats["weeks_compacted"] = int(weekly["Week"].nunique())
+
+    keep = daily[~old]
+    for path in daily_paths:
+        month = os.path.basename(_stem(path))[len("daily_"):]
+        rest = keep[keep["Date"].astype(str).str[:7] == month]
+        if rest.empty:
+            os.remove(path)
+        else:
+            _write_frame(rest, _stem(path))
+    return stats
+
+
+def load_daily(root=ROOT):
+    """Daily rollups of the whole daily range: compacted files + recent raw days rolled up on the fly."""
+    import pandas as pd
+
+    compacted = _read_all(_frames_in(os.path.join(root, "daily", "daily_*")))
+    recent = daily_rollup(_read_all([p for d in raw_days(root).values() for p in _frames_in(os.path.join(d, "*"))]))
+    if not compacted.empty:
+        recent = recent[~recent["Date"].isin(set(compacted["Date"].astype(str)))]
+    frames = [f for f in (compacted, recent) if not f.empty]
+    out = pd.concat(frames, ignore_index=True) if frames else recent
+    return out.sort_values(["Date"] + KEYS, kind="stable").reset_index(drop=True)
+
+
+def load_weekly(root=ROOT):
+    """Weekly rollups of the whole history (compacted weeks + the daily range rolled up)."""
+    import pandas as pd
+
+    compacted = _read_all(_frames_in(os.path.join(root, "weekly", "weekly_*")))
+    recent = weekly_rollup(load_daily(root))
+    if not compacted.empty and not recent.empty:
+        # a week split by the cutoff: the compacted part wins, like _merge_into
+        recent = recent[~recent["Week"].isin(set(compacted["Week"].astype(str)))]
+    frames = [f for f in (compacted, recent) if not f.empty]
+    out = pd.concat(frames, ignore_index=True) if frames else recent
+    return out.sort_values(["Week"] + KEYS, kind="stable").reset_index(drop=True)
+
+
+# ---------- daemon ----------
+def parse_job(spec):
+    """'35:10476' -> (35, 10476); '35' -> (35, None) = every model of the manufacturer."""
+    man, _, model = str(spec).partition(":")
+    return man.strip(), (int(model) if model.strip() else None)
+
+
+class ScrapeDaemon:
+    def __init__(self, jobs, root=ROOT, interval_hours=INTERVAL_HOURS, jitter_minutes=JITTER_MINUTES,
+                 blocked_backoff_hours=BLOCKED_BACKOFF_HOURS, raw_retention_days=RAW_RETENTION_DAYS,
+                 daily_retention_days=DAILY_RETENTION_DAYS, catalog=None, session=None, **scraper_kwargs):
+        """
+        Parameters:
+        -----------
+        jobs : list
+            (manufacturer, model) pairs; model None = every model of the manufacturer (from the catalog)
+        scraper_kwargs :
+            Passed to every data_extracter.VehicleScraper (max_pages, workers, min_delay, ...)
+        """
+        import requests
+
+        self.jobs = [parse_job(j) if isinstance(j, str) else tuple(j) for j in jobs]
+        self.root = root
+        self.interval_s = interval_hours * 3600
+        self.jitter_s = jitter_minutes * 60
+        self.blocked_backoff_s = blocked_backoff_hours * 3600
+        self.raw_retention_days = raw_retention_days
+        self.daily_retention_days = daily_retention_days
+        self.scraper_kwargs = scraper_kwargs
+
+        # warm across runs: one connection pool / cookie jar for every request the daemon makes
+        self.session = session or requests.Session()
+        self._catalog = catalog
+        self._stop = threading.Event()
+
+        self.state_path = os.path.join(root, "daemon_state.json")
+        self.state = {}   # "man:model" -> next_due, last_run, last_listings, total_pages, stop_reason, last_error
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as fh:
+                self.state = json.load(fh)
+
+    @property
+    def catalog(self):
+        if self._catalog is None:
+            from catalog import Catalog
+            self._catalog = Catalog(session=self.session)
+        return self._catalog
+
+    def save_state(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.state, fh, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.state_path)
+
+    def expand_jobs(self):
+        """(manufacturer id, model id) of every job; whole-manufacturer jobs go through the cached catalog."""
+        out = []
+        for man, model in self.jobs:
+            if model is not None:
+                out.append((int(man), int(model)))
+            else:
+                mid = self.catalog.resolve(man)
+                out.extend((mid, m) for m in sorted(self.catalog.models(mid)))
+        return list(dict.fromkeys(out))
+
+    def _next_due(self, delay_s):
+        return time.time() + delay_s + random.uniform(-self.jitter_s, self.jitter_s)
+
+    def scrape_job(self, manufacturer, model):
+        """One scheduled scrape -> one raw observation file. Returns (path or None, blocked)."""
+        from data_extracter import VehicleScraper
+        from page_cache import cache_path_for
+
+        key = f"{manufacturer}:{model}"
+        job = self.state.setdefault(key, {})
+        # validators + rows of the previous run: unchanged pages come back as 304 / are not re-extracted
+        kwargs = {"page_cache_path": cache_path_for(os.path.join(self.root, "page_cache"), manufacturer, model),
+                  **self.scraper_kwargs}
+        scraper = VehicleScraper(manufacturer=manufacturer, model=model, session=self.session, **kwargs)
+        scraped_at = datetime.now(timezone.utc)
+        df = scraper.scrape_pages()
+        blocked = scraper._blocked.is_set()
+
+        path = None
+        if df is not None and not df.empty:
+            path = write_observation(df, self.root, manufacturer, model, scraped_at,
+                                     coverage=scraper.coverage, stop_reason=scraper.stop_reason)
+        job.update(
+            last_run=scraped_at.isoformat(timespec="seconds"),
+            last_listings=0 if df is None else int(len(df)),
+            total_pages=scraper.total_pages,
+            coverage=round(scraper.coverage, 4),
+            stop_reason=scraper.stop_reason,
+            next_due=self._next_due(self.blocked_backoff_s if blocked else self.interval_s),
+        )
+        job.pop("last_error", None)
+        self.save_state()
+        return path, blocked
+
+    def run_once(self, force=False):
+        """Scrape every due job (all of them with force=True), then compact. Returns the written paths."""
+        written = []
+        now = time.time()
+        jobs = self.expand_jobs()
+        for manufacturer, model in jobs:
+            if self._stop.is_set():
+                break
+            job = self.state.get(f"{manufacturer}:{model}", {})
+            if not force and job.get("next_due", 0) > now:
+                continue
+            try:
+                path, blocked = self.scrape_job(manufacturer, model)
+            except Exception as e:
+                # one broken job (network error, bad response, full disk) must not stop the others
+                print(f"❌ {manufacturer}:{model} failed: {type(e).__name__}: {e} - "
+                      f"retrying in {self.blocked_backoff_s / 3600:g}h")
+                self.state.setdefault(f"{manufacturer}:{model}", {}).update(
+                    last_error=f"{type(e).__name__}: {e}",
+                    next_due=self._next_due(self.blocked_backoff_s),
+                )
+                self.save_state()
+                continue
+            if path:
+                written.append(path)
+                print(f"✅ {manufacturer}:{model} -> {path}")
+            if blocked:
+                # the block is per IP, not per model: push every remaining due job back too
+                print(f"⛔ {manufacturer}:{model} blocked - pausing for {self.blocked_backoff_s / 3600:g}h")
+                for other in jobs:
+                    other = self.state.setdefault(f"{other[0]}:{other[1]}", {})
+                    other["next_due"] = max(other.get("next_due", 0), self._next_due(self.blocked_backoff_s))
+                self.save_state()
+                break
+
+        stats = compact(self.root, self.raw_retention_days, self.daily_retention_days)
+        if any(stats.values()):
+            print(f"🗜️ compacted {stats['raw_days_compacted']} raw days, {stats['weeks_compacted']} weeks")
+        return written
+
+    def seconds_until_due(self):
+        dues = [self.state.get(f"{m}:{mo}", {}).get("next_due", 0) for m, mo in self.expand_jobs()]
+        return max(0.0, min(dues, default=self.interval_s) - time.time())
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                wait = self.seconds_until_due()
+            except Exception as e:
+                # e.g. the catalog or the compaction failed: keep the daemon alive and try again later
+                print(f"❌ scrape round failed: {type(e).__name__}: {e}")
+                wait = self.blocked_backoff_s
+            print(f"💤 next scrape in {wait / 60:.0f} min")
+            self._stop.wait(wait)
+
+    def stop(self):
+        self._stop.set()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("jobs", nargs="*", help="manufacturer:model, or manufacturer (id or name) for all its models")
+    ap.add_argument("--root", default=ROOT)
+    ap.add_argument("--interval-hours", type=float, default=INTERVAL_HOURS)
+    ap.add_argument("--raw-retention-days", type=int, default=RAW_RETENTION_DAYS)
+    ap.add_argument("--daily-retention-days", type=int, default=DAILY_RETENTION_DAYS)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--max-pages", type=int)
+    ap.add_argument("--once", action="store_true", help="scrape every job now, compact and exit")
+    ap.add_argument("--compact-only", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.compact_only:
+        print(compact(args.root, args.raw_retention_days, args.daily_retention_days))
+        return 0
+    if not args.jobs:
+        ap.error("at least one job is needed (e.g. 35:10476)")
+
+    daemon = ScrapeDaemon(args.jobs, root=args.root, interval_hours=args.interval_hours,
+                          raw_retention_days=args.raw_retention_days,
+                          daily_retention_days=args.daily_retention_days,
+                          workers=args.workers, max_pages=args.max_pages)
+    if args.once:
+        daemon.run_once(force=True)
+        return 0
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
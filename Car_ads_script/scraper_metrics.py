@@ -0,0 +1,168 @@
+"""
+Hot-path instrumentation for VehicleScraper.
+
+Per page: time spent sleeping (politeness delay), on the network, in BeautifulSoup,
+in JSON decoding and in row building; bytes downloaded, bytes saved by revalidation
+(304 answers) and by compressed transfer (separately), rows extracted, attempts, HTTP status codes and whether the rows
+came from the page cache. Exported as
+- a structured JSON run report, and
+- a Prometheus text-format file (for node_exporter's textfile collector).
+"""
+import os
+import json
+import time
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+STAGES = ["sleep", "network", "soup", "json", "rows"]
+
+
+class ScrapeMetrics:
+    def __init__(self, labels=None):
+        self.labels = dict(labels or {})
+        self.started_at = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self.duration_s = None
+        self.pages = {}                 # page -> record
+        self.status_codes = Counter()   # "200" / "403" / "timeout" ...
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def _page(self, page):
+        rec = self.pages.get(page)
+        if rec is None:
+            rec = {"page": page, "attempts": 0, "bytes": 0, "bytes_saved": 0, "compression_saved": 0, "rows": 0, "statuses": [],
+                   "cached": None, "error": None}
+            rec.update({f"{stage}_s": 0.0 for stage in STAGES})
+            self.pages[page] = rec
+        return rec
+
+    def record_download(self, page, sleep_s, network_s, status=None, nbytes=0, error=None, saved_bytes=0,
+                        compression_saved=0):
+        """saved_bytes: body not sent (304); compression_saved: decoded size - size on the wire."""
+        with self._lock:
+            rec = self._page(page)
+            rec["attempts"] += 1
+            rec["sleep_s"] += sleep_s
+            rec["network_s"] += network_s
+            rec["bytes"] += nbytes
+            rec["bytes_saved"] += saved_bytes
+            rec["compression_saved"] += compression_saved
+            code = str(status) if status is not None else (error or "error")
+            rec["statuses"].append(code)
+            self.status_codes[code] += 1
+            if error:
+                rec["error"] = error
+
+    def record_parse(self, page, timings, rows=0, error=None):
+        with self._lock:
+            rec = self._page(page)
+            for stage, seconds in (timings or {}).items():
+                rec[f"{stage}_s"] += seconds
+            rec["rows"] = rows
+            rec["error"] = error
+
+    def record_cached(self, page, reason):
+        """The page's rows came from the page cache: "not_modified" (304) or "unchanged" (same payload)."""
+        with self._lock:
+            self._page(page)["cached"] = reason
+
+    def finish(self):
+        self.duration_s = time.perf_counter() - self._t0
+
+    # ---------- summaries ----------
+    def totals(self):
+        pages = list(self.pages.values())
+        out = {f"{stage}_s": round(sum(p[f"{stage}_s"] for p in pages), 4) for stage in STAGES}
+        out.update({
+            "pages": len(pages),
+            "pages_ok": sum(1 for p in pages if not p["error"]),
+            "attempts": sum(p["attempts"] for p in pages),
+            "retries": self.retries,
+            "bytes": sum(p["bytes"] for p in pages),
+            "bytes_saved": sum(p["bytes_saved"] for p in pages),
+            "compression_saved": sum(p["compression_saved"] for p in pages),
+            "pages_not_modified": sum(1 for p in pages if p["cached"] == "not_modified"),
+            "pages_unchanged": sum(1 for p in pages if p["cached"] == "unchanged"),
+            "rows": sum(p["rows"] for p in pages),
+        })
+        return out
+
+    def to_dict(self, extra=None):
+        return {
+            "labels": self.labels,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "duration_s": round(self.duration_s if self.duration_s is not None else time.perf_counter() - self._t0, 3),
+            "totals": self.totals(),
+            "status_codes": dict(self.status_codes),
+            "pages": [self.pages[p] for p in sorted(self.pages)],
+            **(extra or {}),
+        }
+
+    # ---------- exports ----------
+    def write_json(self, path, extra=None):
+        _atomic_write(path, json.dumps(self.to_dict(extra), ensure_ascii=False, indent=2))
+        return path
+
+    def to_prometheus(self):
+        base = ",".join(f'{k}="{v}"' for k, v in sorted(self.labels.items()))
+
+        def lbl(**more):
+            parts = [base] if base else []
+            parts += [f'{k}="{v}"' for k, v in more.items()]
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        t = self.totals()
+        lines = [
+            "# HELP yad2_scrape_duration_seconds Wall time of the last scrape run.",
+            "# TYPE yad2_scrape_duration_seconds gauge",
+            f"yad2_scrape_duration_seconds{lbl()} {self.duration_s or 0:.3f}",
+            "# HELP yad2_scrape_stage_seconds Time spent per stage in the last run (summed over pages).",
+            "# TYPE yad2_scrape_stage_seconds gauge",
+        ]
+        lines += [f"yad2_scrape_stage_seconds{lbl(stage=stage)} {t[f'{stage}_s']:.4f}" for stage in STAGES]
+        lines += [
+            "# HELP yad2_scrape_pages Pages in the last run by result.",
+            "# TYPE yad2_scrape_pages gauge",
+            f"yad2_scrape_pages{lbl(result='ok')} {t['pages_ok']}",
+            f"yad2_scrape_pages{lbl(result='failed')} {t['pages'] - t['pages_ok']}",
+            "# HELP yad2_scrape_bytes Bytes downloaded in the last run.",
+            "# TYPE yad2_scrape_bytes gauge",
+            f"yad2_scrape_bytes{lbl()} {t['bytes']}",
+            "# HELP yad2_scrape_bytes_saved Bytes not downloaded in the last run thanks to 304 revalidation.",
+            "# TYPE yad2_scrape_bytes_saved gauge",
+            f"yad2_scrape_bytes_saved{lbl()} {t['bytes_saved']}",
+            "# HELP yad2_scrape_compression_saved_bytes Decoded minus on-the-wire bytes of compressed responses.",
+            "# TYPE yad2_scrape_compression_saved_bytes gauge",
+            f"yad2_scrape_compression_saved_bytes{lbl()} {t['compression_saved']}",
+            "# HELP yad2_scrape_cached_pages Pages whose rows came from the page cache, by reason.",
+            "# TYPE yad2_scrape_cached_pages gauge",
+            f"yad2_scrape_cached_pages{lbl(reason='not_modified')} {t['pages_not_modified']}",
+            f"yad2_scrape_cached_pages{lbl(reason='unchanged')} {t['pages_unchanged']}",
+            "# HELP yad2_scrape_rows Listing rows extracted in the last run.",
+            "# TYPE yad2_scrape_rows gauge",
+            f"yad2_scrape_rows{lbl()} {t['rows']}",
+            "# HELP yad2_scrape_retries Page retries in the last run.",
+            "# TYPE yad2_scrape_retries gauge",
+            f"yad2_scrape_retries{lbl()} {self.retries}",
+            "# HELP yad2_scrape_responses Responses in the last run by HTTP status (or error class).",
+            "# TYPE yad2_scrape_responses gauge",
+        ]
+        lines += [f"yad2_scrape_responses{lbl(code=code)} {n}" for code, n in sorted(self.status_codes.items())]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        _atomic_write(path, self.to_prometheus())
+        return path
+
+
+def _atomic_write(path, text):
+    # the textfile collector may read at any moment - never expose a half-written file
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
@@ -0,0 +1,180 @@
+"""
+Nearest-neighbour index for "listings similar to this one".
+
+Every listing becomes a normalized feature vector, built once per dataset with NumPy:
+- numeric: Production Year, log Price, Hand, KM - centered on the median and scaled by
+  the IQR (robust to price / KM outliers); a missing value sits at the median
+- categorical: Model, SubModel, City - factorized codes; a mismatch adds a fixed penalty
+
+distance^2 = sum w^2 * (z - z_query)^2 + sum w_cat^2 * (code != code_query)
+
+Distances are computed block by block (a (queries x rows) block as one matrix product
+plus the code comparisons), keeping a running top-k per query, so the whole dataset is
+scanned in a handful of vectorized steps and memory stays bounded. A single query first
+scans only its own Model's rows: other models are at least the Model penalty away, so
+when k neighbours are found within it the result is already exact.
+
+    index = SimilarityIndex(df)
+    index.similar(ad_number, k=10)      # DataFrame of the 10 closest listings + distance
+"""
+
+NUMERIC_FEATURES = {          # column -> weight (in IQR units)
+    "Production Year": 1.5,
+    "Price (₪)": 1.0,         # compared on a log scale
+    "Hand": 0.5,
+    "KM": 1.0,
+}
+CATEGORICAL_FEATURES = {      # column -> distance added when the values differ
+    "Model": 4.0,             # another model only fills in when the same model runs out
+    "SubModel": 1.0,
+    "City": 0.3,
+}
+BLOCK_CELLS = 4_000_000       # queries x rows per distance block (~32 MB of float64)
+
+
+class SimilarityIndex:
+    def __init__(self, df, numeric=NUMERIC_FEATURES, categorical=CATEGORICAL_FEATURES):
+        """df is treated as read-only; the feature matrix is built here, once."""
+        import numpy as np
+        import pandas as pd
+
+        self.df = df
+        self.n = len(df)
+        cols = []
+        for column, weight in numeric.items():
+            if column not in df.columns:
+                continue
+            values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            if column == "Price (₪)":
+                values = np.log(np.where(values > 0, values, np.nan))
+            valid = values[~np.isnan(values)]
+            if valid.size == 0:
+                continue
+            q1, median, q3 = np.percentile(valid, [25, 50, 75])
+            scale = (q3 - q1) or valid.std() or 1.0
+            cols.append(np.nan_to_num((values - median) / scale, nan=0.0) * weight)
+        self.features = np.column_stack(cols) if cols else np.zeros((self.n, 0))
+        self._sq_norms = (self.features ** 2).sum(axis=1)
+
+        # (codes, squared penalty); missing values get their own code (-1), so two missing cities match
+        self.codes = []
+        for column, weight in categorical.items():
+            if column in df.columns:
+                codes, _ = pd.factorize(df[column], use_na_sentinel=True)
+                self.codes.append((codes.astype(np.int32), float(weight) ** 2))
+
+        # rows grouped by the first categorical (Model): a single query scans its own group first
+        self._groups = None
+        if self.codes:
+            codes, _ = self.codes[0]
+            order = np.argsort(codes, kind="stable")
+            bounds = np.flatnonzero(np.diff(codes[order])) + 1
+            self._groups = dict(zip(codes[order][np.r_[0, bounds]].tolist(), np.split(order, bounds))) if self.n else {}
+
+        ads = pd.to_numeric(df["Ad Number"], errors="coerce") if "Ad Number" in df.columns else pd.Series(dtype=float)
+        self._ad_numbers = ads.to_numpy(dtype=float, na_value=np.nan)
+        self._ad_index = pd.Index(ads)
+
+    def position(self, ad_number):
+        """Row position of an Ad Number (the first one if it was scraped more than once)."""
+        import numpy as np
+
+        hits = np.flatnonzero(self._ad_index == float(ad_number))
+        if hits.size == 0:
+            raise KeyError(f"Unknown Ad Number {ad_number!r}")
+        return int(hits[0])
+
+    def _block_distances(self, q, rows):
+        """Squared distances, shape (len(q), len(rows)) - rows is a slice."""
+        import numpy as np
+
+        d = self._sq_norms[q][:, None] + self._sq_norms[rows][None, :] \
+            - 2.0 * self.features[q] @ self.features[rows].T
+        np.maximum(d, 0.0, out=d)          # rounding can leave tiny negatives
+        for codes, penalty in self.codes:
+            d += penalty * (codes[q][:, None] != codes[rows][None, :])
+        return d
+
+    def neighbours(self, positions, k=10):
+        """
+        k nearest rows of every query position (the query row and copies of its ad excluded).
+
+        Returns:
+        --------
+        (np.ndarray, np.ndarray)
+            positions and distances, shape (len(positions), k), nearest first
+        """
+        import numpy as np
+
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1)
+        k = max(0, min(int(k), self.n - 1))
+        best_pos = np.full((len(positions), k), -1, dtype=np.int64)
+        best_dist = np.full((len(positions), k), np.inf)
+        if k == 0 or len(positions) == 0:
+            return best_pos, best_dist
+
+        q_block = max(1, min(len(positions), BLOCK_CELLS // max(1, min(self.n, 65_536))))
+        r_block = max(k, BLOCK_CELLS // q_block)
+        for qs in range(0, len(positions), q_block):
+            q = positions[qs:qs + q_block]
+            top_pos, top_dist = best_pos[qs:qs + q_block], best_dist[qs:qs + q_block]
+            for rs in range(0, self.n, r_block):
+                rows = slice(rs, min(rs + r_block, self.n))
+                d = self._block_distances(q, rows)
+                same_ad = self._ad_numbers[q][:, None] == self._ad_numbers[rows][None, :]
+                d[same_ad] = np.inf
+                in_block = (q >= rs) & (q < rows.stop)
+                d[np.flatnonzero(in_block), q[in_block] - rs] = np.inf
+
+                # merge this block's candidates into the running top-k
+                cand_dist = np.concatenate([top_dist, d], axis=1)
+                cand_pos = np.concatenate([top_pos, np.broadcast_to(np.arange(rs, rows.stop), d.shape)], axis=1)
+                keep = np.argpartition(cand_dist, k - 1, axis=1)[:, :k]
+                top_dist = np.take_along_axis(cand_dist, keep, axis=1)
+                top_pos = np.take_along_axis(cand_pos, keep, axis=1)
+
+            order = np.argsort(top_dist, axis=1, kind="stable")
+            best_dist[qs:qs + q_block] = np.sqrt(np.take_along_axis(top_dist, order, axis=1))
+            best_pos[qs:qs + q_block] = np.take_along_axis(top_pos, order, axis=1)
+        return best_pos, best_dist
+
+    def _neighbours_in_group(self, p, k):
+        """
+        Exact k nearest of one query from its own group (same Model) only, or None.
+
+        Every row outside the group is at least the group penalty away, so when the k-th
+        in-group distance is within it, no other row can come closer.
+        """
+        import numpy as np
+
+        if self._groups is None:
+            return None
+        rows = self._groups[int(self.codes[0][0][p])]
+        diff = self.features[rows] - self.features[p]
+        d = np.einsum("ij,ij->i", diff, diff)
+        for codes, penalty in self.codes[1:]:
+            d += penalty * (codes[rows] != codes[p])
+        d[self._ad_numbers[rows] == self._ad_numbers[p]] = np.inf
+        d[rows == p] = np.inf
+        if np.isfinite(d).sum() < k:
+            return None
+        top = np.argpartition(d, k - 1)[:k]
+        top = top[np.argsort(d[top], kind="stable")]
+        if d[top[-1]] > self.codes[0][1]:
+            return None
+        return rows[top], np.sqrt(d[top])
+
+    def similar(self, ad_number, k=10, columns=None):
+        """The k listings closest to ad_number, nearest first, with a "Distance" column."""
+        p = self.position(ad_number)
+        k = max(0, min(int(k), self.n - 1))
+        fast = self._neighbours_in_group(p, k) if k else None
+        if fast is not None:
+            pos, dist = fast
+        else:
+            pos, dist = (a[0] for a in self.neighbours([p], k))
+        found = pos >= 0
+        out = self.df.iloc[pos[found]]
+        if columns is not None:
+            out = out[[c for c in columns if c in out.columns]]
+        return out.assign(Distance=dist[found].round(3)).reset_index(drop=True)
@@ -0,0 +1,209 @@
+"""
+Optional DuckDB backend: filters and per-year aggregates run as SQL directly over the
+stored CSV / Parquet files (one file or a glob of many scrapes), so only the small
+result set is materialized in Python - large historical datasets never have to be
+loaded into a DataFrame.
+
+    backend = SQLBackend("history/*.parquet")
+    by_year = backend.by_year(years=(2018, 2024), model="פורסטר")
+    listings = backend.listings(years=(2018, 2024), model="פורסטר", limit=500)
+
+duckdb is optional (pip install duckdb); available() tells whether it is installed and
+the callers (build_yad2_dashboard_html(backend="duckdb")) fall back to pandas without it.
+
+Usage (from Car_ads_script/):
+    python sql_backend.py --data yad2_scraped_data.csv --model פורסטר --years 2018-2024
+    python sql_backend.py --data yad2_scraped_data.csv --to-parquet yad2_scraped_data.parquet
+"""
+import os
+import sys
+import numbers
+import argparse
+
+DATA_PATH = "yad2_scraped_data.csv"
+MIN_PRICE = 1000
+
+
+def available():
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _sql_string(text):
+    return "'" + str(text).replace("'", "''") + "'"
+
+
+def _sql_ident(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _reader(path):
+    """read_csv / read_parquet table function for a file or glob."""
+    src = _sql_string(path)
+    if str(path).lower().endswith(".parquet"):
+        return f"read_parquet({src}, union_by_name = true)"
+    return f"read_csv({src}, header = true, union_by_name = true)"
+
+
+class SQLBackend:
+    def __init__(self, path=DATA_PATH, min_price=MIN_PRICE, connection=None):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("The SQL backend needs duckdb: pip install duckdb") from e
+
+        self.path = path
+        self.con = connection or duckdb.connect()
+        # same cleanup as the pandas path: numeric year / price, text columns never NULL,
+        # sanity price floor. A view, so nothing is read until a query runs.
+        self.con.execute(f"""
+            CREATE OR REPLACE VIEW listings AS
+            SELECT * REPLACE (
+                CAST(ROUND(TRY_CAST("Production Year" AS DOUBLE)) AS INTEGER) AS "Production Year",
+                TRY_CAST("Price (₪)" AS DOUBLE) AS "Price (₪)",
+                COALESCE(CAST("Model" AS VARCHAR), '') AS "Model",
+                COALESCE(CAST("SubModel" AS VARCHAR), '') AS "SubModel"
+            )
+            FROM {_reader(path)}
+            WHERE TRY_CAST("Production Year" AS DOUBLE) IS NOT NULL
+              AND TRY_CAST("Price (₪)" AS DOUBLE) > {float(min_price)}
+        """)
+
+    @property
+    def columns(self):
+        """Column names of the listings view (read once, from the file header / schema)."""
+        if getattr(self, "_columns", None) is None:
+            self._columns = [row[0] for row in self.con.execute("DESCRIBE listings").fetchall()]
+        return self._columns
+
+    def _column_list(self, names):
+        unknown = [c for c in names if c not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown column(s) {unknown}; available: {self.columns}")
+        return ", ".join(_sql_ident(c) for c in names)
+
+    # ---------- filters ----------
+    @staticmethod
+    def _where(years=None, model="all", submodel="all", price_range=None):
+        """(SQL WHERE clause, parameters) for the global filters (same forms as build_yad2_dashboard_html)."""
+        clauses, params = [], []
+        if years not in ("all", None):
+            if isinstance(years, str) and "-" in years:
+                a, b = years.split("-", 1)
+                years = (int(a), int(b))
+            if isinstance(years, (tuple, list)) and len(years) == 2 and all(isinstance(y, numbers.Integral) for y in years):
+                clauses.append('"Production Year" BETWEEN ? AND ?')
+                params += [int(years[0]), int(years[1])]
+            else:
+                years = sorted(int(y) for y in years)
+                clauses.append(f'"Production Year" IN ({", ".join("?" * len(years))})')
+                params += years
+        if model not in ("all", "All", None):
+            clauses.append('"Model" = ?')
+            params.append(model)
+            if submodel not in ("all", "All", None):
+                clauses.append('"SubModel" = ?')
+                params.append(submodel)
+        if price_range is not None:
+            clauses.append('"Price (₪)" BETWEEN ? AND ?')
+            params += [float(price_range[0]), float(price_range[1])]
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def listings(self, years=None, model="all", submodel="all", price_range=None, columns=None,
+                 order_by="Price (₪)", limit=None, offset=0):
+        """Filtered listings as a DataFrame (only these rows are materialized)."""
+        where, params = self._where(years, model, submodel, price_range)
+        cols = self._column_list(columns) if columns else "*"
+        sql = f"SELECT {cols} FROM listings {where} ORDER BY {self._column_list([order_by])}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+        return self.con.execute(sql, params).df()
+
+    def count(self, years=None, model="all", submodel="all", price_range=None):
+        where, params = self._where(years, model, submodel, price_range)
+        return self.con.execute(f"SELECT COUNT(*) FROM listings {where}", params).fetchone()[0]
+
+    # ---------- aggregates ----------
+    def by_year(self, years=None, model="all", submodel="all", price_range=None):
+        """
+        Per-year listings / avg_price / median_price plus depreciation via window functions.
+
+        Returns:
+        --------
+        pd.DataFrame
+            Production Year, listings, avg_price, median_price, depr_yoy_pct,
+            depr_from_prev_pct, depr_to_next_pct (NaN at the edges)
+        """
+        where, params = self._where(years, model, submodel, price_range)
+        return self.con.execute(f"""
+            WITH per_year AS (
+                SELECT "Production Year",
+                       COUNT(*) AS listings,
+                       AVG("Price (₪)") AS avg_price,
+                       MEDIAN("Price (₪)") AS median_price
+                FROM listings {where}
+                GROUP BY "Production Year"
+            )
+            SELECT *,
+                   (avg_price / LAG(avg_price) OVER w - 1) * 100 AS depr_yoy_pct,
+                   (LAG(avg_price) OVER w - avg_price) / LAG(avg_price) OVER w * 100 AS depr_from_prev_pct,
+                   (avg_price - LEAD(avg_price) OVER w) / avg_price * 100 AS depr_to_next_pct
+            FROM per_year
+            WINDOW w AS (ORDER BY "Production Year")
+            ORDER BY "Production Year"
+        """, params).df()
+
+    def build_aggs(self, years=None, model="all", submodel="all", price_range=None):
+        """(by_year with sweet score, sweet_year) - like build_dashboard_plotly.build_aggs, aggregated in SQL.
+
+        The depreciation columns come from by_year's window functions; score_by_year only adds the score.
+        """
+        from build_dashboard_plotly import score_by_year
+
+        return score_by_year(self.by_year(years, model, submodel, price_range))
+
+    def models(self):
+        return self.con.execute("""
+            SELECT "Model", COUNT(*) AS listings, MEDIAN("Price (₪)") AS median_price
+            FROM listings WHERE "Model" <> '' GROUP BY "Model" ORDER BY listings DESC
+        """).df()
+
+    def to_parquet(self, out_path):
+        """Write the cleaned listings to Parquet (columnar, compressed - cheaper to query later)."""
+        self.con.execute(f"COPY (SELECT * FROM listings) TO {_sql_string(out_path)} (FORMAT parquet)")
+        return out_path
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--data", default=DATA_PATH, help="CSV / Parquet file or glob")
+    ap.add_argument("--model", default="all")
+    ap.add_argument("--submodel", default="all")
+    ap.add_argument("--years", default="all", help="'all' or YYYY-YYYY")
+    ap.add_argument("--to-parquet", help="write the cleaned listings to this Parquet file and exit")
+    args = ap.parse_args(argv)
+
+    if not available():
+        print("duckdb is not installed: pip install duckdb")
+        return 1
+    if not any(ch in args.data for ch in "*?[") and not os.path.exists(args.data):
+        print(f"No such file: {args.data}")
+        return 1
+
+    backend = SQLBackend(args.data)
+    if args.to_parquet:
+        print("✅ Saved to:", backend.to_parquet(args.to_parquet))
+        return 0
+
+    by_year, sweet_year = backend.build_aggs(args.years, args.model, args.submodel)
+    print(by_year.round(2).to_string(index=False))
+    print("Sweet year:", sweet_year)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
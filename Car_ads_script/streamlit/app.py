@@ -1,26 +1,79 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 
+# shared analytics modules (agg_store.py, ...) live one folder up, next to data_extracter.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from submodel_parser import add_submodel_columns
+from description_miner import mine_descriptions
+from listing_index import ListingIndex
+from listing_table import ListingTable, SORTABLE
+from similarity_index import SimilarityIndex
+
 st.set_page_config(page_title="Yad2 Cars Dashboard", layout="wide")
 st.title("Yad2 Cars – Interactive Dashboard")
 
 DATA_PATH = "yad2_scraped_data.csv"
-df = pd.read_csv(DATA_PATH)
+AGG_STORE_PATH = "yad2_aggs.json"
+DESCRIPTION_CACHE_PATH = "description_cache.csv"
+TIME_ON_MARKET_PATH = "time_on_market.csv"   # precomputed by market_time.py
+REGIONAL_INDEX_PATH = "regional_index.csv"   # precomputed by regional_index.py
+DEPRECIATION_CURVES_PATH = "depreciation_curves.csv"   # precomputed by depreciation_curves.py
+
+
+# Loaded + cleaned once per data file (not on every rerun); shared between sessions, so it is
+# never modified in place below - filters always build new frames.
+@st.cache_resource(show_spinner="Loading listings...")
+def load_listings(path, mtime):
+    df = pd.read_csv(path)
+
+    # KM is not in the Yad2 payload anymore - recover it from the descriptions (cached per description hash)
+    if "Description" in df.columns and ("KM (desc)" not in df.columns or "KM" not in df.columns):
+        df = mine_descriptions(df, cache_path=DESCRIPTION_CACHE_PATH)
+
+    # --- Basic cleanup ---
+    for col in ["Production Year", "Price (₪)", "KM", "Hand"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    for col in ["Model", "SubModel", "City", "Link"]:
+        if col in df.columns:
+            df[col] = df[col].fillna("").astype(str)
+
+    df = df.dropna(subset=["Production Year", "Price (₪)"])
+    df["Production Year"] = df["Production Year"].round().astype(int)
 
-# --- Basic cleanup ---
-for col in ["Production Year", "Price (₪)", "KM", "Hand"]:
-    if col in df.columns:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+    # SubModel -> Trim / Automatic / Engine (L) / HP / Generation (parsed once per distinct string)
+    df = add_submodel_columns(df)
+    return df.reset_index(drop=True)   # index == row position (used by the listings table)
 
-for col in ["Model", "SubModel", "City", "Link"]:
-    if col in df.columns:
-        df[col] = df[col].fillna("").astype(str)
 
-df = df.dropna(subset=["Production Year", "Price (₪)"])
-df["Production Year"] = df["Production Year"].round().astype(int)
+@st.cache_resource
+def load_listing_table(path, mtime):
+    # sort orders per column are computed on first use and kept with the table
+    return ListingTable(load_listings(path, mtime))
+
+
+@st.cache_resource
+def load_listing_index(path, mtime):
+    # per-value bitmaps / sorted range arrays, built lazily and kept across reruns
+    return ListingIndex(load_listings(path, mtime))
+
+
+@st.cache_resource(show_spinner="Building similarity index...")
+def load_similarity_index(path, mtime):
+    # normalized feature vectors over all listings (not just the filtered ones), built once
+    return SimilarityIndex(load_listings(path, mtime))
+
+
+data_mtime = os.path.getmtime(DATA_PATH)
+df = load_listings(DATA_PATH, data_mtime)
+index = load_listing_index(DATA_PATH, data_mtime)
 
 # --- Sidebar filters ---
 st.sidebar.header("Filters")
@@ -44,7 +97,8 @@ if use_model:
 
 if use_sub:
     if use_model and model_sel != "All":
-        subs = sorted([s for s in df[df["Model"] == model_sel]["SubModel"].dropna().unique().tolist() if str(s).strip()])
+        model_rows = index.take(index.value_bitmap("Model", [model_sel]))
+        subs = sorted([s for s in model_rows["SubModel"].dropna().unique().tolist() if str(s).strip()])
     else:
         subs = sorted([s for s in df["SubModel"].dropna().unique().tolist() if str(s).strip()])
 
@@ -64,29 +118,60 @@ if use_hand:
 else:
     hands = None
 
-trim_outliers = st.sidebar.checkbox("Trim price outliers (1% - 99%)", value=True)
-
-# --- Apply filters ---
-f = df[
-    (df["Production Year"].between(*year_range)) &
-    (df["Price (₪)"].between(*price_range))
-].copy()
-
-# ✅ Apply model/submodel independently
-if use_model and model_sel != "All":
-    f = f[f["Model"] == model_sel]
-
-if use_sub and sub_sel != "All":
-    f = f[f["SubModel"] == sub_sel]
+use_engine = "Engine (L)" in df.columns and df["Engine (L)"].notna().any()
+if use_engine:
+    engine_vals = sorted(df["Engine (L)"].dropna().unique().tolist())
+    engines = st.sidebar.multiselect("Engine (L)", engine_vals, default=engine_vals)
+else:
+    engines = None
 
-if use_km and km_range:
-    f = f[f["KM"].between(*km_range)]
+trim_outliers = st.sidebar.checkbox("Trim price outliers (1% - 99%)", value=True)
 
-if use_hand and hands is not None:
-    f = f[f["Hand"].isin(hands)]
+# Incremental aggregates (agg_store.py): per-year count/mean/median and trim bounds come from
+# pre-merged sketches over all scrapes, instead of re-grouping the listings on every rerun.
+# Only usable when the active filters map onto the store cells (year / model / submodel).
+use_store = False
+if os.path.exists(AGG_STORE_PATH):
+    use_store = st.sidebar.checkbox("Use incremental aggregates (all scrapes)", value=False)
+
+store_filters_only = (
+    price_range == (min_price, max_price)
+    and (not use_km or km_range == (km_min, km_max))
+    and (not use_hand or set(hands) == set(hand_vals))
+    and (not use_engine or set(engines) == set(engine_vals))
+)
+store = None
+if use_store and store_filters_only:
+    from agg_store import AggStore
+
+    @st.cache_resource
+    def load_store(path, mtime):
+        return AggStore.load(path)
+
+    store = load_store(AGG_STORE_PATH, os.path.getmtime(AGG_STORE_PATH))
+    store_years = range(year_range[0], year_range[1] + 1)
+elif use_store:
+    st.sidebar.caption("Incremental aggregates ignored: price / KM / Hand / Engine filters are active.")
+
+# --- Apply filters (bitmap intersection, rows gathered once - see listing_index.py) ---
+# ✅ model/submodel apply independently; listings without a known KM stay in unless the KM range was narrowed
+f = index.filter(
+    year_range=year_range,
+    price_range=price_range,
+    model=model_sel if use_model else "All",
+    submodel=sub_sel if use_sub else "All",
+    km_range=km_range if use_km and km_range and km_range != (km_min, km_max) else None,
+    hands=hands if use_hand else None,
+    engines=engines if use_engine and engines is not None and len(engines) < len(engine_vals) else None,
+)
 
+trim_bounds = None
 if trim_outliers and len(f) > 10:
-    p1, p99 = f["Price (₪)"].quantile([0.01, 0.99])
+    if store is not None:
+        p1, p99 = store.price_bounds(0.01, 0.99, model_sel, sub_sel, store_years)
+    else:
+        p1, p99 = f["Price (₪)"].quantile([0.01, 0.99])
+    trim_bounds = (p1, p99)
     f = f[(f["Price (₪)"] >= p1) & (f["Price (₪)"] <= p99)]
 
 # Guard
@@ -124,11 +209,16 @@ fig_scatter.update_xaxes(
 fig_scatter.update_layout(height=520)
 
 # --- Aggregations ---
-by_year = f.groupby("Production Year").agg(
-    listings=("Price (₪)", "size"),
-    avg_price=("Price (₪)", "mean"),
-    median_price=("Price (₪)", "median"),
-).reset_index().sort_values("Production Year")
+by_year = None
+if store is not None:
+    by_year = store.by_year(model_sel, sub_sel, store_years, price_range=trim_bounds)
+if by_year is None or by_year.empty:
+    # no store, or no store cells for this selection: aggregate the filtered listings
+    by_year = f.groupby("Production Year").agg(
+        listings=("Price (₪)", "size"),
+        avg_price=("Price (₪)", "mean"),
+        median_price=("Price (₪)", "median"),
+    ).reset_index().sort_values("Production Year")
 
 # --- Combo: count + avg price by year ---
 fig_combo = px.bar(
@@ -235,9 +325,155 @@ with cB:
 
 st.caption(f"Sweet Point year (per current filters): {sweet_year}")
 
+# --- Avg price by year, grouped by a parsed SubModel attribute ---
+group_options = [c for c in ["Engine (L)", "Generation", "Trim", "Automatic", "HP"] if c in f.columns and f[c].notna().any()]
+if group_options:
+    group_col = st.selectbox("Group avg price by", group_options)
+    by_group = (
+        f.dropna(subset=[group_col])
+        .groupby([group_col, "Production Year"], observed=True)["Price (₪)"]
+        .agg(["size", "mean"])
+        .reset_index()
+        .rename(columns={"size": "listings", "mean": "avg_price"})
+    )
+    by_group[group_col] = by_group[group_col].astype(str)
+    fig_group = px.line(
+        by_group, x="Production Year", y="avg_price", color=group_col, markers=True,
+        hover_data=["listings"], title=f"Avg Price by Year per {group_col}",
+    )
+    fig_group.update_layout(height=380)
+    st.plotly_chart(fig_group, use_container_width=True)
+
+# --- Cross-model depreciation (precomputed normalized curves, one lookup per selection) ---
+if os.path.exists(DEPRECIATION_CURVES_PATH):
+    from depreciation_curves import index_curves, curves_for, comparison_figure
+    from depreciation_curves import MIN_LISTINGS as MIN_CURVE_LISTINGS
+
+    @st.cache_data
+    def load_depreciation_curves(path, mtime):
+        return index_curves(pd.read_csv(path))
+
+    curves = load_depreciation_curves(DEPRECIATION_CURVES_PATH, os.path.getmtime(DEPRECIATION_CURVES_PATH))
+    curve_models = curves.groupby(level=0)["listings"].sum().sort_values(ascending=False).index.tolist()
+    if len(curve_models) > 1:
+        st.subheader("Compare Depreciation Across Models")
+        default_models = ([model_sel] if model_sel in curve_models else []) + \
+            [m for m in curve_models if m != model_sel][:4]
+        cD1, cD2 = st.columns([3, 1])
+        compare_models = cD1.multiselect("Models", curve_models, default=default_models)
+        curve_x = cD2.radio("X axis", ["Age", "Production Year"], horizontal=True)
+        if compare_models:
+            selected_curves = curves_for(curves, compare_models, min_listings=MIN_CURVE_LISTINGS)
+            st.plotly_chart(comparison_figure(selected_curves, x=curve_x), use_container_width=True)
+
+# --- Time on market (precomputed table, no timestamp parsing here) ---
+if os.path.exists(TIME_ON_MARKET_PATH):
+    @st.cache_data
+    def load_time_on_market(path, mtime):
+        return pd.read_csv(path)
+
+    tom = load_time_on_market(TIME_ON_MARKET_PATH, os.path.getmtime(TIME_ON_MARKET_PATH))
+    tom = tom[tom["Production Year"].between(*year_range)]
+    if use_model and model_sel != "All":
+        tom = tom[tom["Model"] == model_sel]
+
+    if not tom.empty:
+        st.subheader("Time on Market")
+        tom_year = tom.groupby("Production Year").apply(
+            lambda g: pd.Series({
+                "listings": g["listings"].sum(),
+                "disappeared": g["disappeared"].sum(),
+                "median_age_days": np.average(g["median_age_days"].fillna(0), weights=g["listings"]),
+            }),
+            include_groups=False,
+        ).reset_index()
+
+        cT1, cT2 = st.columns(2)
+        with cT1:
+            fig_age = px.bar(tom_year, x="Production Year", y="median_age_days",
+                             hover_data=["listings", "disappeared"],
+                             title="Listing age (days, listing-weighted median per band)")
+            fig_age.update_layout(height=340)
+            st.plotly_chart(fig_age, use_container_width=True)
+        with cT2:
+            gone = tom.dropna(subset=["median_days_to_disappear"])
+            if not gone.empty:
+                fig_gone = px.scatter(gone, x="Production Year", y="median_days_to_disappear",
+                                      size="disappeared", color="Price Band",
+                                      title="Days until the listing disappeared (by price band)")
+                fig_gone.update_layout(height=340)
+                st.plotly_chart(fig_gone, use_container_width=True)
+            else:
+                st.caption("Time-to-disappearance needs at least two scrapes in the raw archive.")
+
+# --- Regional price index (precomputed table, rolled up over the selected years only) ---
+if os.path.exists(REGIONAL_INDEX_PATH):
+    from regional_index import summarize
+
+    @st.cache_data
+    def load_regional_index(path, mtime):
+        return pd.read_csv(path)
+
+    regional = load_regional_index(REGIONAL_INDEX_PATH, os.path.getmtime(REGIONAL_INDEX_PATH))
+    region_model = model_sel if use_model and model_sel != "All" else "All"
+    by_region = summarize(regional, "region", region_model, year_range).dropna(subset=["lat"])
+
+    if not by_region.empty:
+        st.subheader("Regional Price Index")
+        st.caption("100 = national median of the same model and year; above 100 = pricier than elsewhere.")
+        cR1, cR2 = st.columns([1.2, 1])
+        with cR1:
+            spread = max(5.0, float((by_region["price_index"] - 100).abs().max()))
+            fig_map = px.scatter_map(
+                by_region, lat="lat", lon="lon", size="listings", color="price_index",
+                color_continuous_scale="RdYlGn_r", range_color=(100 - spread, 100 + spread),
+                hover_name="Area", hover_data={"listings": True, "median_price": True, "lat": False, "lon": False},
+                size_max=45, zoom=6, center={"lat": 31.7, "lon": 35.0}, map_style="carto-positron",
+                title="Price index by region",
+            )
+            fig_map.update_layout(height=520)
+            st.plotly_chart(fig_map, use_container_width=True)
+        with cR2:
+            by_city = summarize(regional, "city", region_model, year_range, min_listings=10)
+            if not by_city.empty:
+                top = pd.concat([by_city.head(10), by_city.tail(10)]).drop_duplicates("Area")
+                fig_city = px.bar(top.sort_values("price_index"), x="price_index", y="Area", color="Region",
+                                  orientation="h", hover_data=["listings", "median_price"],
+                                  title="Most / least expensive cities (10+ listings)")
+                fig_city.add_vline(x=100, line_dash="dot")
+                fig_city.update_layout(height=520)
+                st.plotly_chart(fig_city, use_container_width=True)
+
+# --- Listings table: presorted per column, only the visible page is sent ---
 st.subheader("Filtered Listings")
-st.dataframe(
-    f.sort_values("Price (₪)").reset_index(drop=True),
-    use_container_width=True,
-    height=340
-)
+table = load_listing_table(DATA_PATH, data_mtime)
+selected = np.zeros(len(df), dtype=bool)
+selected[f.index.to_numpy()] = True
+
+t1, t2, t3, t4 = st.columns([2.2, 1, 0.8, 0.8])
+query = t1.text_input("Search (model, submodel, city, description, ad number)", "")
+sort_label = t2.selectbox("Sort by", [k for k, col in SORTABLE.items() if col in df.columns])
+descending = t3.checkbox("Descending", value=False)
+page_size = t4.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+
+rows = table.search(query, selected)
+total = int(rows.sum())
+n_pages = max(1, -(-total // page_size))
+page_num = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, value=1, step=1)
+
+page_df, _ = table.page(rows, SORTABLE[sort_label], ascending=not descending, page=page_num, page_size=page_size)
+st.dataframe(page_df, use_container_width=True, height=340)
+first = (page_num - 1) * page_size
+st.caption(f"Rows {min(first + 1, total):,}–{min(first + page_size, total):,} of {total:,}")
+
+# --- Similar listings: nearest neighbours of one ad over the whole dataset ---
+if "Ad Number" in page_df.columns and not page_df.empty:
+    s1, s2 = st.columns([2.2, 0.8])
+    similar_ad = s1.selectbox("Show listings similar to (Ad Number, from this page)",
+                              page_df["Ad Number"].dropna().tolist())
+    n_similar = s2.selectbox("How many", [5, 10, 20], index=1)
+    similar = load_similarity_index(DATA_PATH, data_mtime).similar(
+        similar_ad, k=n_similar,
+        columns=["Ad Number", "Price (₪)", "Production Year", "Model", "SubModel", "Hand", "KM", "City", "Link"],
+    )
+    st.dataframe(similar, use_container_width=True, height=280)
@@ -0,0 +1,98 @@
+"""
+Split Yad2 SubModel strings into typed columns.
+
+    "XS אוט׳ 2.0 (150 כ״ס) [2011-2016]"
+        -> Trim="XS", Automatic=True, Engine (L)=2.0, HP=150,
+           Generation Start=2011, Generation End=2016, Generation="2011-2016"
+
+Only the distinct strings are parsed (a few hundred even for millions of rows);
+the results are broadcast back through the factorized codes.
+"""
+import re
+from functools import lru_cache
+
+SUBMODEL_COLUMNS = ["Trim", "Automatic", "Engine (L)", "HP", "Generation Start", "Generation End", "Generation"]
+
+# precompiled once
+_GENERATION_RE = re.compile(r"\[\s*(\d{4})\s*(?:-\s*(\d{4})?)?\s*\]")
+_HP_RE = re.compile(r"\(\s*(\d{2,4})\s*כ\W?ס\W?\s*\)")
+_ENGINE_RE = re.compile(r"(?<![\d.])(\d{1,2}\.\d)(?![\d.])")
+_AUTO_RE = re.compile(r"אוט|אוטומט|רובוט|טיפטרוניק|CVT|DSG", re.IGNORECASE)
+_MANUAL_RE = re.compile(r"ידני", re.IGNORECASE)
+_TRIM_END_RE = re.compile(r"\s(?:אוט|ידני|רובוט|טיפטרוניק)|\s\d{1,2}\.\d|\s*[(\[]")
+
+
+@lru_cache(maxsize=None)
+def parse_submodel(text):
+    """Parse one SubModel string -> (trim, automatic, engine_l, hp, gen_start, gen_end); None where unknown."""
+    if not isinstance(text, str) or not text.strip():
+        return (None, None, None, None, None, None)
+    text = text.strip()
+
+    gen = _GENERATION_RE.search(text)
+    gen_start = int(gen.group(1)) if gen else None
+    gen_end = int(gen.group(2)) if gen and gen.group(2) else None
+
+    hp = _HP_RE.search(text)
+    hp = int(hp.group(1)) if hp else None
+
+    engine = _ENGINE_RE.search(_GENERATION_RE.sub(" ", text))
+    engine = float(engine.group(1)) if engine else None
+
+    if _MANUAL_RE.search(text):
+        automatic = False
+    elif _AUTO_RE.search(text):
+        automatic = True
+    else:
+        automatic = None
+
+    cut = _TRIM_END_RE.search(" " + text)
+    trim = (" " + text)[:cut.start()].strip() if cut else text
+    return (trim or None, automatic, engine, hp, gen_start, gen_end)
+
+
+def parse_submodel_column(series):
+    """
+    Parse a SubModel column into a DataFrame with SUBMODEL_COLUMNS (same index as `series`).
+
+    The column is factorized, each distinct value is parsed once and the parsed
+    table is gathered back by code, so the cost scales with the number of distinct
+    strings, not rows.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    parsed = pd.DataFrame([parse_submodel(u) for u in uniques], columns=SUBMODEL_COLUMNS[:-1])
+    parsed["Generation"] = [generation_label(a, b) for a, b in zip(parsed["Generation Start"], parsed["Generation End"])]
+    # one extra all-missing row for NaN values (code -1)
+    parsed.loc[len(parsed)] = [None] * len(SUBMODEL_COLUMNS)
+    parsed = parsed.astype({
+        "Trim": "string",
+        "Automatic": "boolean",
+        "Engine (L)": "Float64",
+        "HP": "Int64",
+        "Generation Start": "Int64",
+        "Generation End": "Int64",
+        "Generation": "string",
+    })
+
+    codes = np.where(codes < 0, len(parsed) - 1, codes)
+    out = parsed.take(codes)
+    out.index = series.index
+    return out
+
+
+def add_submodel_columns(df, column="SubModel"):
+    """Return df with the parsed SubModel columns added (existing ones are replaced)."""
+    if column not in df.columns:
+        return df
+    parsed = parse_submodel_column(df[column])
+    return df.drop(columns=[c for c in SUBMODEL_COLUMNS if c in df.columns]).join(parsed)
+
+
+def generation_label(start, end):
+    """Label like 2011-2016, 2020- (still produced) or None."""
+    if start is None or start != start:
+        return None
+    return f"{int(start)}-{int(end)}" if end is not None and end == end else f"{int(start)}-"
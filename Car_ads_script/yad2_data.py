@@ -0,0 +1,36 @@
+import os
+
+
+def load_yad2_data(filename='yad2_scraped_data.csv'):
+    """
+    Load Yad2 scraped data with validation.
+    
+    Parameters:
+    -----------
+    filename : str
+        CSV file path
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Raw dataframe from CSV
+    
+    Raises:
+    -------
+    FileNotFoundError
+        If CSV doesn't exist
+    """
+    import pandas as pd
+
+    if not os.path.exists(filename):
+        raise FileNotFoundError(f"File not found: {filename}")
+    
+    df = pd.read_csv(filename, encoding='utf-8-sig')
+    
+    # Validate required columns exist
+    required_cols = ['Production Year', 'Price (₪)']
+    missing = [col for col in required_cols if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    
+    return df